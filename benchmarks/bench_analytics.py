@@ -0,0 +1,113 @@
+"""
+Benchmark the learning analytics store (learning_analytics.py)
+Fills a temporary database with a synthetic semester of tutoring events,
+then measures:
+  - AnalyticsStore.record() latency (the per-tool-call write cost)
+  - every instructor report over the full semester
+
+Usage:
+    python benchmarks/bench_analytics.py [--students 300] [--sessions 40] [--runs 5]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from learning_analytics import AnalyticsStore, REPORTS, COMPLETION, HINT, SESSION_END  # noqa: E402
+
+CONCEPTS = ('binary search', 'linear search', 'recursion', 'dfs', 'bfs', 'complexity', 'map',
+            'sorting', 'hash tables', 'dynamic programming', 'linked lists', 'two pointers')
+SEMESTER_SECONDS = 120 * 24 * 3600
+
+
+def fill_semester(store: AnalyticsStore, students: int, sessions: int, seed: int = 0) -> int:
+    """Bulk-load synthetic sessions (same rows record() would write); returns the event count."""
+    rng = random.Random(seed)
+    start = time.time() - SEMESTER_SECONDS
+    events, mastery = [], []
+    for student in range(students):
+        student_id = f"student-{student}"
+        for n in range(sessions):
+            session_id = f"{student_id}/{n}"
+            concept = rng.choice(CONCEPTS)
+            ts = start + rng.random() * SEMESTER_SECONDS
+            turn, hints = 0, 0
+            for turn in range(1, rng.randint(3, 20)):
+                if rng.random() < 0.4:
+                    events.append((ts + turn * 30, student_id, session_id, turn, HINT, concept, None,
+                                   min(hints, 4), None))
+                    hints += 1
+                elif rng.random() < 0.5:
+                    outcome = 'UNDERSTOOD' if rng.random() < 0.35 else 'PARTIAL'
+                    events.append((ts + turn * 30, student_id, session_id, turn, COMPLETION, concept, outcome,
+                                   None, None))
+                    if outcome == 'UNDERSTOOD':
+                        mastery.append((session_id, concept, student_id, ts + turn * 30, turn, hints))
+                        break
+            events.append((ts + (turn + 1) * 30, student_id, session_id, turn, SESSION_END, concept, None, None,
+                           f"Worked on {concept}"))
+
+    conn = store._connect()
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO events (ts, student_id, session_id, turn, kind, concept, outcome, hint_level, detail) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", events
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO mastery (session_id, concept, student_id, ts, turns, hints) VALUES (?, ?, ?, ?, ?, ?)",
+        mastery
+    )
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    return len(events)
+
+
+def best_ms(func, runs: int) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=300)
+    parser.add_argument('--sessions', type=int, default=40, help="Sessions per student")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'analytics.sqlite3')
+        store = AnalyticsStore(path)
+
+        started = time.perf_counter()
+        count = fill_semester(store, args.students, args.sessions)
+        print(f"loaded {count} events in {time.perf_counter() - started:.1f} s "
+              f"({os.path.getsize(path) / 1e6:.1f} MB)")
+
+        writes = 500
+        started = time.perf_counter()
+        for n in range(writes):
+            store.record('bench', f"bench/{n // 10}", n % 10 + 1, HINT if n % 3 else COMPLETION,
+                         concept='recursion', hint_level=n % 4, outcome=None if n % 3 else 'UNDERSTOOD')
+        print(f"record(): {(time.perf_counter() - started) * 1e6 / writes:.0f} us per event")
+
+        print()
+        reader = AnalyticsStore(path, read_only=True)
+        params = {'student_id': 'student-7', 'concept': 'recursion'}
+        print(f"{'report':<10} {'ms (best of ' + str(args.runs) + ')':>18} {'rows':>6}")
+        for name, report in REPORTS.items():
+            rows = report(reader, params)
+            print(f"{name:<10} {best_ms(lambda: report(reader, params), args.runs):>18.2f} {len(rows):>6}")
+        all_ms = best_ms(lambda: reader.turns_to_understood(), args.runs)
+        print(f"{'mastery*':<10} {all_ms:>18.2f} {len(CONCEPTS):>6}   (* every concept)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark the bug-pattern rule engine (bug_patterns.py)
+Measures:
+  - compiling the rule set (done once at import)
+  - parse vs. rule-evaluation time for generated student code of growing size
+  - time spent in each rule's predicate
+  - a cached repeat of find_bugs()
+
+Usage:
+    python benchmarks/bench_rules.py [--runs 5] [--sizes 10,100,1000]
+"""
+import os
+import sys
+import ast
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bug_patterns import DEFAULT_RULES, RuleSet, find_bugs  # noqa: E402
+
+# One unit of typical submission code; each copy gets unique function names
+UNIT = '''
+def search_{n}(arr, target):
+    left, right = 0, len(arr) - 1
+    while left <= right:
+        mid = (left + right) / 2
+        if arr[mid] == target:
+            return mid
+        elif arr[mid] < target:
+            left = mid + 1
+        else:
+            right = mid - 1
+    return -1
+
+def pairs_{n}(items):
+    list = []
+    for i in range(len(items)):
+        if items[i] > items[i + 1]:
+            list.append((items[i], items[i + 1]))
+    for x in items:
+        if x < 0:
+            items.remove(x)
+    return list
+
+def fact_{n}(n):
+    return n * fact_{n}(n - 1)
+'''
+
+
+def best_ms(func, runs: int) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--sizes', default='10,100,1000', help="Comma-separated numbers of code units")
+    args = parser.parse_args()
+
+    compile_ms = best_ms(lambda: RuleSet(DEFAULT_RULES), args.runs)
+    print(f"compile {len(DEFAULT_RULES)} rules: {compile_ms:.3f} ms")
+    ruleset = RuleSet(DEFAULT_RULES)
+
+    print()
+    print(f"{'units':>6} {'lines':>7} {'parse ms':>10} {'rules ms':>10} {'us/line':>8} {'findings':>9}")
+    timings = {}
+    for units in (int(s) for s in args.sizes.split(',') if s.strip()):
+        code = ''.join(UNIT.format(n=n) for n in range(units))
+        tree = ast.parse(code)
+        parse_ms = best_ms(lambda: ast.parse(code), args.runs)
+        rules_ms = best_ms(lambda: ruleset.check(tree), args.runs)
+        findings = ruleset.check(tree, timings=timings)
+        lines = code.count('\n')
+        print(f"{units:>6} {lines:>7} {parse_ms:>10.2f} {rules_ms:>10.2f} {rules_ms * 1000 / lines:>8.2f} "
+              f"{len(findings):>9}")
+
+    print()
+    total = sum(timings.values()) or 1.0
+    print(f"{'rule':<24} {'ms (one pass per size)':>22} {'share':>7}")
+    for rule_id, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        print(f"{rule_id:<24} {seconds * 1000:>22.2f} {seconds / total:>7.0%}")
+
+    code = UNIT.format(n=0)
+    find_bugs.cache_clear()
+    cold_ms = best_ms(lambda: (find_bugs.cache_clear(), find_bugs(code)), args.runs)
+    warm_ms = best_ms(lambda: find_bugs(code), args.runs)
+    print()
+    print(f"find_bugs() one unit: {cold_ms:.3f} ms uncached, {warm_ms * 1000:.1f} us cached")
+
+
+if __name__ == '__main__':
+    main()
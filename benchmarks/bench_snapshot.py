@@ -0,0 +1,137 @@
+"""
+Benchmark conversation snapshot size and save/restore time
+Compares the legacy /save message list (str(content) only, not restorable)
+with the compact JSON and binary snapshot formats at 10/100/1000 messages.
+
+Usage:
+    python benchmarks/bench_snapshot.py
+"""
+import os
+import sys
+import json
+import keyword
+import builtins
+import time
+import random
+from enum import Enum
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_snapshot import snapshot_messages, dumps_snapshot, loads_snapshot, decode_message, build_messages
+
+SIZES = (10, 100, 1000)
+REPEATS = 20
+
+# Content varies per turn (seeded, so runs are comparable): identical
+# messages would compress far better than a real conversation does
+SEED = 1234
+# Builtins and keywords give a vocabulary of about a hundred code-like words
+WORDS = tuple(sorted({w for w in dir(builtins) + keyword.kwlist if w.isalpha() and w.islower()}))
+NAMES = ('binary', 'find', 'search', 'lookup', 'bisect', 'locate', 'scan', 'probe')
+
+
+def sample_code(rng: random.Random) -> str:
+    """A short function whose names, numbers and length change every call."""
+    name, var = rng.choice(NAMES), rng.choice(WORDS)
+    lines = [f"def {name}_{rng.randint(1, 999)}(arr, {var}):",
+             f"    left, right = {rng.randint(0, 3)}, len(arr) - {rng.randint(1, 3)}"]
+    for _ in range(rng.randint(3, 12)):
+        a, b = rng.sample(WORDS, 2)
+        lines.append(f"    {a} = {b} + (right - left) {rng.choice('/+-*')} {rng.randint(2, 97)}")
+    lines.append(f"    return {rng.choice(WORDS)}")
+    return '\n'.join(lines) + '\n'
+
+
+def sentence(rng: random.Random, low: int = 6, high: int = 30) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize() + '?'
+
+
+class FakeMessageType(Enum):
+    USER = 'user'
+    AGENT = 'agent'
+    TOOL_REQUEST = 'tool_request'
+    TOOL_RESULT = 'tool_result'
+
+
+def make_messages(count: int) -> list:
+    """A realistic turn mix: user (with code) -> tool request -> tool result -> agent reply."""
+    rng = random.Random(SEED)
+    messages = []
+    code = ''
+    for i in range(count):
+        step = i % 4
+        if step == 0:
+            code = sample_code(rng)
+            messages.append(SimpleNamespace(
+                message_type=FakeMessageType.USER,
+                content=f"{sentence(rng)}\n\n[Current file: {rng.choice(NAMES)}.py]\n```python\n{code}```",
+                tool_requests=None, tool_result=None))
+        elif step == 1:
+            messages.append(SimpleNamespace(
+                message_type=FakeMessageType.TOOL_REQUEST, content='',
+                tool_requests=[SimpleNamespace(name='analyze_code', args={'code': code},
+                                               tool_request_id=f"call_{rng.getrandbits(48):012x}")],
+                tool_result=None))
+        elif step == 2:
+            messages.append(SimpleNamespace(
+                message_type=FakeMessageType.TOOL_RESULT, content='',
+                tool_requests=None,
+                tool_result=SimpleNamespace(content=f"Issues found: {sentence(rng, 4, 20)}",
+                                            tool_request_id=messages[-1].tool_requests[0].tool_request_id)))
+        else:
+            messages.append(SimpleNamespace(
+                message_type=FakeMessageType.AGENT,
+                content=' '.join(sentence(rng) for _ in range(rng.randint(1, 4))),
+                tool_requests=None, tool_result=None))
+    return messages
+
+
+def legacy_dump(messages) -> str:
+    """The pre-snapshot /save format."""
+    return json.dumps([
+        {'type': str(m.message_type), 'content': str(m.content)} for m in messages
+    ], indent=2, ensure_ascii=False)
+
+
+def timed(func, repeats: int = REPEATS) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeats
+    return elapsed_ms, result
+
+
+def main():
+    try:
+        import wayflowcore  # noqa: F401
+        full_restore = True
+    except ImportError:
+        full_restore = False
+
+    header = f"{'messages':>8} {'format':<8} {'bytes':>10} {'save ms':>9} {'restore ms':>11}"
+    print(header)
+    print('-' * len(header))
+    for count in SIZES:
+        messages = make_messages(count)
+
+        save_ms, legacy = timed(lambda: legacy_dump(messages))
+        load_ms, _ = timed(lambda: json.loads(legacy))
+        print(f"{count:>8} {'legacy':<8} {len(legacy.encode('utf-8')):>10} {save_ms:>9.3f} {load_ms:>11.3f}  (lossy)")
+
+        for binary in (False, True):
+            save_ms, data = timed(lambda: dumps_snapshot(snapshot_messages(messages, count - 1), binary=binary))
+            if full_restore:
+                restore = lambda: build_messages(loads_snapshot(data))
+            else:
+                restore = lambda: [decode_message(row) for row in loads_snapshot(data)['m']]
+            restore_ms, _ = timed(restore)
+            size = len(data) if binary else len(data.encode('utf-8'))
+            print(f"{count:>8} {'binary' if binary else 'json':<8} {size:>10} {save_ms:>9.3f} {restore_ms:>11.3f}")
+
+    if not full_restore:
+        print("\nwayflowcore not installed: restore times cover parsing + decoding, not Message construction.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark cold-start time of the backend server
+Measures, in fresh interpreters:
+  - import time of TeachingTools alone vs. the full LLM stack
+  - time until /health answers and until it reports ready, in fast-start
+    (background warm-up) and eager (COMPTUTOR_EAGER_START=1) modes
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 3] [--timeout 120]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, 'vscode-chatbot-extension', 'backend_server.py')
+HEALTH_URL = 'http://localhost:5000/health'
+
+IMPORT_SNIPPETS = {
+    'TeachingTools': 'from autonomous_mentor import TeachingTools',
+    'LLM stack': 'from autonomous_mentor import load_llm_stack; load_llm_stack()',
+}
+
+
+def time_import(snippet: str):
+    """Milliseconds to run an import snippet in a fresh interpreter, or None if it fails."""
+    code = (
+        "import time; start = time.perf_counter()\n"
+        f"{snippet}\n"
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if output.returncode != 0:
+        return None
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def poll_health():
+    """Return the /health payload, or None while the server isn't listening."""
+    try:
+        with urllib.request.urlopen(HEALTH_URL, timeout=1) as response:
+            return json.loads(response.read())
+    except OSError:
+        return None
+
+
+def time_server_start(eager: bool, timeout: float) -> dict:
+    """Start the backend and time first /health answer and readiness."""
+    env = dict(os.environ, COMPTUTOR_EAGER_START='1' if eager else '0')
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, BACKEND], cwd=os.path.dirname(BACKEND), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {'listening_ms': None, 'ready_ms': None}
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"backend exited with code {process.returncode}")
+            health = poll_health()
+            if health is not None:
+                elapsed = (time.perf_counter() - start) * 1000
+                if result['listening_ms'] is None:
+                    result['listening_ms'] = elapsed
+                if health.get('ready') or health.get('warmup_error'):
+                    result['ready_ms'] = elapsed
+                    break
+            time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    if poll_health() is not None:
+        sys.exit("Something is already listening on port 5000; stop it first.")
+
+    print(f"{'import':<16} {'ms (best of ' + str(args.runs) + ')':>18}")
+    stack_missing = False
+    for name, snippet in IMPORT_SNIPPETS.items():
+        times = [time_import(snippet) for _ in range(args.runs)]
+        if None in times:
+            stack_missing = True
+            print(f"{name:<16} {'failed':>18}")
+        else:
+            print(f"{name:<16} {min(times):>18.1f}")
+    if stack_missing:
+        sys.exit("\nThe LLM stack (pyagentspec/wayflowcore) or another dependency is not installed; "
+                 "install the requirements to benchmark it and the server.")
+
+    print()
+    print(f"{'mode':<8} {'listening ms':>13} {'ready ms':>10}")
+    for eager in (False, True):
+        runs = [time_server_start(eager, args.timeout) for _ in range(args.runs)]
+        listening = min((r['listening_ms'] for r in runs if r['listening_ms'] is not None), default=None)
+        ready = min((r['ready_ms'] for r in runs if r['ready_ms'] is not None), default=None)
+        fmt = lambda value, width: f"{value:>{width}.1f}" if value is not None else f"{'timeout':>{width}}"
+        print(f"{'eager' if eager else 'fast':<8} {fmt(listening, 13)} {fmt(ready, 10)}")
+
+
+if __name__ == '__main__':
+    main()
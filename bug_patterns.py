@@ -0,0 +1,503 @@
+"""
+Bug-pattern detection for classic student algorithm mistakes
+Rules are data: each names the AST node types it inspects, a predicate
+from PREDICATES, a message template and optional params. A RuleSet
+compiles them once into a node-type dispatch table and checks code in a
+single traversal, sharing context (enclosing functions, loops, guards,
+float-valued names) between rules instead of re-walking the tree per rule.
+
+Extra rules can be loaded from a JSON list of rule dicts (built-in
+predicates with custom params/messages, or rules disabled by id):
+    COMPTUTOR_BUG_RULES   - path to a JSON rules file
+"""
+import os
+import ast
+import json
+import time
+import builtins
+import functools
+
+# Methods that change a list's length (or order) in place
+LIST_MUTATORS = ('append', 'extend', 'insert', 'remove', 'pop', 'clear', 'sort', 'reverse')
+# Builtins students most often reuse as variable names
+SHADOWED_BUILTINS = (
+    'list', 'dict', 'set', 'str', 'int', 'float', 'tuple', 'len', 'sum', 'min', 'max', 'input', 'print',
+    'range', 'sorted', 'type', 'id', 'map', 'filter', 'zip', 'iter', 'next', 'abs', 'all', 'any', 'hash', 'object',
+)
+
+DEFAULT_RULES = [
+    {
+        'id': 'float-index-division',
+        'nodes': ['Subscript'],
+        'check': 'float_index',
+        'severity': 'error',
+        'message': "`{expr}` indexes with {source}, which is a float in Python 3 "
+                   "(TypeError: list indices must be integers) - use `//` for integer division",
+    },
+    {
+        'id': 'off-by-one-bound',
+        'nodes': ['Subscript'],
+        'check': 'off_by_one',
+        'severity': 'error',
+        'message': "`{expr}` goes one past the end of `{seq}` on the last pass of the loop at line {loop_line} "
+                   "(IndexError) - {fix}",
+    },
+    {
+        'id': 'mutate-while-iterating',
+        'nodes': ['Call', 'Delete'],
+        'check': 'mutates_iterated_list',
+        'severity': 'error',
+        'message': "`{expr}` changes `{seq}` while the loop at line {loop_line} is iterating over it, "
+                   "so elements get skipped or repeated - iterate over a copy (`{seq}[:]`) or build a new list",
+        'params': {'mutators': list(LIST_MUTATORS)},
+    },
+    {
+        'id': 'missing-base-case',
+        'nodes': ['FunctionDef', 'AsyncFunctionDef'],
+        'event': 'exit',
+        'check': 'missing_base_case',
+        'severity': 'error',
+        'message': "{name}() calls itself but has no condition that stops the recursion "
+                   "(RecursionError) - add a base case",
+    },
+    {
+        'id': 'shadowed-builtin',
+        'nodes': ['Name', 'arg', 'FunctionDef', 'AsyncFunctionDef', 'ClassDef'],
+        'check': 'shadows_builtin',
+        'severity': 'warning',
+        'message': "`{name}` hides the built-in {name}() in this scope, so calling {name}() later fails "
+                   "- pick another name",
+        'params': {'names': list(SHADOWED_BUILTINS)},
+    },
+]
+
+
+class RuleError(ValueError):
+    """Raised when a rule definition is invalid."""
+
+
+class Finding:
+    """One rule match."""
+
+    __slots__ = ('rule_id', 'severity', 'line', 'col', 'message')
+
+    def __init__(self, rule_id: str, severity: str, line: int, col: int, message: str):
+        self.rule_id = rule_id
+        self.severity = severity
+        self.line = line
+        self.col = col
+        self.message = message
+
+    def to_dict(self) -> dict:
+        return {
+            'rule': self.rule_id,
+            'severity': self.severity,
+            'line': self.line,
+            'col': self.col,
+            'message': self.message,
+        }
+
+    def __str__(self) -> str:
+        return f"Line {self.line}: {self.message}"
+
+
+# Traversal context shared by all rules
+
+class _Frame:
+    """State of one function (or the module) being traversed."""
+
+    __slots__ = ('name', 'node', 'self_calls', 'branches', 'float_names', 'reported')
+
+    def __init__(self, name: str, node):
+        self.name = name
+        self.node = node
+        self.self_calls = 0
+        self.branches = 0
+        self.float_names = {}   # name -> line of its `/` assignment
+        self.reported = set()   # (rule id, key) already reported in this scope
+
+
+class _Loop:
+    """A loop enclosing the current node."""
+
+    __slots__ = ('node', 'var', 'seq', 'kind', 'guard_depth')
+
+    def __init__(self, node, var, seq, kind):
+        self.node = node
+        self.guard_depth = 0  # len(Context.guards) when the loop body starts
+        self.var = var      # loop index/element name
+        self.seq = seq      # source text of the sequence walked, if known
+        self.kind = kind    # 'items' (for x in seq), 'len', 'len+1' (range bounds) or 'while<=len'
+
+
+class Context:
+    """What predicates can see besides the node: enclosing function, loops and guards."""
+
+    def __init__(self):
+        self.frames = []
+        self.loops = []
+        self.guards = []    # names tested by enclosing if/while conditions
+        self.class_members = set()  # defs and assignment targets directly in a class body
+
+    @property
+    def frame(self) -> _Frame:
+        return self.frames[-1]
+
+    def guarded(self, name: str, since_loop: _Loop) -> bool:
+        """Whether `name` is tested by a condition inside `since_loop`."""
+        return any(name in names for names in self.guards[since_loop.guard_depth:])
+
+
+def _source(node) -> str:
+    try:
+        return ast.unparse(node)
+    except Exception:
+        return '...'
+
+
+def _len_of(node):
+    """`seq` for len(seq), else None."""
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'len' \
+            and len(node.args) == 1:
+        return _source(node.args[0])
+    return None
+
+
+def _plus_const(node, value: int = 1):
+    """`x` for `x + value` (or `value + x`), else None."""
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        if isinstance(node.right, ast.Constant) and node.right.value == value:
+            return node.left
+        if isinstance(node.left, ast.Constant) and node.left.value == value:
+            return node.right
+    return None
+
+
+def _true_division(node) -> bool:
+    """Whether the expression's value comes from `/` (not wrapped in int()/round()/...)."""
+    if isinstance(node, ast.BinOp):
+        if isinstance(node.op, ast.Div):
+            return True
+        if isinstance(node.op, (ast.Add, ast.Sub, ast.Mult)):
+            return _true_division(node.left) or _true_division(node.right)
+    return False
+
+
+def _loop_for(node) -> _Loop:
+    target = node.target.id if isinstance(node.target, ast.Name) else None
+    iterable = node.iter
+    if isinstance(iterable, ast.Call) and isinstance(iterable.func, ast.Name):
+        if iterable.func.id == 'range' and iterable.args:
+            stop = iterable.args[0] if len(iterable.args) == 1 else iterable.args[1]
+            inner = _plus_const(stop)
+            if inner is not None and _len_of(inner):
+                return _Loop(node, target, _len_of(inner), 'len+1')
+            if _len_of(stop):
+                return _Loop(node, target, _len_of(stop), 'len')
+            return _Loop(node, target, None, 'range')
+        if iterable.func.id == 'enumerate' and iterable.args:
+            if isinstance(node.target, ast.Tuple) and node.target.elts and isinstance(node.target.elts[0], ast.Name):
+                target = node.target.elts[0].id
+            return _Loop(node, target, _source(iterable.args[0]), 'items')
+    if isinstance(iterable, (ast.Name, ast.Attribute)):
+        return _Loop(node, target, _source(iterable), 'items')
+    return _Loop(node, target, None, 'other')
+
+
+def _loop_while(node) -> _Loop:
+    test = node.test
+    if isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.LtE) \
+            and isinstance(test.left, ast.Name) and _len_of(test.comparators[0]):
+        return _Loop(node, test.left.id, _len_of(test.comparators[0]), 'while<=len')
+    return _Loop(node, None, None, 'while')
+
+
+# Predicates: (node, context, params) -> dict of message fields, or None
+
+PREDICATES = {}
+
+
+def predicate(name: str):
+    """Register a predicate that rules can refer to by name."""
+    def register(func):
+        PREDICATES[name] = func
+        return func
+    return register
+
+
+@predicate('float_index')
+def _float_index(node, ctx: Context, params: dict):
+    if not isinstance(node.ctx, ast.Load):
+        return None
+    index = node.slice
+    if _true_division(index):
+        return {'expr': _source(node), 'source': f"`{_source(index)}`"}
+    if isinstance(index, ast.Name) and index.id in ctx.frame.float_names:
+        line = ctx.frame.float_names[index.id]
+        return {'expr': _source(node), 'source': f"`{index.id}` (computed with `/` on line {line})"}
+    return None
+
+
+@predicate('off_by_one')
+def _off_by_one(node, ctx: Context, params: dict):
+    if not isinstance(node.ctx, ast.Load) or not any(loop.seq for loop in ctx.loops):
+        return None
+    seq = _source(node.value)
+    index = node.slice
+    for loop in reversed(ctx.loops):
+        if loop.seq != seq or loop.var is None:
+            continue
+        if isinstance(index, ast.Name) and index.id == loop.var:
+            if loop.kind == 'len+1':
+                return {'expr': _source(node), 'seq': seq, 'loop_line': loop.node.lineno,
+                        'fix': f"loop over `range(len({seq}))`"}
+            if loop.kind == 'while<=len':
+                return {'expr': _source(node), 'seq': seq, 'loop_line': loop.node.lineno,
+                        'fix': "use `<` instead of `<=` in the condition"}
+        shifted = _plus_const(index)
+        if loop.kind == 'len' and isinstance(shifted, ast.Name) and shifted.id == loop.var \
+                and not ctx.guarded(loop.var, loop):
+            return {'expr': _source(node), 'seq': seq, 'loop_line': loop.node.lineno,
+                    'fix': f"stop the loop at `len({seq}) - 1`"}
+    return None
+
+
+@predicate('mutates_iterated_list')
+def _mutates_iterated_list(node, ctx: Context, params: dict):
+    if isinstance(node, ast.Call):
+        func = node.func
+        if not (isinstance(func, ast.Attribute) and func.attr in params.get('mutators', LIST_MUTATORS)):
+            return None
+        target = _source(func.value)
+    else:
+        targets = [t for t in node.targets if isinstance(t, ast.Subscript)]
+        if not targets:
+            return None
+        target = _source(targets[0].value)
+    for loop in reversed(ctx.loops):
+        if loop.seq == target and loop.kind in ('items', 'len') and isinstance(loop.node, ast.For):
+            return {'expr': _source(node), 'seq': target, 'loop_line': loop.node.lineno}
+    return None
+
+
+@predicate('missing_base_case')
+def _missing_base_case(node, ctx: Context, params: dict):
+    frame = ctx.frame
+    if frame.self_calls and not frame.branches:
+        return {'name': node.name}
+    return None
+
+
+@predicate('shadows_builtin')
+def _shadows_builtin(node, ctx: Context, params: dict):
+    if node in ctx.class_members:
+        return None
+    if isinstance(node, ast.Name):
+        if not isinstance(node.ctx, ast.Store):
+            return None
+        name = node.id
+    elif isinstance(node, ast.arg):
+        name = node.arg
+    else:
+        name = node.name
+    if name not in params.get('names', SHADOWED_BUILTINS) or not hasattr(builtins, name):
+        return None
+    # Once per name and scope; a def's own name belongs to the enclosing scope
+    key = ('shadows_builtin', name)
+    frame = ctx.frames[-2] if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) \
+        and len(ctx.frames) > 1 and ctx.frame.node is node else ctx.frame
+    if key in frame.reported:
+        return None
+    frame.reported.add(key)
+    return {'name': name}
+
+
+class _CompiledRule:
+    __slots__ = ('id', 'severity', 'message', 'predicate', 'params')
+
+    def __init__(self, rule: dict):
+        self.id = rule['id']
+        self.severity = rule.get('severity', 'warning')
+        self.message = rule['message']
+        self.predicate = PREDICATES[rule['check']]
+        self.params = rule.get('params') or {}
+
+
+class RuleSet:
+    """Rules compiled into a node-type -> rules dispatch table."""
+
+    _BRANCH_NODES = (ast.If, ast.IfExp, ast.While, ast.Try, ast.BoolOp, ast.Assert) + \
+        ((ast.Match,) if hasattr(ast, 'Match') else ())
+
+    def __init__(self, rules: list):
+        self.rules = []
+        self._enter = {}
+        self._exit = {}
+        seen = set()
+        for rule in rules:
+            if not rule.get('enabled', True):
+                continue
+            missing = {'id', 'nodes', 'check', 'message'} - rule.keys()
+            if missing:
+                raise RuleError(f"Rule {rule.get('id', '?')} is missing {', '.join(sorted(missing))}")
+            if rule['id'] in seen:
+                raise RuleError(f"Duplicate rule id: {rule['id']}")
+            if rule['check'] not in PREDICATES:
+                raise RuleError(f"Rule {rule['id']}: unknown check '{rule['check']}'")
+            event = rule.get('event', 'enter')
+            if event not in ('enter', 'exit'):
+                raise RuleError(f"Rule {rule['id']}: event must be 'enter' or 'exit'")
+            seen.add(rule['id'])
+            compiled = _CompiledRule(rule)
+            self.rules.append(compiled)
+            table = self._enter if event == 'enter' else self._exit
+            for node_name in rule['nodes']:
+                node_type = getattr(ast, node_name, None)
+                if not (isinstance(node_type, type) and issubclass(node_type, ast.AST)):
+                    raise RuleError(f"Rule {rule['id']}: unknown AST node type '{node_name}'")
+                table.setdefault(node_type, []).append(compiled)
+
+    @classmethod
+    def merged(cls, overrides: list) -> 'RuleSet':
+        """Default rules updated by id from `overrides` (new ids are added)."""
+        rules = {rule['id']: dict(rule) for rule in DEFAULT_RULES}
+        for rule in overrides:
+            rules[rule['id']] = dict(rules.get(rule['id'], {}), **rule)
+        return cls(list(rules.values()))
+
+    def check(self, tree, timings: dict = None) -> list:
+        """
+        Findings for a parsed module, in line order. Pass a dict as `timings`
+        to accumulate seconds spent per rule id (for benchmarking).
+        """
+        ctx = Context()
+        ctx.frames.append(_Frame('<module>', tree))
+        findings = []
+        self._visit(tree, ctx, findings, timings)
+        findings.sort(key=lambda f: (f.line, f.col))
+        return findings
+
+    def _run(self, rules, node, ctx, findings, timings):
+        for rule in rules:
+            if timings is not None:
+                started = time.perf_counter()
+            fields = rule.predicate(node, ctx, rule.params)
+            if fields is not None:
+                findings.append(Finding(rule.id, rule.severity, getattr(node, 'lineno', 0),
+                                        getattr(node, 'col_offset', 0), rule.message.format(**fields)))
+            if timings is not None:
+                timings[rule.id] = timings.get(rule.id, 0.0) + time.perf_counter() - started
+
+    def _visit(self, node, ctx: Context, findings: list, timings):
+        node_type = type(node)
+        is_function = node_type in (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+        frame = ctx.frame
+
+        # Update shared context before rules look at the node
+        if node_type is ast.Assign:
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    if _true_division(node.value):
+                        frame.float_names[target.id] = node.lineno
+                    else:
+                        frame.float_names.pop(target.id, None)
+        elif node_type is ast.AugAssign and isinstance(node.target, ast.Name):
+            if isinstance(node.op, ast.Div):
+                frame.float_names[node.target.id] = node.lineno
+            elif isinstance(node.op, ast.FloorDiv):
+                frame.float_names.pop(node.target.id, None)
+        elif node_type is ast.Call:
+            func = node.func
+            if (isinstance(func, ast.Name) and func.id == frame.name) or (
+                    isinstance(func, ast.Attribute) and func.attr == frame.name
+                    and isinstance(func.value, ast.Name) and func.value.id in ('self', 'cls')):
+                frame.self_calls += 1
+        elif node_type is ast.ClassDef:
+            # Methods and class attributes are reached through the class, so they hide no builtin
+            for statement in node.body:
+                if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    ctx.class_members.add(statement)
+                elif isinstance(statement, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+                    targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+                    ctx.class_members.update(t for t in targets if isinstance(t, ast.Name))
+        if isinstance(node, self._BRANCH_NODES):
+            frame.branches += 1
+
+        if is_function:
+            ctx.frames.append(_Frame(getattr(node, 'name', '<lambda>'), node))
+            # Loops of the enclosing scope don't run the function body
+            saved_loops, ctx.loops = ctx.loops, []
+
+        rules = self._enter.get(node_type)
+        if rules:
+            self._run(rules, node, ctx, findings, timings)
+
+        pushed_loop = pushed_guard = False
+        if node_type is ast.BoolOp and isinstance(node.op, ast.And):
+            # `i + 1 < len(a) and a[i + 1]` - earlier operands guard later ones
+            ctx.guards.append({n.id for n in ast.walk(node) if isinstance(n, ast.Name)})
+            pushed_guard = True
+        if node_type in (ast.For, ast.AsyncFor):
+            loop = _loop_for(node)
+        elif node_type is ast.While:
+            loop = _loop_while(node)
+        else:
+            loop = None
+
+        for field, value in ast.iter_fields(node):
+            children = value if isinstance(value, list) else [value]
+            # The loop/guard applies to the body only, not to its own header
+            if field == 'body':
+                if loop is not None:
+                    loop.guard_depth = len(ctx.guards) + (1 if node_type is ast.While else 0)
+                    ctx.loops.append(loop)
+                    pushed_loop = True
+                if node_type in (ast.If, ast.While, ast.IfExp):
+                    ctx.guards.append({n.id for n in ast.walk(node.test) if isinstance(n, ast.Name)})
+                    pushed_guard = True
+            elif field == 'orelse' and pushed_loop:
+                ctx.loops.pop()
+                pushed_loop = False
+            for child in children:
+                if isinstance(child, ast.AST):
+                    self._visit(child, ctx, findings, timings)
+        if pushed_loop:
+            ctx.loops.pop()
+        if pushed_guard:
+            ctx.guards.pop()
+
+        rules = self._exit.get(node_type)
+        if rules:
+            self._run(rules, node, ctx, findings, timings)
+
+        if is_function:
+            ctx.frames.pop()
+            ctx.loops = saved_loops
+
+
+def load_rules(path) -> list:
+    """Read a JSON list of rule dicts."""
+    with open(path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+    if not isinstance(rules, list):
+        raise RuleError(f"{path}: expected a JSON list of rules")
+    return rules
+
+
+def _default_ruleset() -> RuleSet:
+    path = os.environ.get('COMPTUTOR_BUG_RULES')
+    return RuleSet.merged(load_rules(path)) if path else RuleSet(DEFAULT_RULES)
+
+
+# Compiled once at import; checks reuse it
+DEFAULT_RULESET = _default_ruleset()
+
+
+@functools.lru_cache(maxsize=256)
+def find_bugs(code: str) -> tuple:
+    """Findings of the default rule set, cached by source. () for code that isn't valid Python."""
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return ()
+    return tuple(DEFAULT_RULESET.check(tree))
@@ -0,0 +1,361 @@
+"""
+Workspace code index for the Autonomous Teaching Agent
+Parses Python files into a symbol table (functions, classes, call sites)
+plus an inverted text index, and re-parses only files whose mtime/size
+changed since the last refresh.
+"""
+import os
+import re
+import ast
+import threading
+import time
+from pathlib import Path
+
+IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# Directories that never contain student code worth indexing
+SKIP_DIRS = {
+    '.git', '__pycache__', 'node_modules', '.venv', 'venv', 'env', '.tox', '.nox',
+    '.mypy_cache', '.pytest_cache', '.ruff_cache', 'out', 'dist', 'build', 'saved_conversations',
+}
+
+
+class Symbol:
+    """A function, method or class definition."""
+
+    __slots__ = ('name', 'kind', 'path', 'line', 'end_line', 'parent')
+
+    def __init__(self, name: str, kind: str, path: str, line: int, end_line: int, parent: str = None):
+        self.name = name
+        self.kind = kind
+        self.path = path
+        self.line = line
+        self.end_line = end_line
+        self.parent = parent
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.parent}.{self.name}" if self.parent else self.name
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.qualified_name,
+            'kind': self.kind,
+            'path': self.path,
+            'line': self.line,
+            'end_line': self.end_line,
+        }
+
+
+class _FileEntry:
+    """Parsed state of one indexed file."""
+
+    __slots__ = ('mtime', 'size', 'lines', 'symbols', 'calls', 'tokens', 'parse_error')
+
+    def __init__(self, mtime: float, size: int, lines: list):
+        self.mtime = mtime
+        self.size = size
+        self.lines = lines
+        self.symbols = []
+        self.calls = []      # (callee name, line)
+        self.tokens = {}     # token -> sorted line numbers
+        self.parse_error = None
+
+
+class _SymbolCollector(ast.NodeVisitor):
+    """Collects definitions and call sites from a module AST."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.symbols = []
+        self.calls = []
+        self._class_stack = []
+
+    def _add_function(self, node):
+        parent = self._class_stack[-1] if self._class_stack else None
+        kind = 'method' if parent else 'function'
+        self.symbols.append(Symbol(node.name, kind, self.path, node.lineno, getattr(node, 'end_lineno', node.lineno), parent))
+        self.generic_visit(node)
+
+    visit_FunctionDef = _add_function
+    visit_AsyncFunctionDef = _add_function
+
+    def visit_ClassDef(self, node):
+        self.symbols.append(Symbol(node.name, 'class', self.path, node.lineno, getattr(node, 'end_lineno', node.lineno)))
+        self._class_stack.append(node.name)
+        self.generic_visit(node)
+        self._class_stack.pop()
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name):
+            self.calls.append((func.id, node.lineno))
+        elif isinstance(func, ast.Attribute):
+            self.calls.append((func.attr, node.lineno))
+        self.generic_visit(node)
+
+
+class WorkspaceIndex:
+    """Incrementally maintained symbol table and inverted text index for a workspace."""
+
+    def __init__(self, root, refresh_interval: float = 2.0, max_file_bytes: int = 512 * 1024):
+        self.root = Path(root).resolve()
+        self.refresh_interval = refresh_interval
+        self.max_file_bytes = max_file_bytes
+        self._files = {}            # relative path -> _FileEntry
+        self._symbols = {}          # lowercased name -> [Symbol]
+        self._callers = {}          # callee name -> [(path, line)]
+        self._postings = {}         # lowercased token -> set of relative paths
+        self._lock = threading.RLock()
+        self._last_refresh = 0.0
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _skip_dir(name: str) -> bool:
+        return name in SKIP_DIRS or name.startswith('.')
+
+    def _iter_python_files(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not self._skip_dir(d)]
+            for filename in filenames:
+                if filename.endswith('.py'):
+                    yield Path(dirpath) / filename
+
+    def _indexable(self, rel_path: str) -> bool:
+        """Whether the workspace scan would index this path: a .py file outside skipped dirs."""
+        *dirs, filename = rel_path.split('/')
+        return filename.endswith('.py') and not any(self._skip_dir(d) for d in dirs)
+
+    def refresh(self, force: bool = False) -> dict:
+        """Re-index files that were added, changed or removed since the last refresh."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_refresh < self.refresh_interval:
+                return {'added': 0, 'updated': 0, 'removed': 0, 'skipped': True}
+            self._last_refresh = now
+
+            stats = {'added': 0, 'updated': 0, 'removed': 0, 'skipped': False}
+            seen = set()
+            for file_path in self._iter_python_files():
+                rel_path = file_path.relative_to(self.root).as_posix()
+                seen.add(rel_path)
+                try:
+                    st = file_path.stat()
+                except OSError:
+                    continue
+                entry = self._files.get(rel_path)
+                if entry is not None and entry.mtime == st.st_mtime and entry.size == st.st_size:
+                    continue
+                if self._index_file(rel_path, file_path, st):
+                    stats['updated' if entry is not None else 'added'] += 1
+
+            for rel_path in list(self._files):
+                if rel_path not in seen:
+                    self._remove(rel_path)
+                    stats['removed'] += 1
+            return stats
+
+    def update_file(self, path) -> bool:
+        """
+        Re-index a single file immediately (e.g. after a save notification).
+        Files the workspace scan would skip (not .py, in a skipped directory,
+        too large) are dropped from the index instead; returns whether the
+        file is indexed now.
+        """
+        file_path = Path(path)
+        if not file_path.is_absolute():
+            file_path = self.root / file_path
+        with self._lock:
+            try:
+                rel_path = file_path.resolve().relative_to(self.root).as_posix()
+            except ValueError:
+                return False
+            if not self._indexable(rel_path) or not file_path.is_file():
+                self._remove(rel_path)
+                return False
+            return self._index_file(rel_path, file_path, file_path.stat())
+
+    def _index_file(self, rel_path: str, file_path: Path, st) -> bool:
+        # A file that grew too large (or became unreadable) loses its stale entries
+        if st.st_size > self.max_file_bytes:
+            self._remove(rel_path)
+            return False
+        try:
+            source = file_path.read_text(encoding='utf-8', errors='replace')
+        except OSError:
+            self._remove(rel_path)
+            return False
+
+        self._remove(rel_path)
+        lines = source.splitlines()
+        entry = _FileEntry(st.st_mtime, st.st_size, lines)
+
+        try:
+            collector = _SymbolCollector(rel_path)
+            collector.visit(ast.parse(source, filename=rel_path))
+            entry.symbols = collector.symbols
+            entry.calls = collector.calls
+        except SyntaxError as e:
+            # Keep the text index even when the student's file doesn't parse yet
+            entry.parse_error = f"line {e.lineno}: {e.msg}"
+
+        for line_no, line in enumerate(lines, start=1):
+            for token in IDENTIFIER_RE.findall(line):
+                token_lines = entry.tokens.setdefault(token.lower(), [])
+                if not token_lines or token_lines[-1] != line_no:
+                    token_lines.append(line_no)
+
+        self._files[rel_path] = entry
+        for symbol in entry.symbols:
+            self._symbols.setdefault(symbol.name.lower(), []).append(symbol)
+        for callee, line in entry.calls:
+            self._callers.setdefault(callee, []).append((rel_path, line))
+        for token in entry.tokens:
+            self._postings.setdefault(token, set()).add(rel_path)
+        return True
+
+    def _remove(self, rel_path: str):
+        entry = self._files.pop(rel_path, None)
+        if entry is None:
+            return
+        for symbol in entry.symbols:
+            remaining = [s for s in self._symbols.get(symbol.name.lower(), []) if s.path != rel_path]
+            if remaining:
+                self._symbols[symbol.name.lower()] = remaining
+            else:
+                self._symbols.pop(symbol.name.lower(), None)
+        for callee in {callee for callee, _ in entry.calls}:
+            remaining = [c for c in self._callers.get(callee, []) if c[0] != rel_path]
+            if remaining:
+                self._callers[callee] = remaining
+            else:
+                self._callers.pop(callee, None)
+        for token in entry.tokens:
+            paths = self._postings.get(token)
+            if paths is not None:
+                paths.discard(rel_path)
+                if not paths:
+                    del self._postings[token]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def find_symbol(self, name: str) -> list:
+        """Definitions named `name` (or `Class.name`), exact match first, then prefix matches."""
+        self.refresh()
+        with self._lock:
+            key = name.split('.')[-1].lower()
+            exact = list(self._symbols.get(key, []))
+            if '.' in name:
+                parent = name.split('.')[0]
+                exact = [s for s in exact if s.parent == parent] or exact
+            if exact:
+                return exact
+            return [s for k, symbols in self._symbols.items() if k.startswith(key) for s in symbols]
+
+    def find_callers(self, name: str) -> list:
+        """Call sites of a function or method name as (path, line) pairs."""
+        self.refresh()
+        with self._lock:
+            return list(self._callers.get(name.split('.')[-1], []))
+
+    def search_text(self, query: str, limit: int = 10) -> list:
+        """Lines containing the query's identifiers, ranked by how many distinct terms they match."""
+        self.refresh()
+        terms = {t.lower() for t in IDENTIFIER_RE.findall(query)}
+        if not terms:
+            return []
+        with self._lock:
+            candidate_files = set()
+            for term in terms:
+                candidate_files |= self._postings.get(term, set())
+
+            scored = {}
+            for rel_path in candidate_files:
+                entry = self._files[rel_path]
+                for term in terms:
+                    for line_no in entry.tokens.get(term, ()):
+                        scored[(rel_path, line_no)] = scored.get((rel_path, line_no), 0) + 1
+
+            ranked = sorted(scored.items(), key=lambda item: (-item[1], item[0]))
+            return [
+                {'path': path, 'line': line, 'score': score, 'text': self._files[path].lines[line - 1].strip()}
+                for (path, line), score in ranked[:limit]
+            ]
+
+    def snippet(self, path: str, start: int, end: int = None, max_lines: int = 40) -> str:
+        """Source lines [start, end] of an indexed file, truncated to max_lines."""
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is None:
+                return ''
+            end = end or start
+            stop = min(end, start + max_lines - 1)
+            text = '\n'.join(entry.lines[start - 1:stop])
+            if stop < end:
+                text += f"\n# ... {end - stop} more line(s)"
+            return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'root': str(self.root),
+                'files': len(self._files),
+                'symbols': sum(len(v) for v in self._symbols.values()),
+                'tokens': len(self._postings),
+                'parse_errors': {p: e.parse_error for p, e in self._files.items() if e.parse_error},
+            }
+
+    def lookup(self, query: str, max_results: int = 5, max_chars: int = 4000) -> str:
+        """
+        Answer a code lookup for the agent: matching definitions with their
+        source, call sites, and ranked text hits, capped at max_chars.
+        """
+        query = query.strip()
+        if not query:
+            return "No query given. Pass a function/class name or some words to search for."
+
+        sections = []
+        symbols = self.find_symbol(query) if IDENTIFIER_RE.fullmatch(query.replace('.', '_')) else []
+        for symbol in symbols[:max_results]:
+            code = self.snippet(symbol.path, symbol.line, symbol.end_line)
+            sections.append(f"{symbol.kind} {symbol.qualified_name} ({symbol.path}:{symbol.line})\n```python\n{code}\n```")
+
+        if symbols:
+            callers = self.find_callers(query)
+            if callers:
+                shown = ', '.join(f"{path}:{line}" for path, line in callers[:max_results * 2])
+                more = f" (+{len(callers) - max_results * 2} more)" if len(callers) > max_results * 2 else ''
+                sections.append(f"Called from: {shown}{more}")
+        else:
+            hits = self.search_text(query, limit=max_results * 2)
+            for hit in hits:
+                sections.append(f"{hit['path']}:{hit['line']}: {hit['text']}")
+
+        if not sections:
+            return f"No matches for '{query}' in the workspace ({self.stats()['files']} Python files indexed)."
+
+        result = ''
+        for section in sections:
+            if len(result) + len(section) > max_chars:
+                result += "\n... (more results omitted)"
+                break
+            result += section + '\n\n'
+        return result.strip()
+
+
+_workspace_index = None
+_workspace_index_lock = threading.Lock()
+
+
+def get_workspace_index() -> WorkspaceIndex:
+    """Process-wide index rooted at $COMPTUTOR_WORKSPACE (defaults to the current directory)."""
+    global _workspace_index
+    with _workspace_index_lock:
+        if _workspace_index is None:
+            _workspace_index = WorkspaceIndex(os.environ.get('COMPTUTOR_WORKSPACE', os.getcwd()))
+        return _workspace_index
@@ -0,0 +1,617 @@
+"""
+Static time-complexity estimates for student code
+Walks each function's AST and estimates its Big-O from loop nesting
+(including halving loops such as binary search), linear-time operations
+inside loops (`in` on a list, slicing, sort, ...), calls to other functions
+in the file, and recursion (branching factor and how the input shrinks).
+
+These are estimates meant to start a conversation with the student, not
+proofs. Results are cached by source text, so re-analyzing an unchanged
+file on every save is free.
+"""
+import ast
+import math
+import functools
+
+# Builtins that walk their (single) iterable argument
+LINEAR_BUILTINS = {'sum', 'min', 'max', 'any', 'all', 'list', 'tuple', 'set', 'frozenset', 'reversed'}
+# List methods that scan or shift the list
+LINEAR_METHODS = {'index', 'count', 'remove', 'copy', 'extend'}
+# Loop wrappers that iterate their first argument
+ITERATION_WRAPPERS = {'enumerate', 'zip', 'reversed', 'sorted', 'list', 'iter'}
+# Names that signal a memoized recursive function
+MEMO_HINTS = ('memo', 'cache', 'dp', 'seen')
+
+
+class Cost:
+    """n^poly * (log n)^log, or an exponential (exp = base, or 'n!')."""
+
+    __slots__ = ('poly', 'log', 'exp')
+
+    def __init__(self, poly: float = 0, log: int = 0, exp=None):
+        self.poly = poly
+        self.log = log
+        self.exp = exp
+
+    def __mul__(self, other: 'Cost') -> 'Cost':
+        exp = max((e for e in (self.exp, other.exp) if e is not None), key=_exp_rank, default=None)
+        return Cost(self.poly + other.poly, self.log + other.log, exp)
+
+    def key(self) -> tuple:
+        return (_exp_rank(self.exp), self.poly, self.log)
+
+    def __str__(self) -> str:
+        if self.exp == 'n!':
+            return "O(n!)"
+        if self.exp is not None:
+            return f"O({self.exp}^n)"
+        parts = []
+        if self.poly:
+            power = int(self.poly) if float(self.poly).is_integer() else round(self.poly, 2)
+            parts.append('n' if power == 1 else ('√n' if power == 0.5 else f"n^{power}"))
+        if self.log:
+            parts.append('log n' if self.log == 1 else f"log^{self.log} n")
+        return f"O({' '.join(parts) or '1'})"
+
+
+def _exp_rank(exp) -> float:
+    if exp is None:
+        return 0
+    return math.inf if exp == 'n!' else exp
+
+
+def _max_cost(costs) -> Cost:
+    return max(costs, key=Cost.key, default=ONE)
+
+
+ONE = Cost()
+LINEAR = Cost(1)
+LOG = Cost(0, 1)
+
+
+class FunctionComplexity:
+    """Estimated complexity of one function (or of the module's top-level code)."""
+
+    __slots__ = ('name', 'line', 'end_line', 'cost', 'reasons')
+
+    def __init__(self, name: str, line: int, end_line: int, cost: Cost, reasons: list):
+        self.name = name
+        self.line = line
+        self.end_line = end_line
+        self.cost = cost
+        self.reasons = reasons   # [(line, explanation)], most significant first
+
+    @property
+    def big_o(self) -> str:
+        return str(self.cost)
+
+    @property
+    def is_concern(self) -> bool:
+        """Quadratic or worse: worth raising with the student."""
+        return self.cost.exp is not None or self.cost.poly >= 2
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'line': self.line,
+            'end_line': self.end_line,
+            'big_o': self.big_o,
+            'reasons': [{'line': line, 'reason': reason} for line, reason in self.reasons],
+        }
+
+
+def _names(node) -> set:
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+
+
+_CONST_NODES = (ast.Constant, ast.List, ast.Tuple, ast.Set, ast.BinOp, ast.UnaryOp,
+                ast.operator, ast.unaryop, ast.expr_context)
+
+
+def _is_const(node) -> bool:
+    """A literal (possibly computed from other literals), e.g. 10, [1, 2], 2 ** 8."""
+    return all(isinstance(n, _CONST_NODES) for n in ast.walk(node))
+
+
+def _is_halving(node) -> bool:
+    """x // 2, x / 2, x >> 1 (or x * 0.5) anywhere in an expression."""
+    for n in ast.walk(node):
+        if isinstance(n, ast.BinOp) and isinstance(n.right, ast.Constant) and isinstance(n.right.value, (int, float)):
+            if isinstance(n.op, (ast.FloorDiv, ast.Div)) and n.right.value >= 2:
+                return True
+            if isinstance(n.op, ast.RShift) and n.right.value >= 1:
+                return True
+            if isinstance(n.op, ast.Mult) and 0 < n.right.value <= 0.5:
+                return True
+    return False
+
+
+def _describe(node) -> str:
+    try:
+        return ast.unparse(node)
+    except Exception:
+        return '...'
+
+
+class _FunctionAnalyzer:
+    """Estimates the cost of one function body."""
+
+    def __init__(self, module: '_ModuleAnalyzer', qualified: str, node, params: set,
+                 class_name: str = None, scopes: tuple = ()):
+        self.module = module
+        self.qualified = qualified      # 'f', 'A.go', 'f.inner'
+        self.class_name = class_name    # qualified class for methods, else None
+        self.scopes = scopes            # functions a bare name is looked up in, innermost first
+        self.node = node
+        self.params = params
+        self.reasons = []
+        self.list_names = set(params)   # Sequences where `in` / .index() scan
+        self.hash_names = set()         # Sets / dicts where `in` is O(1)
+        self.self_calls = []
+        self.loop_stack = []            # (iterable description, line, factor)
+        self._collect_types()
+
+    def _collect_types(self):
+        for n in ast.walk(self.node):
+            if isinstance(n, ast.Assign):
+                value = n.value
+                for target in n.targets:
+                    if not isinstance(target, ast.Name):
+                        continue
+                    if isinstance(value, (ast.Set, ast.Dict, ast.SetComp, ast.DictComp)) or (
+                            isinstance(value, ast.Call) and isinstance(value.func, ast.Name)
+                            and value.func.id in ('set', 'dict', 'frozenset', 'Counter', 'defaultdict')):
+                        self.hash_names.add(target.id)
+                        self.list_names.discard(target.id)
+                    elif isinstance(value, (ast.List, ast.ListComp)) or (
+                            isinstance(value, ast.Call) and isinstance(value.func, ast.Name)
+                            and value.func.id in ('list', 'sorted')):
+                        self.list_names.add(target.id)
+
+    def reason(self, line: int, text: str, cost: Cost):
+        """Record why the estimate is what it is; `cost` ranks the reasons."""
+        self.reasons.append((cost.key(), line, text))
+
+    def loop_cost(self) -> Cost:
+        """Product of the enclosing loops' iteration counts."""
+        cost = ONE
+        for _, _, factor in self.loop_stack:
+            cost = cost * factor
+        return cost
+
+    # Statements
+
+    def block(self, statements) -> Cost:
+        return _max_cost(self.statement(s) for s in statements)
+
+    def statement(self, node) -> Cost:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            return ONE   # Analyzed on its own
+        if isinstance(node, (ast.For, ast.AsyncFor)):
+            return _max_cost([self.expr(node.iter),
+                              self.loop(node, self.for_factor(node.iter), node.iter, node.body + node.orelse)])
+        if isinstance(node, ast.While):
+            return self.loop(node, self.while_factor(node), None, node.body + node.orelse, test=node.test)
+
+        costs = [self.expr(child) for child in ast.iter_child_nodes(node) if isinstance(child, ast.expr)]
+        for field in ('body', 'orelse', 'finalbody'):
+            costs.append(self.block(getattr(node, field, None) or []))
+        for handler in getattr(node, 'handlers', None) or []:
+            costs.append(self.block(handler.body))
+        for case in getattr(node, 'cases', None) or []:
+            costs.append(self.block(case.body))
+        return _max_cost(costs)
+
+    def loop(self, node, factor: Cost, iterable, body, test=None) -> Cost:
+        source = self.iterable_source(iterable) if iterable is not None else None
+        self.loop_stack.append((source, node.lineno, factor))
+        try:
+            total = self.loop_cost()
+            outer = [(s, line) for s, line, f in self.loop_stack[:-1] if f.key() > ONE.key()]
+            if factor.key() > ONE.key():
+                same = [line for s, line in outer if source and s == source]
+                if same:
+                    self.reason(node.lineno, f"nested loops over `{source}` (outer loop at line {same[-1]})", total)
+                elif outer:
+                    self.reason(node.lineno, f"loop nested {len(outer) + 1} deep (outer loops at lines "
+                                             f"{', '.join(str(line) for _, line in outer)})", total)
+                elif factor.key() == LINEAR.key():
+                    self.reason(node.lineno, f"loop over `{source}`" if source else "while loop", total)
+            inner = _max_cost([self.block(body), self.expr(test)])
+        finally:
+            self.loop_stack.pop()
+        return factor * inner
+
+    def iterable_source(self, node) -> str:
+        """The collection a loop walks: `arr` for arr, range(len(arr)), enumerate(arr), ..."""
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            if node.func.id == 'len' and node.args:
+                return self.iterable_source(node.args[0])
+            if node.func.id in ITERATION_WRAPPERS | {'range'} and node.args:
+                args = node.args if node.func.id != 'range' else node.args[-1:] if len(node.args) < 3 else node.args[1:2]
+                for arg in args:
+                    source = self.iterable_source(arg)
+                    if source:
+                        return source
+            return None
+        if isinstance(node, ast.BinOp):
+            return self.iterable_source(node.left) or self.iterable_source(node.right)
+        if isinstance(node, (ast.Name, ast.Attribute)):
+            return _describe(node)
+        return None
+
+    def for_factor(self, iterable) -> Cost:
+        if isinstance(iterable, (ast.List, ast.Tuple, ast.Set, ast.Constant)) and _is_const(iterable):
+            return ONE
+        if isinstance(iterable, ast.Call) and isinstance(iterable.func, ast.Name) and iterable.func.id == 'range':
+            if all(_is_const(arg) for arg in iterable.args):
+                return ONE
+            if any(isinstance(n, ast.Call) and getattr(n.func, 'id', getattr(n.func, 'attr', '')) in ('sqrt', 'isqrt')
+                   for n in ast.walk(iterable)):
+                return Cost(0.5)
+        return LINEAR
+
+    def while_factor(self, node: ast.While) -> Cost:
+        test_names = _names(node.test)
+        if isinstance(node.test, ast.Constant) and node.test.value:
+            self.reason(node.lineno, "`while True` loop: assumed to run O(n) times", LINEAR)
+            return LINEAR
+
+        halving_vars = set()    # e.g. mid = (left + right) // 2
+        for n in ast.walk(node):
+            if isinstance(n, ast.AugAssign) and isinstance(n.target, ast.Name) and n.target.id in test_names:
+                value = n.value
+                if isinstance(value, ast.Constant) and isinstance(value.value, (int, float)):
+                    scaled = (isinstance(n.op, (ast.FloorDiv, ast.Div, ast.Mult)) and value.value >= 2) or \
+                        (isinstance(n.op, (ast.RShift, ast.LShift)) and value.value >= 1)
+                    if scaled:
+                        self.reason(node.lineno, f"loop variable `{n.target.id}` is scaled each pass: "
+                                                 f"O(log n) iterations", LOG)
+                        return LOG
+            elif isinstance(n, ast.Assign) and _is_halving(n.value):
+                for target in n.targets:
+                    if isinstance(target, ast.Name):
+                        if target.id in test_names and target.id in _names(n.value):
+                            self.reason(node.lineno, f"loop variable `{target.id}` halves each pass: "
+                                                     f"O(log n) iterations", LOG)
+                            return LOG
+                        halving_vars.add(target.id)
+
+        if halving_vars:
+            # Binary search: the bounds in the condition move to the midpoint
+            for n in ast.walk(node):
+                if isinstance(n, ast.Assign) and any(isinstance(t, ast.Name) and t.id in test_names for t in n.targets):
+                    if _names(n.value) & halving_vars:
+                        bounds = ', '.join(sorted(test_names))
+                        self.reason(node.lineno, f"binary search: `{bounds}` move to the midpoint, "
+                                                 f"O(log n) iterations", LOG)
+                        return LOG
+        return LINEAR
+
+    # Expressions
+
+    def expr(self, node) -> Cost:
+        if node is None:
+            return ONE
+        if isinstance(node, (ast.Lambda,)):
+            return ONE
+        if isinstance(node, (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)):
+            return self.comprehension(node)
+
+        costs = [self.expr(child) for child in ast.iter_child_nodes(node) if isinstance(child, ast.expr)]
+        own = self.operation(node)
+        if own is not None:
+            costs.append(own)
+        return _max_cost(costs)
+
+    def comprehension(self, node) -> Cost:
+        cost = ONE
+        costs = []
+        depth = len(self.loop_stack)
+        try:
+            for generator in node.generators:
+                costs.append(self.expr(generator.iter))
+                factor = self.for_factor(generator.iter)
+                self.loop_stack.append((self.iterable_source(generator.iter), node.lineno, factor))
+                cost = cost * factor
+            elements = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+            conditions = [cond for generator in node.generators for cond in generator.ifs]
+            inner = _max_cost(self.expr(e) for e in elements + conditions)
+        finally:
+            del self.loop_stack[depth:]
+        return _max_cost(costs + [cost * inner])
+
+    def in_loop(self) -> bool:
+        return bool(self.loop_stack)
+
+    def linear_op(self, node, text: str) -> Cost:
+        if self.in_loop():
+            self.reason(node.lineno, f"{text} inside a loop", self.loop_cost() * LINEAR)
+        return LINEAR
+
+    def operation(self, node):
+        """Cost of the operation at this node itself (children are handled by expr)."""
+        if isinstance(node, ast.Compare):
+            for op, right in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.In, ast.NotIn)) and isinstance(right, ast.Name):
+                    if right.id in self.list_names and right.id not in self.hash_names:
+                        return self.linear_op(node, f"`in {right.id}` scans the whole list (a set is O(1))")
+                if isinstance(op, (ast.In, ast.NotIn)) and isinstance(right, (ast.List, ast.ListComp)):
+                    if not _is_const(right):
+                        return self.linear_op(node, "`in` on a list scans it")
+            return None
+
+        if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Slice):
+            return self.linear_op(node, f"slice `{_describe(node)}` copies the list")
+
+        if isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Name):
+                # A bare name never refers to a method, even from inside its class
+                target = self.module.resolve(func.id, self.scopes)
+                if target is not None and target == self.qualified:
+                    self.self_calls.append(node)
+                    return None
+                if func.id == 'sorted':
+                    if self.in_loop():
+                        self.reason(node.lineno, "sorted() inside a loop", self.loop_cost() * Cost(1, 1))
+                    return Cost(1, 1)
+                if func.id in LINEAR_BUILTINS and len(node.args) == 1 and not _is_const(node.args[0]):
+                    return self.linear_op(node, f"{func.id}() walks its whole argument")
+                return self.callee_cost(node, func.id, target)
+            elif isinstance(func, ast.Attribute):
+                if isinstance(func.value, ast.Name) and func.value.id in ('self', 'cls') and self.class_name:
+                    target = f"{self.class_name}.{func.attr}"
+                    if target == self.qualified:
+                        self.self_calls.append(node)
+                        return None
+                    if target in self.module.functions:
+                        return self.callee_cost(node, f"{func.value.id}.{func.attr}", target)
+                if isinstance(func.value, ast.Name) and func.value.id in self.hash_names:
+                    return None
+                if func.attr == 'sort':
+                    if self.in_loop():
+                        self.reason(node.lineno, ".sort() inside a loop", self.loop_cost() * Cost(1, 1))
+                    return Cost(1, 1)
+                if func.attr in LINEAR_METHODS:
+                    return self.linear_op(node, f".{func.attr}() is O(n)")
+                if func.attr in ('insert', 'pop') and node.args and isinstance(node.args[0], ast.Constant) \
+                        and node.args[0].value == 0:
+                    return self.linear_op(node, f".{func.attr}(0) shifts every element")
+        return None
+
+    def callee_cost(self, node: ast.Call, label: str, target: str):
+        """Cost of calling another function of the module (None if unknown or O(1))."""
+        callee = self.module.function_cost(target) if target is not None else None
+        if callee is not None and callee.key() > ONE.key():
+            if self.in_loop():
+                self.reason(node.lineno, f"calls {label}() ({callee}) inside a loop", self.loop_cost() * callee)
+            return callee
+        return None
+
+    # Recursion
+
+    def branching(self, statements) -> float:
+        """
+        Most self-calls made on one path through the statements; a call in a
+        loop counts as unbounded. An if-branch ending in return/raise ends
+        the path, so `if ...: return f(a)` then `return f(b)` is one call.
+        """
+        total = 0
+        for i, node in enumerate(statements):
+            if isinstance(node, ast.If):
+                rest = self.branching(statements[i + 1:])
+                paths = [self.branching(branch) + (0 if _terminates(branch) else rest)
+                         for branch in (node.body, node.orelse)]
+                return total + self._calls_in(node.test) + max(paths)
+            total += self._branching_node(node)
+            if isinstance(node, (ast.Return, ast.Raise)):
+                break
+        return total
+
+    def _branching_node(self, node) -> float:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            return 0
+        if isinstance(node, ast.If):
+            return self.branching([node])
+        if isinstance(node, (ast.For, ast.AsyncFor, ast.While)):
+            header = self._calls_in(node.iter) if isinstance(node, (ast.For, ast.AsyncFor)) else 0
+            return math.inf if self.branching(node.body) else header
+        if isinstance(node, ast.Try):
+            return max([self.branching(node.body + node.orelse + node.finalbody)]
+                       + [self.branching(h.body) for h in node.handlers])
+        if isinstance(node, ast.IfExp):
+            return self._calls_in(node.test) + max(self._branching_node(node.body), self._branching_node(node.orelse))
+        if isinstance(node, (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)):
+            return math.inf if self._calls_in(node) else 0
+        total = 1 if node in self._self_call_ids else 0
+        for child in ast.iter_child_nodes(node):
+            total += self._branching_node(child)
+        return total
+
+    def _calls_in(self, node) -> int:
+        return sum(1 for n in ast.walk(node) if n in self._self_call_ids)
+
+    def shrink(self) -> str:
+        """How recursive calls shrink the input: 'halving' or 'linear'."""
+        for call in self.self_calls:
+            for arg in list(call.args) + [kw.value for kw in call.keywords]:
+                if _is_halving(arg):
+                    return 'halving'
+                for n in ast.walk(arg):
+                    if isinstance(n, ast.Subscript) and isinstance(n.slice, ast.Slice):
+                        bounds = [b for b in (n.slice.lower, n.slice.upper) if b is not None]
+                        if any(not _is_const(b) for b in bounds):
+                            return 'halving'
+                    if isinstance(n, ast.Name) and n.id in ('mid', 'middle', 'half'):
+                        return 'halving'
+        return 'linear'
+
+    def is_memoized(self) -> bool:
+        for decorator in getattr(self.node, 'decorator_list', []):
+            target = decorator.func if isinstance(decorator, ast.Call) else decorator
+            if any(hint in _describe(target).lower() for hint in ('cache', 'memo')):
+                return True
+        for n in ast.walk(self.node):
+            if isinstance(n, ast.Compare) and any(isinstance(op, (ast.In, ast.NotIn)) for op in n.ops):
+                if any(any(hint in _describe(c).lower() for hint in MEMO_HINTS) for c in n.comparators):
+                    return True
+        return False
+
+    def recursion_cost(self, work: Cost):
+        if not self.self_calls:
+            return None
+        self._self_call_ids = set(self.self_calls)
+        line = self.self_calls[0].lineno
+        branches = self.branching(self.node.body)
+        shrink = self.shrink()
+
+        if self.is_memoized():
+            cost = LINEAR * work
+            self.reason(line, "memoized recursion: each input is solved once", cost)
+            return cost
+        if branches == math.inf:
+            cost = Cost(exp='n!')
+            self.reason(line, "recursive call inside a loop (backtracking): up to O(n!) calls", cost)
+            return cost
+        branches = max(int(branches), 1)
+        if shrink == 'halving':
+            # Master theorem: T(n) = a T(n/2) + n^d
+            critical = math.log2(branches)
+            if work.poly < critical:
+                cost = Cost(critical)
+            elif work.poly == critical:
+                cost = work * LOG
+            else:
+                cost = work
+            calls = '1 call' if branches == 1 else f"{branches} calls"
+            self.reason(line, f"recursion halves the input with {calls} per level", cost)
+            return cost
+        if branches == 1:
+            cost = LINEAR * work
+            self.reason(line, "recursion shrinks the input by a constant: O(n) calls deep", cost)
+            return cost
+        cost = Cost(exp=branches)
+        self.reason(line, f"{branches} recursive calls per step, each shrinking the input by a constant: "
+                          f"O({branches}^n) calls", cost)
+        return cost
+
+    def analyze(self) -> Cost:
+        body = self.node.body if not isinstance(self.node, ast.Module) else [
+            s for s in self.node.body if not isinstance(s, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+        ]
+        work = self.block(body)
+        recursive = self.recursion_cost(work)
+        return recursive if recursive is not None else work
+
+
+def _terminates(statements) -> bool:
+    """Whether a block always ends in return/raise."""
+    if not statements:
+        return False
+    last = statements[-1]
+    if isinstance(last, (ast.Return, ast.Raise)):
+        return True
+    if isinstance(last, ast.If):
+        return _terminates(last.body) and _terminates(last.orelse)
+    return False
+
+
+class _ModuleAnalyzer:
+    """Analyzes every function in a module, resolving calls between them."""
+
+    def __init__(self, tree: ast.Module):
+        self.tree = tree
+        # Qualified name ('f', 'A.go', 'f.inner') -> (node, qualified class or None,
+        # enclosing functions a bare name inside it is looked up in, innermost first)
+        self.functions = {}
+        self._collect(tree, '', None, ())
+        self.results = {}
+        self._in_progress = set()
+
+    def _collect(self, parent, prefix: str, class_name: str, scopes: tuple):
+        for node in ast.iter_child_nodes(parent):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                qualified = prefix + node.name
+                self.functions[qualified] = (node, class_name, scopes)
+                self._collect(node, qualified + '.', None, (qualified,) + scopes)
+            elif isinstance(node, ast.ClassDef):
+                self._collect(node, prefix + node.name + '.', prefix + node.name, scopes)
+            elif not isinstance(node, ast.Lambda):
+                self._collect(node, prefix, class_name, scopes)
+
+    def resolve(self, name: str, scopes: tuple):
+        """The function a bare call `name()` refers to: nested in an enclosing function, else top-level."""
+        for scope in scopes:
+            if f"{scope}.{name}" in self.functions:
+                return f"{scope}.{name}"
+        return name if name in self.functions else None
+
+    def function_cost(self, qualified: str):
+        """Cost of a function defined in this module, or None (unknown / mutually recursive)."""
+        if qualified not in self.functions or qualified in self._in_progress:
+            return None
+        if qualified not in self.results:
+            self._analyze_function(qualified)
+        return self.results[qualified].cost
+
+    def _analyze_function(self, qualified: str):
+        node, class_name, scopes = self.functions[qualified]
+        self._in_progress.add(qualified)
+        try:
+            params = {a.arg for a in node.args.args + node.args.kwonlyargs + node.args.posonlyargs} - {'self', 'cls'}
+            analyzer = _FunctionAnalyzer(self, qualified, node, params, class_name, (qualified,) + scopes)
+            cost = analyzer.analyze()
+        finally:
+            self._in_progress.discard(qualified)
+        self.results[qualified] = FunctionComplexity(qualified, node.lineno, node.end_lineno, cost,
+                                                     _dedupe(analyzer.reasons))
+
+    def analyze(self) -> list:
+        for qualified in self.functions:
+            if qualified not in self.results:
+                self._analyze_function(qualified)
+        results = sorted(self.results.values(), key=lambda r: r.line)
+
+        top_level = _FunctionAnalyzer(self, '<module>', self.tree, set())
+        cost = top_level.analyze()
+        if cost.key() > ONE.key():
+            results.append(FunctionComplexity('<module>', 1, len(self.tree.body) and self.tree.body[-1].end_lineno,
+                                              cost, _dedupe(top_level.reasons)))
+        return results
+
+
+def _dedupe(reasons: list) -> list:
+    """Unique (line, text) reasons, most significant first."""
+    seen = set()
+    unique = []
+    for _, line, text in sorted(reasons, key=lambda r: (r[0], -r[1]), reverse=True):
+        if (line, text) not in seen:
+            seen.add((line, text))
+            unique.append((line, text))
+    return unique
+
+
+@functools.lru_cache(maxsize=256)
+def analyze_complexity(code: str) -> tuple:
+    """
+    Per-function complexity estimates, in source order (plus '<module>' when
+    top-level code loops). Returns () for code that isn't valid Python.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return ()
+    return tuple(_ModuleAnalyzer(tree).analyze())
+
+
+def format_complexity(results, max_reasons: int = 2) -> str:
+    """One line per function: 'name() line N: O(...) - reason (line M); ...'."""
+    lines = []
+    for result in results:
+        label = result.name if result.name == '<module>' else f"{result.name}()"
+        line = f"{label} line {result.line}: {result.big_o}"
+        if result.reasons:
+            line += ' - ' + '; '.join(f"{reason} (line {n})" for n, reason in result.reasons[:max_reasons])
+        lines.append(line)
+    return '\n'.join(lines)
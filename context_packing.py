@@ -0,0 +1,286 @@
+"""
+Relevance-ranked context packing for the Autonomous Teaching Agent
+Splits the active file into AST chunks (functions / classes / module code),
+ranks them against the student's message and recent run_code errors, and
+packs the best chunks into a token budget with a note on what was left out.
+
+Configuration (environment variables):
+    COMPTUTOR_CONTEXT_TOKENS  - token budget for the attached file (default 1500)
+"""
+import os
+import re
+import ast
+
+from tracing import estimate_tokens
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get('COMPTUTOR_CONTEXT_TOKENS', '1500'))
+
+IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+TRACEBACK_LINE_RE = re.compile(r'line (\d+)')
+
+# Words that carry no signal when matching a question against code
+STOPWORDS = {
+    'the', 'a', 'an', 'is', 'are', 'it', 'my', 'me', 'i', 'to', 'of', 'in', 'on', 'and', 'or',
+    'why', 'what', 'how', 'does', 'do', 'this', 'that', 'code', 'function', 'file', 'help',
+    'not', 'work', 'working', 'can', 'you', 'with', 'for', 'self', 'return', 'def', 'class',
+}
+
+# Chunks bigger than this share of the budget are split into their methods
+SPLIT_CLASS_RATIO = 0.5
+# Fallback chunk size for non-Python files or files that don't parse
+FALLBACK_CHUNK_LINES = 40
+# A chunk too big for the remaining budget is cut down to a window around
+# its most relevant lines, if at least this many tokens are left
+MIN_WINDOW_TOKENS = 100
+# The omitted-sections note names at most this many sections ("and K more")
+MAX_OMITTED_LISTED = 8
+# Budget held back for the header and omitted-sections note of a packed file
+NOTE_RESERVE_TOKENS = 150
+
+
+class CodeChunk:
+    """A contiguous range of source lines (1-based, inclusive)."""
+
+    __slots__ = ('name', 'start', 'end', 'text', 'terms', 'tokens')
+
+    def __init__(self, name: str, lines: list, start: int, end: int):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.text = '\n'.join(lines[start - 1:end])
+        self.terms = {t.lower() for t in IDENTIFIER_RE.findall(self.text)}
+        self.tokens = estimate_tokens(self.text)
+
+
+class PackedContext:
+    """Result of packing: the rendered context plus what was included/omitted."""
+
+    def __init__(self, text: str, included: list, omitted: list, total_tokens: int, packed_tokens: int):
+        self.text = text
+        self.included = included
+        self.omitted = omitted
+        self.total_tokens = total_tokens
+        self.packed_tokens = packed_tokens
+
+
+def _terms(text: str) -> set:
+    return {t.lower() for t in IDENTIFIER_RE.findall(text or '') if t.lower() not in STOPWORDS and len(t) > 1}
+
+
+def _fallback_chunks(lines: list, first: int = 1, last: int = None, prefix: str = "lines") -> list:
+    """Split lines first..last on blank lines into blocks of at most FALLBACK_CHUNK_LINES lines."""
+    last = len(lines) if last is None else last
+    chunks = []
+    start = first
+    for i in range(first, last + 1):
+        at_break = not lines[i - 1].strip() and i - start >= 5
+        if at_break or i - start + 1 >= FALLBACK_CHUNK_LINES or i == last:
+            chunks.append(CodeChunk(f"{prefix} {start}-{i}", lines, start, i))
+            start = i + 1
+    return chunks
+
+
+def _node_start(node) -> int:
+    decorators = getattr(node, 'decorator_list', None)
+    return min([node.lineno] + [d.lineno for d in decorators]) if decorators else node.lineno
+
+
+def chunk_source(source: str, language_id: str = 'python', token_budget: int = DEFAULT_TOKEN_BUDGET) -> list:
+    """Chunk source by top-level AST node; large classes are split into their methods."""
+    lines = source.splitlines()
+    if not lines:
+        return []
+    if language_id not in ('python', 'py', ''):
+        return _fallback_chunks(lines)
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return _fallback_chunks(lines)
+
+    chunks = []
+    pending_start = None  # start of a run of plain module-level statements
+
+    def flush_module_code(end: int):
+        nonlocal pending_start
+        if pending_start is not None and end >= pending_start:
+            chunk = CodeChunk("module code", lines, pending_start, end)
+            # A long flat script would otherwise be one chunk that never fits
+            if chunk.tokens > token_budget * SPLIT_CLASS_RATIO:
+                chunks.extend(_fallback_chunks(lines, pending_start, end, "module code"))
+            else:
+                chunks.append(chunk)
+        pending_start = None
+
+    for node in tree.body:
+        start, end = _node_start(node), node.end_lineno
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            flush_module_code(start - 1)
+            kind = 'class' if isinstance(node, ast.ClassDef) else 'def'
+            chunk = CodeChunk(f"{kind} {node.name}", lines, start, end)
+            if kind == 'class' and chunk.tokens > token_budget * SPLIT_CLASS_RATIO:
+                methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+                header_end = (_node_start(methods[0]) - 1) if methods else end
+                chunks.append(CodeChunk(f"class {node.name} (header)", lines, start, header_end))
+                for method in methods:
+                    chunks.append(CodeChunk(f"def {node.name}.{method.name}", lines, _node_start(method), method.end_lineno))
+            else:
+                chunks.append(chunk)
+        elif pending_start is None:
+            pending_start = start
+    flush_module_code(len(lines))
+    return chunks
+
+
+def parse_token_budget(value) -> int:
+    """A token budget from request data: a positive int, else DEFAULT_TOKEN_BUDGET."""
+    try:
+        budget = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_TOKEN_BUDGET
+    return budget if budget > 0 else DEFAULT_TOKEN_BUDGET
+
+
+def error_line_numbers(errors) -> set:
+    """Line numbers mentioned in run_code tracebacks (e.g. 'File "/tmp/x.py", line 5')."""
+    found = set()
+    for error in errors or ():
+        found.update(int(n) for n in TRACEBACK_LINE_RE.findall(error))
+    return found
+
+
+def score_chunk(chunk: CodeChunk, query_terms: set, error_terms: set, error_lines: set) -> float:
+    """Relevance of a chunk: term overlap with the question and errors, plus traceback hits."""
+    score = 2.0 * len(query_terms & chunk.terms) + 1.0 * len(error_terms & chunk.terms)
+    # A name the student mentions explicitly ("why does binary fail?") is the strongest signal
+    chunk_name = chunk.name.split()[-1].split('.')[-1].lower()
+    if chunk_name in query_terms:
+        score += 10.0
+    if any(chunk.start <= line <= chunk.end for line in error_lines):
+        score += 8.0
+    return score
+
+
+def window_chunk(chunk: CodeChunk, lines: list, budget: int, query_terms: set, error_lines: set):
+    """
+    Cut a chunk down to `budget` tokens: its first line (the signature, with
+    any decorators) plus the lines around the first traceback hit inside it,
+    or else the first line mentioning the question's terms.
+
+    Returns (kept, gaps): the chunks to include and the ranges left out,
+    or ([], [chunk]) when not even the signature and one line fit.
+    """
+    header_end = chunk.start
+    while header_end < chunk.end and lines[header_end - 1].lstrip().startswith('@'):
+        header_end += 1
+    if header_end >= chunk.end:
+        return [], [chunk]
+
+    body = range(header_end + 1, chunk.end + 1)
+    focus = next((n for n in sorted(error_lines) if n in body), None)
+    if focus is None:
+        focus = next((n for n in body if _terms(lines[n - 1]) & query_terms), body[0])
+
+    def cost(n):
+        return estimate_tokens(lines[n - 1]) + 1
+
+    used = sum(cost(n) for n in range(chunk.start, header_end + 1)) + cost(focus)
+    if used > budget:
+        return [], [chunk]
+    low = high = focus
+    # Grow the window a line at a time on each side while it fits
+    grew = True
+    while grew:
+        grew = False
+        if high < chunk.end and used + cost(high + 1) <= budget:
+            high += 1
+            used += cost(high)
+            grew = True
+        if low > body[0] and used + cost(low - 1) <= budget:
+            low -= 1
+            used += cost(low)
+            grew = True
+
+    if low == body[0]:
+        kept = [CodeChunk(f"{chunk.name} (part)", lines, chunk.start, high)]
+    else:
+        kept = [CodeChunk(f"{chunk.name} (signature)", lines, chunk.start, header_end),
+                CodeChunk(f"{chunk.name} (part)", lines, low, high)]
+    gaps = [CodeChunk(f"{chunk.name} (rest)", lines, start, end)
+            for start, end in ((body[0], low - 1), (high + 1, chunk.end)) if end >= start]
+    return kept, gaps
+
+
+def pack_context(source: str, message: str, recent_errors=(), token_budget: int = None,
+                 language_id: str = 'python') -> PackedContext:
+    """
+    Select the chunks of `source` most relevant to `message` and `recent_errors`
+    that fit in `token_budget`. Files that already fit are returned whole.
+    A chunk that is too big for what is left of the budget (a long function
+    the student asked about) is windowed around its most relevant lines
+    rather than skipped, so the leftover budget is always used.
+    """
+    token_budget = token_budget or DEFAULT_TOKEN_BUDGET
+    total_tokens = estimate_tokens(source)
+    if total_tokens <= token_budget:
+        return PackedContext(source, [], [], total_tokens, total_tokens)
+
+    chunks = chunk_source(source, language_id, token_budget)
+    query_terms = _terms(message)
+    error_terms = _terms('\n'.join(recent_errors or ()))
+    error_lines = error_line_numbers(recent_errors)
+
+    scores = {id(c): score_chunk(c, query_terms, error_terms, error_lines) for c in chunks}
+    ranked = sorted(chunks, key=lambda c: (-scores[id(c)], c.start))
+
+    lines = source.splitlines()
+    # Each included chunk also costs its line marker
+    marker_tokens = estimate_tokens(_marker(len(lines), len(lines))) + 1
+    included, omitted, used = [], [], 0
+    for chunk in ranked:
+        if used + chunk.tokens + marker_tokens <= token_budget:
+            included.append(chunk)
+            used += chunk.tokens + marker_tokens
+        elif token_budget - used >= MIN_WINDOW_TOKENS:
+            kept, gaps = window_chunk(chunk, lines, token_budget - used - 2 * marker_tokens, query_terms, error_lines)
+            included.extend(kept)
+            used += sum(c.tokens + marker_tokens for c in kept)
+            omitted.extend(gaps)
+        else:
+            omitted.append(chunk)
+    omitted.sort(key=lambda c: c.start)
+
+    # Render in file order with line markers so the agent can reference lines
+    parts = []
+    for chunk in sorted(included, key=lambda c: c.start):
+        parts.append(f"{_marker(chunk.start, chunk.end)}\n{chunk.text}")
+    return PackedContext('\n'.join(parts), included, omitted, total_tokens, used)
+
+
+def _marker(start: int, end: int) -> str:
+    return f"# --- lines {start}-{end} ---"
+
+
+def render_file_context(file_context: dict, message: str, recent_errors=(), token_budget: int = None) -> str:
+    """Build the '[Current file: ...]' block appended to a chat message."""
+    file_name = file_context.get('fileName', 'unknown')
+    if 'content' not in file_context:
+        return f"\n\n[Current file: {file_name}]\n"
+
+    language_id = file_context.get('languageId', '')
+    content = file_context['content']
+    token_budget = token_budget or DEFAULT_TOKEN_BUDGET
+    if estimate_tokens(content) <= token_budget:
+        return f"\n\n[Current file: {file_name}]\n```{language_id}\n{content}\n```"
+
+    # The header and note count against the budget too
+    code_budget = max(token_budget - NOTE_RESERVE_TOKENS - estimate_tokens(file_name) * 2, 1)
+    packed = pack_context(content, message, recent_errors, code_budget, language_id)
+    header = (f"\n\n[Current file: {file_name} - showing {len(packed.included)} of "
+              f"{len(packed.included) + len(packed.omitted)} sections, ~{packed.packed_tokens} of "
+              f"~{packed.total_tokens} tokens]\n")
+    listed = packed.omitted[:MAX_OMITTED_LISTED]
+    omitted = ', '.join(f"{c.name} (lines {c.start}-{c.end})" for c in listed)
+    if len(packed.omitted) > len(listed):
+        omitted += f" and {len(packed.omitted) - len(listed)} more"
+    note = f"\n[Omitted from {file_name}: {omitted}. Use search_code to look them up if needed.]"
+    return f"{header}```{language_id}\n{packed.text}\n```{note}"
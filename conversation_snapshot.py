@@ -0,0 +1,174 @@
+"""
+Compact, versioned snapshots of wayflowcore conversations
+Captures every message's type, text content, tool requests / results,
+sender, recipients and display_only flag, plus the caller's message_idx /
+session_ended, so a session can be evicted, persisted or migrated to
+another worker and restored. Timestamps and non-text contents (images)
+are not kept; restored messages are stamped with the restore time.
+
+Snapshot layout (version 2), as a dict / compact JSON:
+    {"v": 2, "idx": <message_idx>, "ended": <bool>,
+     "m": [[<message type name>, <content>, <tool requests>, <tool result>, <extra>], ...]}
+where tool requests are [[name, args, tool_request_id], ...] or null, a
+tool result is [content, tool_request_id] or null, and extra is
+{"s": sender, "r": [recipients], "d": true} with only the non-default keys,
+or null. Trailing nulls are dropped. Version 1 snapshots (no extra) still
+load. The binary form is the JSON compressed with zlib behind a magic
+header.
+"""
+import json
+import zlib
+
+SNAPSHOT_VERSION = 2
+# Older versions loads_snapshot still accepts
+SUPPORTED_VERSIONS = (1, 2)
+BINARY_MAGIC = b'CTS1'
+
+
+class SnapshotError(Exception):
+    """Raised when snapshot data is malformed or from an unknown version."""
+
+
+def _encode_tool_requests(tool_requests):
+    if not tool_requests:
+        return None
+    return [
+        [getattr(req, 'name', None), getattr(req, 'args', None) or {}, getattr(req, 'tool_request_id', None)]
+        for req in tool_requests
+    ]
+
+
+def _encode_tool_result(tool_result):
+    if tool_result is None:
+        return None
+    return [getattr(tool_result, 'content', None), getattr(tool_result, 'tool_request_id', None)]
+
+
+def _encode_extra(message):
+    extra = {}
+    if getattr(message, 'sender', None) is not None:
+        extra['s'] = message.sender
+    if getattr(message, 'recipients', None):
+        extra['r'] = sorted(message.recipients)
+    if getattr(message, 'display_only', False):
+        extra['d'] = True
+    return extra or None
+
+
+def encode_message(message) -> list:
+    """Encode one message as a positional row, dropping trailing empty fields."""
+    message_type = getattr(message, 'message_type', None)
+    row = [
+        getattr(message_type, 'name', str(message_type)),
+        getattr(message, 'content', '') or '',
+        _encode_tool_requests(getattr(message, 'tool_requests', None)),
+        _encode_tool_result(getattr(message, 'tool_result', None)),
+        _encode_extra(message),
+    ]
+    while len(row) > 2 and row[-1] is None:
+        row.pop()
+    return row
+
+
+def snapshot_messages(messages, message_idx: int = -1, session_ended: bool = False) -> dict:
+    """Build a snapshot dict from a list of wayflowcore messages."""
+    return {
+        'v': SNAPSHOT_VERSION,
+        'idx': message_idx,
+        'ended': bool(session_ended),
+        'm': [encode_message(message) for message in messages],
+    }
+
+
+def snapshot_conversation(conversation, message_idx: int = -1, session_ended: bool = False) -> dict:
+    """Build a snapshot dict from a wayflowcore conversation."""
+    return snapshot_messages(conversation.get_messages(), message_idx, session_ended)
+
+
+def dumps_snapshot(snapshot: dict, binary: bool = False):
+    """Serialize a snapshot to compact JSON text, or zlib-compressed bytes."""
+    text = json.dumps(snapshot, ensure_ascii=False, separators=(',', ':'), default=str)
+    if binary:
+        return BINARY_MAGIC + zlib.compress(text.encode('utf-8'), 6)
+    return text
+
+
+def loads_snapshot(data) -> dict:
+    """Parse a snapshot produced by dumps_snapshot (JSON text or binary) and validate it."""
+    if isinstance(data, dict):
+        snapshot = data
+    else:
+        if isinstance(data, (bytes, bytearray)):
+            if data[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+                data = zlib.decompress(bytes(data[len(BINARY_MAGIC):]))
+            data = data.decode('utf-8')
+        try:
+            snapshot = json.loads(data)
+        except ValueError as e:
+            raise SnapshotError(f"Invalid snapshot: {e}")
+
+    if not isinstance(snapshot, dict) or 'm' not in snapshot:
+        raise SnapshotError("Invalid snapshot: missing messages")
+    if snapshot.get('v') not in SUPPORTED_VERSIONS:
+        raise SnapshotError(f"Unsupported snapshot version: {snapshot.get('v')}")
+    return snapshot
+
+
+def decode_message(row: list) -> dict:
+    """Decode a message row into a plain dict (no wayflowcore needed)."""
+    row = list(row) + [None] * (5 - len(row))
+    message_type, content, tool_requests, tool_result, extra = row[:5]
+    extra = extra or {}
+    return {
+        'type': message_type,
+        'content': content,
+        'tool_requests': [
+            {'name': name, 'args': args, 'tool_request_id': request_id}
+            for name, args, request_id in (tool_requests or [])
+        ],
+        'tool_result': {'content': tool_result[0], 'tool_request_id': tool_result[1]} if tool_result else None,
+        'sender': extra.get('s'),
+        'recipients': list(extra.get('r') or ()),
+        'display_only': bool(extra.get('d')),
+    }
+
+
+def build_messages(snapshot: dict) -> list:
+    """Recreate wayflowcore Message objects from a snapshot."""
+    from wayflowcore.messagelist import Message, MessageType
+    from wayflowcore.tools import ToolRequest, ToolResult
+
+    messages = []
+    for row in snapshot['m']:
+        decoded = decode_message(row)
+        kwargs = {
+            'content': decoded['content'],
+            'message_type': MessageType[decoded['type']],
+            'sender': decoded['sender'],
+            'recipients': set(decoded['recipients']),
+            'display_only': decoded['display_only'],
+        }
+        if decoded['tool_requests']:
+            kwargs['tool_requests'] = [
+                ToolRequest(name=req['name'], args=req['args'], tool_request_id=req['tool_request_id'])
+                for req in decoded['tool_requests']
+            ]
+        if decoded['tool_result']:
+            kwargs['tool_result'] = ToolResult(
+                content=decoded['tool_result']['content'],
+                tool_request_id=decoded['tool_result']['tool_request_id'],
+            )
+        messages.append(Message(**kwargs))
+    return messages
+
+
+def restore_conversation(conversation, snapshot) -> tuple:
+    """
+    Append the snapshot's messages to a freshly started conversation.
+
+    Returns (message_idx, session_ended) as they were when the snapshot was taken.
+    """
+    snapshot = loads_snapshot(snapshot)
+    for message in build_messages(snapshot):
+        conversation.message_list.append_message(message)
+    return snapshot.get('idx', -1), snapshot.get('ended', False)
@@ -0,0 +1,548 @@
+"""
+Language executors for run_code
+Maps a language (the VS Code languageId, or a common alias) to the local
+toolchain that runs it. Compiled languages are built once per distinct
+source: artifacts are cached on disk by a hash of the source and compile
+command, so re-running unchanged code skips the compiler.
+
+Only toolchains already installed on the machine are used; nothing is
+downloaded. Configuration (environment variables):
+    COMPTUTOR_ARTIFACT_DIR   - where compiled artifacts are kept; must be
+                               private to this user (default:
+                               <tmp>/comptutor-artifacts-<uid>, mode 0700)
+    COMPTUTOR_ARTIFACT_MAX   - most artifacts kept; least recently used are
+                               deleted beyond it (default 256)
+    COMPTUTOR_ARTIFACT_MAX_MB - most megabytes of artifacts kept (default 256)
+"""
+import os
+import re
+import stat
+import time
+import queue
+import codecs
+import shutil
+import signal
+import hashlib
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+from pathlib import Path
+
+RUN_TIMEOUT_SECONDS = 5
+COMPILE_TIMEOUT_SECONDS = 30
+# Per stream; beyond this only the tail of the output is kept
+MAX_OUTPUT_CHARS = 20000
+# Makes compiled programs line-buffer stdout into the pipe (GNU coreutils)
+STDBUF = shutil.which('stdbuf')
+DEFAULT_MAX_ARTIFACTS = int(os.environ.get('COMPTUTOR_ARTIFACT_MAX', '256'))
+DEFAULT_MAX_ARTIFACT_BYTES = int(os.environ.get('COMPTUTOR_ARTIFACT_MAX_MB', '256')) * 1024 * 1024
+ARTIFACT_NAME_RE = re.compile(r'^[a-z+]+-([0-9a-f]{32})$')
+
+
+def _owned_privately(st) -> bool:
+    """Whether a stat result belongs to this user and nobody else can write it."""
+    if not hasattr(os, 'getuid'):
+        return True  # Windows: no POSIX owners; rely on the profile's temp dir ACLs
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _private_directory(directory: Path) -> Path:
+    """
+    Create `directory` with mode 0700, or take over an existing real
+    directory owned by this user (tightening it to 0700). Anything else (a
+    symlink, someone else's directory) is not trusted: a fresh private temp
+    directory is used instead.
+    """
+    try:
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        st = os.lstat(directory)
+        if not hasattr(os, 'getuid'):
+            return directory  # Windows: no POSIX owners; temp dirs are per-profile
+        if stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid():
+            if st.st_mode & 0o077:
+                os.chmod(directory, 0o700)
+            return directory
+    except OSError:
+        pass
+    return Path(tempfile.mkdtemp(prefix='comptutor-artifacts-'))
+
+
+def _default_artifact_dir() -> Path:
+    user = os.getuid() if hasattr(os, 'getuid') else os.environ.get('USERNAME', 'user')
+    return Path(tempfile.gettempdir()) / f"comptutor-artifacts-{user}"
+
+
+class Executor:
+    """How to run one language: optional compile step, then a run command."""
+
+    def __init__(self, language: str, suffix: str, run: list, candidates: tuple = (), compile: list = None):
+        """
+        `run` and `compile` are argument templates: {tool} is the first of
+        `candidates` found on PATH, {source} the source file and {artifact}
+        the compiled output.
+        """
+        self.language = language
+        self.suffix = suffix
+        self.run = run
+        self.compile = compile
+        self.candidates = candidates
+
+    @property
+    def compiled(self) -> bool:
+        return self.compile is not None
+
+    def find_tool(self):
+        """The first candidate toolchain on PATH, or None."""
+        for candidate in self.candidates:
+            path = shutil.which(candidate)
+            if path:
+                return path
+        return None
+
+    def command(self, template: list, tool: str, source: str = '', artifact: str = '') -> list:
+        return [part.format(tool=tool, source=source, artifact=artifact) for part in template]
+
+
+class ArtifactCache:
+    """
+    Compiled programs on disk, keyed by sha256(language, compiler, source).
+    Compile failures are remembered in memory so broken code isn't rebuilt
+    on every call either. Both are LRU-bounded: artifacts by count and total
+    bytes (evicted files are deleted), failures by count.
+    """
+
+    def __init__(self, directory=None, max_failures: int = 128, max_artifacts: int = DEFAULT_MAX_ARTIFACTS,
+                 max_bytes: int = DEFAULT_MAX_ARTIFACT_BYTES):
+        # Cached binaries are run later, so nobody else may write where they live
+        self.directory = _private_directory(Path(directory or os.environ.get('COMPTUTOR_ARTIFACT_DIR')
+                                                 or _default_artifact_dir()))
+        self.max_failures = max_failures
+        self.max_artifacts = max_artifacts
+        self.max_bytes = max_bytes
+        self._failures = OrderedDict()   # key -> compiler output
+        self._artifacts = OrderedDict()  # key -> (path, size), least recently used first
+        self._bytes = 0
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load_existing()
+
+    def _load_existing(self):
+        """
+        Adopt artifacts left by earlier runs, oldest first, and trim them to
+        the limits. Only regular files named like artifacts, owned by this
+        user and not writable by others are adopted; anything else is ignored.
+        """
+        found = []
+        for path in self.directory.iterdir():
+            match = ARTIFACT_NAME_RE.match(path.name)
+            if not match:
+                continue  # staged files from an interrupted build, or strays
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode) and _owned_privately(st):
+                found.append((st.st_mtime, match.group(1), path, st.st_size))
+        with self._lock:
+            for _, key, path, size in sorted(found):
+                self._artifacts[key] = (path, size)
+                self._bytes += size
+            self._evict()
+
+    @staticmethod
+    def key(executor: Executor, tool: str, code: str) -> str:
+        digest = hashlib.sha256()
+        for part in (executor.language, tool, ' '.join(executor.compile), code):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()[:32]
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _evict(self):
+        """Drop least recently used artifacts beyond the limits (call with self._lock held)."""
+        while self._artifacts and (len(self._artifacts) > self.max_artifacts or self._bytes > self.max_bytes):
+            key, (path, size) = self._artifacts.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            self._forget(key)
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _forget(self, key: str):
+        """Drop the build lock of a key nothing is cached for (call with self._lock held)."""
+        if key not in self._artifacts and key not in self._failures:
+            self._locks.pop(key, None)
+
+    def build(self, executor: Executor, tool: str, code: str):
+        """
+        Return (artifact path, None) for a built program, or (None, compiler
+        output) if compilation failed.
+        """
+        key = self.key(executor, tool, code)
+        artifact = self.directory / f"{executor.language}-{key}"
+        # One compile per key even when the same code is run concurrently
+        with self._key_lock(key):
+            with self._lock:
+                if key in self._artifacts and artifact.exists():
+                    self.hits += 1
+                    self._artifacts.move_to_end(key)
+                    return str(artifact), None
+                if key in self._failures:
+                    self.hits += 1
+                    self._failures.move_to_end(key)
+                    return None, self._failures[key]
+            self.misses += 1
+
+            with tempfile.TemporaryDirectory() as build_dir:
+                source = Path(build_dir) / f"main{executor.suffix}"
+                source.write_text(code, encoding='utf-8')
+                output = Path(build_dir) / 'a.out'
+                try:
+                    result = subprocess.run(
+                        executor.command(executor.compile, tool, str(source), str(output)),
+                        capture_output=True,
+                        text=True,
+                        timeout=COMPILE_TIMEOUT_SECONDS
+                    )
+                except subprocess.TimeoutExpired:
+                    with self._lock:
+                        self._forget(key)
+                    return None, f"Compilation timed out ({COMPILE_TIMEOUT_SECONDS}s limit)"
+
+                if result.returncode != 0 or not output.exists():
+                    # Paths of the throwaway build dir only add noise for the student
+                    message = (result.stderr or result.stdout or 'Compilation failed').replace(build_dir + os.sep, '')
+                    with self._lock:
+                        self._failures[key] = message
+                        while len(self._failures) > self.max_failures:
+                            self._forget(self._failures.popitem(last=False)[0])
+                    return None, message
+
+                # Atomic publish, so a concurrent reader never runs a half-copied file
+                staged = self.directory / f".{artifact.name}.{os.getpid()}.{threading.get_ident()}"
+                shutil.move(str(output), staged)
+                os.replace(staged, artifact)
+                with self._lock:
+                    previous = self._artifacts.pop(key, None)
+                    if previous:
+                        self._bytes -= previous[1]
+                    size = artifact.stat().st_size
+                    self._artifacts[key] = (artifact, size)
+                    self._bytes += size
+                    self._evict()
+        return str(artifact), None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'artifacts': len(self._artifacts),
+                'artifact_bytes': self._bytes,
+                'failures': len(self._failures),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+# Language -> Executor; aliases point at the same instance
+EXECUTORS = {}
+
+
+def register_executor(executor: Executor, *aliases: str):
+    """Make an executor available under its language name and any aliases."""
+    for name in (executor.language,) + aliases:
+        EXECUTORS[name.lower()] = executor
+
+
+def get_executor(language: str):
+    """The executor for a language or alias (case-insensitive), or None."""
+    return EXECUTORS.get((language or 'python').strip().lower())
+
+
+def supported_languages() -> list:
+    return sorted({executor.language for executor in EXECUTORS.values()})
+
+
+def language_for_suffix(suffix: str):
+    """The language whose source files use this suffix (e.g. '.c'), or None."""
+    for executor in EXECUTORS.values():
+        if executor.suffix == suffix.lower():
+            return executor.language
+    return None
+
+
+register_executor(Executor('python', '.py', ['{tool}', '{source}'], candidates=('python', 'python3')), 'py')
+register_executor(Executor('c', '.c', ['{artifact}'], candidates=('gcc', 'clang', 'cc'),
+                           compile=['{tool}', '-std=c11', '-O1', '-o', '{artifact}', '{source}', '-lm']))
+register_executor(Executor('cpp', '.cpp', ['{artifact}'], candidates=('g++', 'clang++', 'c++'),
+                           compile=['{tool}', '-std=c++17', '-O1', '-o', '{artifact}', '{source}']), 'c++')
+register_executor(Executor('javascript', '.js', ['{tool}', '{source}'], candidates=('node', 'nodejs')), 'js', 'node')
+
+_artifact_cache = None
+_artifact_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """The process-wide artifact cache, created on first use."""
+    global _artifact_cache
+    with _artifact_cache_lock:
+        if _artifact_cache is None:
+            _artifact_cache = ArtifactCache()
+        return _artifact_cache
+
+
+class _Capture:
+    """
+    Output of one stream. Keeps the head and the tail (an infinite loop's
+    first and latest prints are what help diagnose it) and stops forwarding
+    chunks once the limit is reached.
+    """
+
+    def __init__(self, limit: int = MAX_OUTPUT_CHARS, tail: int = 4000):
+        self.limit = limit
+        self.tail_size = tail
+        self.head = []
+        self.head_size = 0
+        self.tail = ''
+        self.dropped = 0
+
+    def append(self, text: str):
+        """Record a chunk; returns the part to forward to the client, or None."""
+        room = self.limit - self.head_size
+        if room > 0:
+            forwarded = text[:room]
+            self.head.append(forwarded)
+            self.head_size += len(forwarded)
+            text = text[room:]
+            if not text:
+                return forwarded
+            notice = "\n[... output truncated ...]\n"
+            forwarded += notice
+        else:
+            forwarded = None
+        combined = self.tail + text
+        self.dropped += max(len(combined) - self.tail_size, 0)
+        self.tail = combined[-self.tail_size:]
+        return forwarded
+
+    def text(self) -> str:
+        head = ''.join(self.head)
+        if not self.tail:
+            return head
+        if self.dropped:
+            return f"{head}\n[... {self.dropped} characters omitted ...]\n{self.tail}"
+        return head + self.tail
+
+
+def _read_stream(name: str, stream, events: queue.Queue):
+    """Forward a pipe's decoded chunks to the event queue; (name, None) marks EOF."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    try:
+        while True:
+            data = stream.read1(4096)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                events.put((name, text))
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            events.put((name, tail))
+    except (OSError, ValueError):
+        pass
+    finally:
+        events.put((name, None))
+
+
+def _write_stdin(stream, test_input: str):
+    try:
+        if test_input:
+            stream.write(test_input.encode('utf-8'))
+        stream.close()
+    except (OSError, ValueError):
+        pass  # The program exited without reading its input
+
+
+def _kill(process: subprocess.Popen):
+    """Kill the program and anything it spawned."""
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def _report(stdout: str, stderr: str) -> str:
+    """The run_code report format: OUTPUT, then ERROR when there is any."""
+    output = stdout if stdout else "No output"
+    if stderr:
+        return f"OUTPUT:\n{output}\n\nERROR:\n{stderr}"
+    return f"OUTPUT:\n{output}"
+
+
+def _done(result: str, returncode=None, timed_out: bool = False) -> dict:
+    return {
+        'done': True,
+        'result': result,
+        'has_error': 'ERROR:' in result,
+        'returncode': returncode,
+        'timed_out': timed_out,
+    }
+
+
+def stream_execute(code: str, language: str = 'python', test_input: str = "",
+                   timeout: float = RUN_TIMEOUT_SECONDS):
+    """
+    Run code in a subprocess, yielding output as it is produced:
+        {"stream": "stdout" | "stderr", "data": "..."}   (any number)
+        {"done": true, "result": <run_code report>, "has_error": ..., "returncode": ..., "timed_out": ...}
+    On timeout the program is killed and the report keeps the partial output.
+    """
+    executor = get_executor(language)
+    if executor is None:
+        yield _done(f"ERROR:\nRunning {language} code is not supported. "
+                    f"Supported languages: {', '.join(supported_languages())}")
+        return
+
+    tool = executor.find_tool()
+    if tool is None:
+        yield _done(f"ERROR:\nNo {executor.language} toolchain found on this machine "
+                    f"(looked for {', '.join(executor.candidates)})")
+        return
+
+    temp_file = None
+    process = None
+    try:
+        if executor.compiled:
+            artifact, compile_error = get_artifact_cache().build(executor, tool, code)
+            if compile_error is not None:
+                yield _done(f"ERROR:\nCompilation failed:\n{compile_error}")
+                return
+            command = executor.command(executor.run, tool, artifact=artifact)
+            if STDBUF:
+                # C stdio fully buffers pipes, which would hide output until exit
+                command = [STDBUF, '-oL', '-eL'] + command
+        else:
+            with tempfile.NamedTemporaryFile(mode='w', suffix=executor.suffix, delete=False, encoding='utf-8') as f:
+                f.write(code)
+                temp_file = f.name
+            command = executor.command(executor.run, tool, source=temp_file)
+
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=dict(os.environ, PYTHONUNBUFFERED='1'),
+            start_new_session=True
+        )
+        deadline = time.monotonic() + timeout
+        events = queue.Queue()
+        threads = [
+            threading.Thread(target=_read_stream, args=('stdout', process.stdout, events), daemon=True),
+            threading.Thread(target=_read_stream, args=('stderr', process.stderr, events), daemon=True),
+            threading.Thread(target=_write_stdin, args=(process.stdin, test_input), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        captures = {'stdout': _Capture(), 'stderr': _Capture()}
+        open_streams = 2
+        timed_out = False
+        while open_streams:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            try:
+                batch = [events.get(timeout=remaining)]
+            except queue.Empty:
+                continue
+            # Coalesce whatever else is already queued into fewer, larger events
+            while len(batch) < 64:
+                try:
+                    batch.append(events.get_nowait())
+                except queue.Empty:
+                    break
+            pending = {}
+            for name, text in batch:
+                if text is None:
+                    open_streams -= 1
+                    continue
+                forwarded = captures[name].append(text)
+                if forwarded:
+                    pending[name] = pending.get(name, '') + forwarded
+            for name, text in pending.items():
+                yield {'stream': name, 'data': text}
+
+        if not timed_out:
+            try:
+                process.wait(timeout=max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                timed_out = True
+
+        if timed_out:
+            _kill(process)
+            process.wait()
+            # Output the program wrote just before it was killed
+            for thread in threads[:2]:
+                thread.join(timeout=1)
+            while True:
+                try:
+                    name, text = events.get_nowait()
+                except queue.Empty:
+                    break
+                if text is not None:
+                    forwarded = captures[name].append(text)
+                    if forwarded:
+                        yield {'stream': name, 'data': forwarded}
+
+        stdout, stderr = captures['stdout'].text(), captures['stderr'].text()
+        if timed_out:
+            note = f"Code execution timed out ({timeout:g}s limit)"
+            if stdout or stderr:
+                note += "; the output above is what it printed before being stopped"
+            stderr = f"{stderr.rstrip()}\n{note}" if stderr else note
+        elif process.returncode < 0 and not stderr:
+            # e.g. a segfault in C, which prints nothing itself
+            stderr = f"Process killed by signal {-process.returncode}"
+
+        if timed_out and not stdout:
+            result = f"ERROR:\n{stderr}"
+        else:
+            result = _report(stdout, stderr)
+        yield _done(result, process.returncode, timed_out)
+
+    except Exception as e:
+        yield _done(f"ERROR:\nExecution error: {str(e)}")
+    finally:
+        if process is not None and process.poll() is None:
+            # The consumer stopped early (e.g. the client disconnected)
+            _kill(process)
+            process.wait()
+        if temp_file:
+            Path(temp_file).unlink(missing_ok=True)
+
+
+def execute(code: str, language: str = 'python', test_input: str = "", timeout: float = RUN_TIMEOUT_SECONDS) -> str:
+    """
+    Run code in a subprocess with a timeout and return the run_code report:
+    "OUTPUT:\n..." followed by "\n\nERROR:\n..." when there is stderr output.
+    Output printed before a timeout is kept.
+    """
+    result = None
+    for event in stream_execute(code, language, test_input, timeout):
+        if event.get('done'):
+            result = event['result']
+    return result
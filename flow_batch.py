@@ -0,0 +1,472 @@
+"""
+Batch runner for Agent Spec flows
+Turns the MapNode example from AgentSpec_Workshop.ipynb into a reusable
+engine. A sub-flow (an LlmNode with structured outputs between a start and
+an end node) is mapped over many inputs, like the notebook's MapNode. Here,
+though, items run concurrently on a thread pool, each with its own timeout
+and retries. Results are streamed to JSONL as items finish instead of being
+collected at the end. The output file doubles as the checkpoint, as in
+grade_batch.py: a rerun skips items that have outputs and retries failed
+ones (the last record per id wins). Each record carries the run's config
+(flow, tier, --set values, flow digest); a rerun with a different one is
+refused rather than mixed into the same file. Throughput and latency
+percentiles go to stderr.
+
+Usage:
+    python flow_batch.py articles/ -o analysis.jsonl -j 8
+    python flow_batch.py submissions.jsonl --flow submission_feedback --tier large -o feedback.jsonl
+    python flow_batch.py items.jsonl --flow my_flow.json -o -     # a serialized Agent Spec flow, to stdout
+    python flow_batch.py articles/ --mock --mock-latency 8B=0.2   # against mock_llm.py, no API key
+
+JSONL input lines hold the flow inputs plus an optional id, e.g.
+    {"id": "phone", "article": "# The new phone ..."}
+Directory inputs fill the flow's first input with each file's text; other
+inputs come from --set name=value.
+
+Built-in flows use the cheapest model tier unless --tier says otherwise
+(COMPTUTOR_MODEL_TIERS / COMPTUTOR_LLM_URL apply, see model_routing.py).
+A serialized flow keeps the LLM config it was saved with.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import queue
+import random
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from grade_batch import load_checkpoint
+from model_routing import load_tiers
+from tracing import Histogram, tracer
+
+# Sub-flows: inputs (name, description), prompt template and structured
+# outputs (name, description). article_analysis is the notebook's flow.
+FLOWS = {
+    'article_analysis': {
+        'inputs': [('article', "Markdown article content")],
+        'prompt': (
+            "Extract the relevant information from the Markdown article below:\n"
+            "Article:\n{{article}}\n"
+        ),
+        'outputs': [
+            ('title', "A concise, catchy title for the article"),
+            ('topic', "One or two words describing the main topic"),
+            ('summary', "A 2-3 sentence summary of the article"),
+            ('outline', "Bullet-style outline of the article's structure"),
+            ('author', "The author's name"),
+        ],
+        'suffixes': ('.md', '.txt'),
+    },
+    'submission_feedback': {
+        'inputs': [('code', "The student's source code"), ('concept', "What the exercise practises")],
+        'prompt': (
+            "You are a patient computer science tutor reviewing a student's exercise.\n"
+            "Never write the corrected code for them.\n"
+            "Concept: {{concept}}\n"
+            "Code:\n{{code}}\n"
+        ),
+        'outputs': [
+            ('verdict', "UNDERSTOOD if the code shows the concept is mastered, PARTIAL if it is "
+                        "almost there, otherwise NEEDS_HELP"),
+            ('issue', "The most important problem in the code, or 'none'"),
+            ('hint', "One Socratic question that leads the student towards the fix without giving it away"),
+        ],
+        'suffixes': ('.py', '.c', '.cpp', '.js', '.java'),
+    },
+}
+
+# Item latencies can reach minutes on a slow model
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000)
+
+
+class FlowIncomplete(Exception):
+    """The flow stopped without output values (e.g. it asked for user input), or they were all empty."""
+
+
+def build_subflow(name: str, llm_config):
+    """The pyagentspec Flow for a built-in sub-flow: start -> LlmNode -> end."""
+    from pyagentspec.flows.flow import Flow
+    from pyagentspec.flows.edges import ControlFlowEdge, DataFlowEdge
+    from pyagentspec.flows.nodes import StartNode, EndNode, LlmNode
+    from pyagentspec.property import StringProperty
+
+    spec = FLOWS[name]
+    start_node = StartNode(
+        name="start_node",
+        inputs=[StringProperty(title=title, description=description) for title, description in spec['inputs']],
+    )
+    llm_node = LlmNode(
+        name=f"{name}_node",
+        llm_config=llm_config,
+        prompt_template=spec['prompt'],
+        outputs=[StringProperty(title=title, description=description) for title, description in spec['outputs']],
+    )
+    end_node = EndNode(
+        name="end_node",
+        outputs=[StringProperty(title=title, description=description) for title, description in spec['outputs']],
+    )
+    return Flow(
+        name=f"{name}_subflow",
+        start_node=start_node,
+        nodes=[start_node, llm_node, end_node],
+        control_flow_connections=[
+            ControlFlowEdge(name="cfe1", from_node=start_node, to_node=llm_node),
+            ControlFlowEdge(name="cfe2", from_node=llm_node, to_node=end_node),
+        ],
+        data_flow_connections=[
+            DataFlowEdge(name=f"in_{title}", source_node=start_node, source_output=title,
+                         destination_node=llm_node, destination_input=title)
+            for title, _ in spec['inputs']
+        ] + [
+            DataFlowEdge(name=title, source_node=llm_node, source_output=title,
+                         destination_node=end_node, destination_input=title)
+            for title, _ in spec['outputs']
+        ],
+    )
+
+
+def serialize_flow(name: str, llm_config) -> str:
+    """Agent Spec JSON for a built-in sub-flow (what the notebook prints with AgentSpecSerializer)."""
+    from pyagentspec.serialization import AgentSpecSerializer
+
+    return AgentSpecSerializer().to_json(build_subflow(name, llm_config), indent=2)
+
+
+def flow_inputs(serialized_flow: str) -> list:
+    """Input names of a serialized flow (its own inputs, else its start node's)."""
+    flow = json.loads(serialized_flow)
+    inputs = flow.get('inputs')
+    if not inputs:
+        start = flow.get('start_node') or {}
+        if '$component_ref' in start:
+            start = (flow.get('$referenced_components') or {}).get(start['$component_ref'], {})
+        inputs = start.get('inputs')
+    return [prop.get('title') for prop in inputs or []]
+
+
+def _call_with_timeout(func, timeout: float, slots: threading.Semaphore = None):
+    """
+    Run func() in a helper thread and wait at most `timeout` seconds.
+    A call that times out cannot be interrupted; it is abandoned and its
+    result dropped when it eventually returns. Each helper holds one of
+    `slots` until func() returns, so abandoned calls are bounded: once the
+    slots are used up, new calls wait for one to finish.
+    """
+    if not timeout:
+        return func()
+    outcome = {}
+
+    def target():
+        try:
+            outcome['value'] = func()
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            if slots is not None:
+                slots.release()
+
+    if slots is not None:
+        slots.acquire()
+    thread = threading.Thread(target=target, name='flow-item', daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"no result after {timeout:g} s")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['value']
+
+
+class BatchStats:
+    """Throughput and per-item latency of a batch run (updated by the driver thread only)."""
+
+    def __init__(self, skipped: int = 0):
+        self.skipped = skipped
+        self.ok = self.failed = self.retries = self.timeouts = 0
+        self.latency = Histogram(LATENCY_BUCKETS_MS)
+        self.started = time.perf_counter()
+
+    @property
+    def done(self) -> int:
+        return self.ok + self.failed
+
+    def add(self, record: dict):
+        if 'error' in record:
+            self.failed += 1
+        else:
+            self.ok += 1
+        self.retries += record['attempts'] - 1
+        self.timeouts += record.get('timeouts', 0)
+        self.latency.observe(record['ms'])
+
+    def to_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        latency = self.latency.to_dict()
+        return {
+            'skipped': self.skipped,
+            'ok': self.ok,
+            'failed': self.failed,
+            'retries': self.retries,
+            'timeouts': self.timeouts,
+            'seconds': round(elapsed, 3),
+            'items_per_s': round(self.done / elapsed, 3) if elapsed else 0.0,
+            'avg_ms': latency['avg_ms'],
+            'p50_ms': latency['p50_ms'],
+            'p95_ms': latency['p95_ms'],
+            'max_ms': latency['max_ms'],
+        }
+
+
+class FlowBatch:
+    """
+    Maps a serialized Agent Spec flow over items on a thread pool.
+    Loaded copies of the flow are pooled and reused, one per running
+    attempt; an item is retried with exponential backoff after an error, a
+    timeout or all-empty outputs. At most `workers` timed-out attempts are
+    left running in the background at a time.
+    """
+
+    def __init__(self, serialized_flow: str, workers: int = 4, retries: int = 2, timeout: float = 120.0,
+                 backoff: float = 1.0):
+        self.serialized_flow = serialized_flow
+        self.inputs = flow_inputs(serialized_flow)
+        self.workers = workers
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.stats = BatchStats()
+        self._flows = queue.SimpleQueue()   # Loaded flows not in use
+        # Running attempts, abandoned (timed-out) ones included
+        self._slots = threading.Semaphore(workers * 2)
+
+    def _execute(self, inputs: dict) -> dict:
+        try:
+            flow = self._flows.get_nowait()
+        except queue.Empty:
+            from wayflowcore.agentspec import AgentSpecLoader
+
+            flow = AgentSpecLoader().load_json(self.serialized_flow)
+        try:
+            status = flow.start_conversation(inputs).execute()
+        finally:
+            self._flows.put(flow)
+        outputs = getattr(status, 'output_values', None)
+        if outputs is None:
+            raise FlowIncomplete(f"flow stopped with {type(status).__name__}")
+        # Unparsable structured output comes back as the (empty) defaults
+        if not any(str(value).strip() for value in outputs.values() if value is not None):
+            raise FlowIncomplete("flow returned only empty outputs")
+        return dict(outputs)
+
+    def run_item(self, item: dict) -> dict:
+        """Run the flow on one item; never raises, failures end up in the record."""
+        started = time.perf_counter()
+        record = {'id': item['id'], 'attempts': 0}
+        missing = [name for name in self.inputs if name not in item]
+        if missing:
+            record['error'] = f"missing input(s): {', '.join(missing)}"
+        else:
+            inputs = {name: item[name] for name in self.inputs}
+            timeouts = 0
+            with tracer.span('flow.item', item=item['id']) as span:
+                for attempt in range(self.retries + 1):
+                    if attempt:
+                        # Exponential backoff with jitter, so retries don't arrive in lockstep
+                        time.sleep(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+                    record['attempts'] = attempt + 1
+                    try:
+                        record['outputs'] = _call_with_timeout(lambda: self._execute(inputs), self.timeout,
+                                                               self._slots)
+                        record.pop('error', None)
+                        break
+                    except TimeoutError as e:
+                        timeouts += 1
+                        record['error'] = f"TimeoutError: {e}"
+                    except Exception as e:
+                        record['error'] = f"{type(e).__name__}: {e}"
+                span.set_attribute('attempts', record['attempts'])
+                if 'error' in record:
+                    span.status = 'error'
+            if timeouts:
+                record['timeouts'] = timeouts
+        record['ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return record
+
+    def run(self, items, skipped: int = 0):
+        """Yield one record per item as soon as it finishes (completion order)."""
+        self.stats = BatchStats(skipped)
+        max_in_flight = self.workers * 4  # Bounded so huge inputs are streamed, not loaded
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='flow-batch') as pool:
+            pending = set()
+
+            def drain():
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    pending.discard(future)
+                    record = future.result()
+                    self.stats.add(record)
+                    yield record
+
+            for item in items:
+                pending.add(pool.submit(self.run_item, item))
+                if len(pending) >= max_in_flight:
+                    yield from drain()
+            while pending:
+                yield from drain()
+
+
+def iter_items(source: Path, first_input: str, suffixes: tuple, defaults: dict):
+    """Yield items from a directory (one per file, text in `first_input`) or a JSONL file."""
+    if source.is_dir():
+        for path in sorted(source.rglob('*')):
+            if not path.is_file() or (suffixes and path.suffix.lower() not in suffixes):
+                continue
+            yield dict(defaults, id=path.relative_to(source).as_posix(),
+                       **{first_input: path.read_text(encoding='utf-8', errors='replace')})
+        return
+
+    with open(source, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            record.setdefault('id', f"line-{line_no}")
+            yield dict(defaults, **record)
+
+
+def run_config(flow: str, tier, defaults: dict, definition: str) -> dict:
+    """What makes two runs' results comparable; stamped on every record.
+
+    `definition` is digested so an edited prompt or flow file counts as a new
+    config. It must be stable across runs: serialized built-in flows get
+    fresh component ids each time, so they pass their spec and model instead.
+    """
+    return {'flow': flow, 'tier': tier, 'set': dict(sorted(defaults.items())),
+            'digest': hashlib.sha256(definition.encode('utf-8')).hexdigest()[:16]}
+
+
+def load_config_checkpoint(output: Path, config: dict) -> set:
+    """Ids with outputs in `output`; ValueError if it holds results of another config."""
+    if output.exists():
+        with open(output, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, start=1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by a crash is simply redone
+                if isinstance(record, dict) and 'id' in record and record.get('config') != config:
+                    raise ValueError(f"{output} line {line_no} was written with a different config "
+                                     f"({record.get('config')}, now {config})")
+    return load_checkpoint(output, require='outputs')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Map an Agent Spec sub-flow over a batch of inputs.")
+    parser.add_argument('source', type=Path, help="Directory of input files or a JSONL file of items")
+    parser.add_argument('-o', '--output', default='flow_results.jsonl',
+                        help="Results JSONL (also the resume checkpoint), or - for stdout")
+    parser.add_argument('--flow', default='article_analysis',
+                        help=f"Built-in flow ({', '.join(FLOWS)}) or a serialized Agent Spec flow JSON file")
+    parser.add_argument('--tier', help="Model tier for built-in flows (default: the cheapest)")
+    parser.add_argument('-j', '--workers', type=int, default=4, help="Items run concurrently")
+    parser.add_argument('--retries', type=int, default=2, help="Extra attempts per failing item")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Seconds per attempt (0: no limit)")
+    parser.add_argument('--backoff', type=float, default=1.0, help="Seconds before the first retry, doubling")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help="Default for a flow input, e.g. --set concept=recursion")
+    parser.add_argument('--export', type=Path, help="Write the serialized flow here and exit")
+    parser.add_argument('--mock', type=int, nargs='?', const=8009, metavar='PORT',
+                        help="Start mock_llm.py on PORT (default 8009) and send the flow there")
+    parser.add_argument('--mock-latency', default='', help="Mock seconds per reply, e.g. 8B=0.2")
+    parser.add_argument('--restart', action='store_true', help="Ignore existing results and start over")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1 or args.retries < 0:
+        parser.error("--workers must be at least 1 and --retries at least 0")
+    if not args.source.exists() and not args.export:
+        parser.error(f"No such file or directory: {args.source}")
+    defaults = {}
+    for assignment in args.set:
+        name, sep, value = assignment.partition('=')
+        if not sep:
+            parser.error(f"--set expects NAME=VALUE, got {assignment!r}")
+        defaults[name] = value
+
+    mock = None
+    if args.mock is not None:
+        import mock_llm
+
+        mock = mock_llm.serve(args.mock, latency=mock_llm._parse_rates(args.mock_latency))
+        os.environ['COMPTUTOR_LLM_URL'] = f"http://localhost:{args.mock}/v1"
+        os.environ.setdefault('OPENAI_API_KEY', 'mock')
+
+    if args.flow in FLOWS:
+        tiers = load_tiers()
+        tier = next((t for t in tiers if t.name == args.tier), None) if args.tier else tiers[0]
+        if tier is None:
+            parser.error(f"Unknown tier {args.tier!r} (have: {', '.join(t.name for t in tiers)})")
+        serialized_flow = serialize_flow(args.flow, tier.llm_config())
+        suffixes = FLOWS[args.flow]['suffixes']
+        label = f"{args.flow} on the {tier.name} tier"
+        config = run_config(args.flow, tier.name, defaults, json.dumps([FLOWS[args.flow], tier.model_id]))
+    else:
+        serialized_flow = Path(args.flow).read_text(encoding='utf-8')
+        suffixes = ()
+        label = args.flow
+        config = run_config(args.flow, None, defaults, serialized_flow)
+
+    if args.export:
+        args.export.write_text(serialized_flow, encoding='utf-8')
+        print(f"Wrote {args.export}", file=sys.stderr)
+        return 0
+
+    batch = FlowBatch(serialized_flow, workers=args.workers, retries=args.retries, timeout=args.timeout,
+                      backoff=args.backoff)
+    if not batch.inputs:
+        parser.error(f"{label} has no inputs")
+
+    to_stdout = args.output == '-'
+    output = Path(args.output)
+    if args.restart and not to_stdout and output.exists():
+        output.unlink()
+    # Failed items are run again; their new record is appended after the old one
+    try:
+        done = set() if to_stdout else load_config_checkpoint(output, config)
+    except ValueError as e:
+        parser.error(f"{e}. Pass --restart or a new -o to start over.")
+    items = (item for item in iter_items(args.source, batch.inputs[0], suffixes, defaults)
+             if item['id'] not in done)
+
+    print(f"Running {label} over {args.source} -> {args.output} "
+          f"({args.workers} workers, {args.retries} retries, {args.timeout:g} s timeout)", file=sys.stderr)
+    out = sys.stdout if to_stdout else open(output, 'a', encoding='utf-8')
+    try:
+        if not to_stdout and out.tell() > 0:
+            with open(output, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    out.write('\n')  # Terminate a line cut short by a crash
+        for record in batch.run(items, skipped=len(done)):
+            record['config'] = config
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+            if batch.stats.done % 25 == 0:
+                stats = batch.stats.to_dict()
+                print(f"  {batch.stats.done} done ({stats['items_per_s']:.1f}/s, p95 {stats['p95_ms']:.0f} ms)",
+                      file=sys.stderr)
+    finally:
+        if not to_stdout:
+            out.close()
+        if mock is not None:
+            mock.shutdown()
+    print(json.dumps(batch.stats.to_dict()), file=sys.stderr)
+    return 0 if batch.stats.failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
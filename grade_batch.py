@@ -0,0 +1,220 @@
+"""
+Offline bulk grading with TeachingTools
+Streams a class's submissions (a directory of source files or a JSONL file)
+through a configurable pipeline of tool stages in a process pool, writing
+one JSONL result per submission with per-stage timing. The output file
+doubles as the checkpoint: rerunning the same command skips submissions
+that already have a result.
+
+Usage:
+    python grade_batch.py submissions/ -o results.jsonl
+    python grade_batch.py submissions.jsonl -o results.jsonl \\
+        --stages analyze_code,run_code,detect_completion --concept "binary search" -j 8
+
+JSONL input lines look like:
+    {"id": "alice/hw3", "code": "...", "language": "python", "test_input": "...",
+     "response": "...", "concept": "..."}
+Directory inputs pick the language from the file suffix (.py, .c, .cpp, .js).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from autonomous_mentor import TeachingTools
+from executors import language_for_suffix
+
+
+def _stage_analyze_code(submission: dict) -> str:
+    return TeachingTools.analyze_code(submission['code'])
+
+
+def _stage_run_code(submission: dict) -> str:
+    return TeachingTools.run_code(submission['code'], submission.get('test_input', ''),
+                                  submission.get('language', 'python'))
+
+
+def _stage_detect_completion(submission: dict):
+    if not submission.get('response'):
+        return None  # Nothing to evaluate for code-only submissions
+    return TeachingTools.detect_completion(submission['response'], submission.get('concept', ''))
+
+
+# Stage name -> function(submission) -> result (None means skipped)
+STAGES = {
+    'analyze_code': _stage_analyze_code,
+    'run_code': _stage_run_code,
+    'detect_completion': _stage_detect_completion,
+}
+DEFAULT_STAGES = ('analyze_code', 'run_code', 'detect_completion')
+
+# A worker that dies (segfault, OOM kill) takes every in-flight submission
+# with it; each is retried this many times before it is recorded as failed
+MAX_CRASH_RETRIES = 2
+
+
+def iter_submissions(source: Path, defaults: dict):
+    """Yield submissions one at a time from a directory of source files or a JSONL file."""
+    if source.is_dir():
+        for path in sorted(source.rglob('*')):
+            language = language_for_suffix(path.suffix)
+            if language is None or not path.is_file():
+                continue
+            yield dict(defaults, id=path.relative_to(source).as_posix(), language=language,
+                       code=path.read_text(encoding='utf-8', errors='replace'))
+        return
+
+    with open(source, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            record.setdefault('id', f"line-{line_no}")
+            yield dict(defaults, **record)
+
+
+def load_checkpoint(output: Path, require: str = None) -> set:
+    """Ids that already have a result in the output file (with a `require` field, if given)."""
+    done = set()
+    if not output.exists():
+        return done
+    with open(output, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by a crash is simply redone
+            if isinstance(record, dict) and 'id' in record and (require is None or require in record):
+                done.add(record['id'])
+    return done
+
+
+def grade_submission(submission: dict, stage_names: tuple) -> dict:
+    """Run every stage on one submission; a failing stage doesn't stop the others."""
+    started = time.perf_counter()
+    record = {'id': submission['id'], 'stages': {}}
+    for name in stage_names:
+        stage_started = time.perf_counter()
+        try:
+            result = STAGES[name](submission)
+            stage = {'result': result} if result is not None else {'skipped': True}
+        except Exception as e:
+            stage = {'error': f"{type(e).__name__}: {e}"}
+        stage['ms'] = round((time.perf_counter() - stage_started) * 1000, 3)
+        record['stages'][name] = stage
+    record['total_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return record
+
+
+def run_batch(source: Path, output: Path, stage_names: tuple, workers: int, defaults: dict,
+              fsync_every: int = 50) -> dict:
+    """
+    Grade all pending submissions; returns summary counts. A submission whose
+    worker process dies is retried on a fresh pool (up to MAX_CRASH_RETRIES
+    times) and then written as an error record, so one crash doesn't end the
+    batch.
+    """
+    done = load_checkpoint(output)
+    stats = {'skipped': len(done), 'graded': 0, 'errors': 0}
+    started = time.perf_counter()
+    max_in_flight = workers * 4  # Bounded so huge inputs are streamed, not loaded
+    pools = [ProcessPoolExecutor(max_workers=workers)]  # The current pool is pools[-1]
+
+    with open(output, 'a', encoding='utf-8') as out:
+        pending = {}  # future -> (submission, attempt, pool it was submitted to)
+        if out.tell() > 0:
+            with open(output, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    out.write('\n')  # Terminate a line cut short by a crash
+
+        def submit(submission: dict, attempt: int = 0):
+            pending[pools[-1].submit(grade_submission, submission, stage_names)] = (submission, attempt, pools[-1])
+
+        def write(record: dict):
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            stats['graded'] += 1
+            if record.get('error') or any('error' in stage for stage in record['stages'].values()):
+                stats['errors'] += 1
+            if stats['graded'] % fsync_every == 0:
+                out.flush()
+                os.fsync(out.fileno())
+                elapsed = time.perf_counter() - started
+                print(f"  graded {stats['graded']} ({stats['graded'] / elapsed:.1f}/s)", file=sys.stderr)
+
+        def drain():
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                submission, attempt, pool = pending.pop(future)
+                try:
+                    record = future.result()
+                except BrokenProcessPool as e:
+                    if pool is pools[-1]:
+                        pool.shutdown(wait=False)
+                        pools.append(ProcessPoolExecutor(max_workers=workers))
+                    if attempt < MAX_CRASH_RETRIES:
+                        submit(submission, attempt + 1)
+                        continue
+                    record = {'id': submission['id'], 'stages': {},
+                              'error': f"Worker process died: {e or type(e).__name__}"}
+                except Exception as e:
+                    record = {'id': submission['id'], 'stages': {}, 'error': f"{type(e).__name__}: {e}"}
+                write(record)
+
+        try:
+            for submission in iter_submissions(source, defaults):
+                if submission['id'] in done:
+                    continue
+                done.add(submission['id'])
+                submit(submission)
+                if len(pending) >= max_in_flight:
+                    drain()
+
+            while pending:
+                drain()
+        finally:
+            pools[-1].shutdown()
+            out.flush()
+            os.fsync(out.fileno())
+
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade a batch of submissions with TeachingTools.")
+    parser.add_argument('source', type=Path, help="Directory of .py/.c/.cpp/.js files or a JSONL file of submissions")
+    parser.add_argument('-o', '--output', type=Path, default=Path('grading_results.jsonl'),
+                        help="Results JSONL (also the resume checkpoint)")
+    parser.add_argument('--stages', default=','.join(DEFAULT_STAGES),
+                        help=f"Comma-separated stages from: {', '.join(STAGES)}")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--concept', default='', help="Default concept for detect_completion")
+    parser.add_argument('--test-input', default='', help="Default stdin for run_code")
+    parser.add_argument('--restart', action='store_true', help="Ignore existing results and start over")
+    args = parser.parse_args(argv)
+
+    stage_names = tuple(s.strip() for s in args.stages.split(',') if s.strip())
+    unknown = [s for s in stage_names if s not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(unknown)}")
+    if not args.source.exists():
+        parser.error(f"No such file or directory: {args.source}")
+    if args.restart and args.output.exists():
+        args.output.unlink()
+
+    defaults = {'concept': args.concept, 'test_input': args.test_input}
+    print(f"Grading {args.source} -> {args.output} with stages {', '.join(stage_names)} ({args.workers} workers)",
+          file=sys.stderr)
+    stats = run_batch(args.source, args.output, stage_names, args.workers, defaults)
+    print(json.dumps(stats), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
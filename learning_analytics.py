@@ -0,0 +1,380 @@
+"""
+Learning analytics for the Autonomous Teaching Agent
+Keeps an append-only SQLite log of what the tutoring tools decide per
+student: detect_completion outcomes, generate_hint levels and end_session
+summaries. Aggregates are answered from covering indexes, and a small
+`mastery` table records the turns (and hints) each student needed before
+their first UNDERSTOOD on a concept, so medians are index seeks rather
+than scans over a semester of events.
+
+Configuration (environment variables):
+    COMPTUTOR_ANALYTICS_DB        - SQLite file (default analytics.sqlite3 here)
+    COMPTUTOR_ANALYTICS           - set to 0 to stop recording
+    COMPTUTOR_INSTRUCTOR_TOKEN    - bearer token required by /analytics; without it
+                                    /analytics is refused (or localhost-only on the
+                                    single-user backend)
+"""
+import os
+import hmac
+import time
+import ipaddress
+import sqlite3
+import functools
+import threading
+from pathlib import Path
+
+from logging_setup import get_logger
+
+DEFAULT_DB_PATH = Path(__file__).parent / "analytics.sqlite3"
+
+log = get_logger('analytics')
+
+# Event kinds
+COMPLETION = 'completion'
+HINT = 'hint'
+SESSION_END = 'session_end'
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        student_id TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        turn INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        concept TEXT NOT NULL DEFAULT '',
+        outcome TEXT,
+        hint_level INTEGER,
+        detail TEXT
+    )
+    """,
+    # Per-concept aggregates read only the index (kind, concept first)
+    "CREATE INDEX IF NOT EXISTS events_by_concept ON events (kind, concept, ts, outcome, hint_level, student_id)",
+    "CREATE INDEX IF NOT EXISTS events_by_kind_time ON events (kind, ts)",
+    "CREATE INDEX IF NOT EXISTS events_by_student ON events (student_id, ts)",
+    "CREATE INDEX IF NOT EXISTS events_by_session ON events (session_id, concept, turn)",
+    """
+    CREATE TABLE IF NOT EXISTS mastery (
+        session_id TEXT NOT NULL,
+        concept TEXT NOT NULL,
+        student_id TEXT NOT NULL,
+        ts REAL NOT NULL,
+        turns INTEGER NOT NULL,
+        hints INTEGER NOT NULL,
+        PRIMARY KEY (session_id, concept)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS mastery_by_concept ON mastery (concept, turns)",
+)
+
+
+def normalize_concept(concept: str) -> str:
+    """Group 'Binary Search ' and 'binary search' together."""
+    return ' '.join((concept or '').lower().split())
+
+
+def parse_outcome(result: str):
+    """UNDERSTOOD / PARTIAL from a detect_completion result, else None."""
+    head = (result or '').lstrip().split(' ', 1)[0].upper()
+    return head if head in ('UNDERSTOOD', 'PARTIAL') else None
+
+
+class AnalyticsStore:
+    """Append-only event log with indexed aggregate queries."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, read_only: bool = False):
+        self.path = str(path)
+        self.read_only = read_only
+        self._local = threading.local()
+        if not read_only:
+            conn = self._connect()
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.read_only:
+                conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=30, isolation_level=None)
+            else:
+                conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Writes
+
+    def record(self, student_id: str, session_id: str, turn: int, kind: str, concept: str = '',
+               outcome: str = None, hint_level: int = None, detail: str = None, ts: float = None):
+        """Append one event; a first UNDERSTOOD per session and concept also lands in `mastery`."""
+        ts = time.time() if ts is None else ts
+        concept = normalize_concept(concept)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO events (ts, student_id, session_id, turn, kind, concept, outcome, hint_level, detail) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ts, student_id, session_id, turn, kind, concept, outcome, hint_level, detail)
+            )
+            if kind == COMPLETION and outcome == 'UNDERSTOOD' and concept:
+                first_turn, hints = conn.execute(
+                    "SELECT MIN(turn), SUM(kind = ?) FROM events WHERE session_id = ? AND concept = ?",
+                    (HINT, session_id, concept)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR IGNORE INTO mastery (session_id, concept, student_id, ts, turns, hints) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (session_id, concept, student_id, ts, turn - first_turn + 1, hints or 0)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # Aggregates
+
+    def hints_by_concept(self, since: float = 0.0, limit: int = 20) -> list:
+        """Concepts ordered by how many hints were requested."""
+        rows = self._connect().execute(
+            "SELECT concept, COUNT(*), COUNT(DISTINCT student_id), AVG(hint_level), MAX(hint_level) "
+            "FROM events WHERE kind = ? AND ts >= ? GROUP BY concept ORDER BY COUNT(*) DESC LIMIT ?",
+            (HINT, since, limit)
+        ).fetchall()
+        return [
+            {'concept': concept, 'hints': hints, 'students': students,
+             'avg_level': round(avg_level or 0, 2), 'max_level': max_level}
+            for concept, hints, students, avg_level, max_level in rows
+        ]
+
+    def outcomes_by_concept(self, since: float = 0.0) -> list:
+        """UNDERSTOOD / PARTIAL counts per concept."""
+        rows = self._connect().execute(
+            "SELECT concept, SUM(outcome = 'UNDERSTOOD'), SUM(outcome = 'PARTIAL') "
+            "FROM events WHERE kind = ? AND ts >= ? GROUP BY concept ORDER BY concept",
+            (COMPLETION, since)
+        ).fetchall()
+        return [{'concept': concept, 'understood': understood or 0, 'partial': partial or 0}
+                for concept, understood, partial in rows]
+
+    def turns_to_understood(self, concept: str = None) -> list:
+        """Per concept: sessions that reached UNDERSTOOD, and the median / p90 turns and average hints it took."""
+        conn = self._connect()
+        if concept is None:
+            stats = conn.execute(
+                "SELECT concept, COUNT(*), AVG(hints) FROM mastery GROUP BY concept ORDER BY concept"
+            ).fetchall()
+        else:
+            stats = conn.execute(
+                "SELECT concept, COUNT(*), AVG(hints) FROM mastery WHERE concept = ? GROUP BY concept",
+                (normalize_concept(concept),)
+            ).fetchall()
+
+        def turns_at(name: str, offset: int) -> int:
+            # Read from the concept's run of mastery_by_concept, already sorted by turns
+            return conn.execute(
+                "SELECT turns FROM mastery WHERE concept = ? ORDER BY turns LIMIT 1 OFFSET ?", (name, offset)
+            ).fetchone()[0]
+
+        report = []
+        for name, count, avg_hints in stats:
+            if count % 2:
+                median = turns_at(name, count // 2)
+            else:
+                median = (turns_at(name, count // 2 - 1) + turns_at(name, count // 2)) / 2
+            report.append({
+                'concept': name,
+                'sessions': count,
+                'median_turns': median,
+                'p90_turns': turns_at(name, min(count - 1, int(count * 0.9))),
+                'avg_hints': round(avg_hints or 0, 2),
+            })
+        return report
+
+    def student_summary(self, student_id: str) -> list:
+        """One student's hints and outcomes per concept."""
+        rows = self._connect().execute(
+            "SELECT concept, SUM(kind = ?), MAX(hint_level), SUM(outcome = 'UNDERSTOOD'), "
+            "SUM(outcome = 'PARTIAL'), MIN(ts), MAX(ts) "
+            "FROM events WHERE student_id = ? AND kind != ? GROUP BY concept ORDER BY MIN(ts)",
+            (HINT, student_id, SESSION_END)
+        ).fetchall()
+        return [
+            {'concept': concept, 'hints': hints or 0, 'max_hint_level': max_level,
+             'understood': understood or 0, 'partial': partial or 0, 'first_seen': first, 'last_seen': last}
+            for concept, hints, max_level, understood, partial, first, last in rows
+        ]
+
+    def recent_sessions(self, limit: int = 20) -> list:
+        """Latest end_session summaries."""
+        rows = self._connect().execute(
+            "SELECT ts, student_id, session_id, turn, detail FROM events WHERE kind = ? ORDER BY ts DESC LIMIT ?",
+            (SESSION_END, limit)
+        ).fetchall()
+        return [{'ts': ts, 'student_id': student, 'session_id': session_id, 'turns': turn, 'summary': detail}
+                for ts, student, session_id, turn, detail in rows]
+
+
+class SessionRecorder:
+    """
+    Records one tutoring session's tool outcomes; the server advances `turn` per student message.
+
+    Events are buffered for the turn and written by flush(). A discarded
+    attempt (a reply escalated to a bigger model) is undone with
+    to_dict()/restore(), like TutoringState, so it is not counted twice.
+    Concepts go through `resolve_concept` (TutoringState.resolve_concept),
+    so a hint's free-text problem and a check's concept land on the same row.
+    """
+
+    def __init__(self, store, student_id: str, session_id: str, turn: int = 0, resolve_concept=None):
+        self.store = store
+        self.resolve_concept = resolve_concept or normalize_concept
+        self.student_id = student_id
+        self.session_id = session_id
+        self.turn = turn
+        self.concept = ''  # Latest concept seen, for end_session
+        self.ended = False  # Whether end_session has been called
+        self._pending = []  # (ts, turn, kind, fields) not yet written
+
+    def _record(self, kind: str, **fields):
+        if self.store is not None:
+            self._pending.append((time.time(), self.turn, kind, fields))
+
+    def flush(self):
+        """Write the buffered events of the turn."""
+        pending, self._pending = self._pending, []
+        for ts, turn, kind, fields in pending:
+            try:
+                self.store.record(self.student_id, self.session_id, turn, kind, ts=ts, **fields)
+            except sqlite3.Error as e:
+                # Analytics must never break a tutoring turn
+                log.warning("Could not record %s event: %s", kind, e)
+
+    def to_dict(self) -> dict:
+        return {'pending': len(self._pending), 'concept': self.concept, 'ended': self.ended}
+
+    def restore(self, state: dict):
+        """Drop what was recorded since to_dict() returned `state`."""
+        del self._pending[state['pending']:]
+        self.concept = state['concept']
+        self.ended = state['ended']
+
+    def wrap_tools(self, tool_registry: dict) -> dict:
+        """Return a copy of a tool registry whose hint / completion / end tools are recorded."""
+        wrapped = dict(tool_registry)
+        if 'generate_hint' in wrapped:
+            wrapped['generate_hint'] = self._wrap_hint(wrapped['generate_hint'])
+        if 'detect_completion' in wrapped:
+            wrapped['detect_completion'] = self._wrap_completion(wrapped['detect_completion'])
+        if 'end_session' in wrapped:
+            wrapped['end_session'] = self._wrap_end(wrapped['end_session'])
+        return wrapped
+
+    def _wrap_hint(self, generate_hint):
+        @functools.wraps(generate_hint)
+        def wrapper(problem: str, hint_level: int) -> str:
+            result = generate_hint(problem, hint_level)
+            self.concept = self.resolve_concept(problem) or self.concept
+            self._record(HINT, concept=self.concept, hint_level=hint_level)
+            return result
+
+        return wrapper
+
+    def _wrap_completion(self, detect_completion):
+        @functools.wraps(detect_completion)
+        def wrapper(response: str, concept: str) -> str:
+            result = detect_completion(response, concept)
+            self.concept = self.resolve_concept(concept) or self.concept
+            self._record(COMPLETION, concept=self.concept, outcome=parse_outcome(result))
+            return result
+
+        return wrapper
+
+    def _wrap_end(self, end_session):
+        @functools.wraps(end_session)
+        def wrapper(summary: str = "", **kwargs) -> str:
+            result = end_session(summary, **kwargs)
+            self.ended = True
+            self._record(SESSION_END, concept=self.concept, detail=summary)
+            return result
+
+        return wrapper
+
+
+# Reports served by the instructor endpoint: name -> (store, query args) -> rows
+REPORTS = {
+    'hints': lambda store, args: store.hints_by_concept(since=float(args.get('since', 0)),
+                                                       limit=min(int(args.get('limit', 20)), 200)),
+    'outcomes': lambda store, args: store.outcomes_by_concept(since=float(args.get('since', 0))),
+    'mastery': lambda store, args: store.turns_to_understood(args.get('concept')),
+    'student': lambda store, args: store.student_summary(args['student_id']),
+    'sessions': lambda store, args: store.recent_sessions(limit=min(int(args.get('limit', 20)), 200)),
+}
+
+
+def run_report(name: str, args) -> list:
+    """Run a named report on a read-only connection; KeyError/ValueError for missing or bad args."""
+    return REPORTS[name](get_report_store(), args)
+
+
+def instructor_auth_error(headers, remote_addr: str = None, allow_local: bool = False):
+    """
+    Why a request may not read analytics, as (error, HTTP status), or None if it may.
+
+    With COMPTUTOR_INSTRUCTOR_TOKEN set, the request must send it as a bearer
+    token. Without it, analytics are refused, except from localhost when
+    `allow_local` is set (the single-user backend).
+    """
+    token = os.environ.get('COMPTUTOR_INSTRUCTOR_TOKEN')
+    if not token:
+        if allow_local and _is_loopback(remote_addr):
+            return None
+        return "Analytics are disabled: set COMPTUTOR_INSTRUCTOR_TOKEN to enable them", 403
+    supplied = headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8')):
+        return "Instructor token required", 401
+    return None
+
+
+def _is_loopback(remote_addr) -> bool:
+    try:
+        return ipaddress.ip_address(remote_addr or '').is_loopback
+    except ValueError:
+        return False
+
+
+_store = None
+_report_store = None
+_store_lock = threading.Lock()
+
+
+def _db_path() -> str:
+    return os.environ.get('COMPTUTOR_ANALYTICS_DB') or str(DEFAULT_DB_PATH)
+
+
+def get_analytics_store():
+    """Process-wide writable store, or None when recording is disabled or the database can't be opened."""
+    global _store
+    if os.environ.get('COMPTUTOR_ANALYTICS', '1') == '0':
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = AnalyticsStore(_db_path())
+            except sqlite3.Error as e:
+                log.warning("Learning analytics disabled: %s", e)
+                return None
+        return _store
+
+
+def get_report_store() -> AnalyticsStore:
+    """Process-wide read-only store for instructor queries."""
+    global _report_store
+    with _store_lock:
+        if _report_store is None:
+            if not os.path.exists(_db_path()):
+                AnalyticsStore(_db_path())  # Create the schema so reports return empty results
+            _report_store = AnalyticsStore(_db_path(), read_only=True)
+        return _report_store
@@ -0,0 +1,225 @@
+"""
+Logging for the Autonomous Teaching Agent servers
+Configures the standard logging module once per process:
+  - Request threads only put records on a bounded queue. A QueueListener
+    thread writes them to stderr and optionally to a rotating file, so a
+    slow terminal never holds up a chat turn. When the queue is full,
+    records are dropped and counted.
+  - Each record gets the trace id of the current span (see tracing.py).
+    The same id is returned by /chat, so one turn's logs can be found.
+  - DEBUG records are sampled per trace. A sampled turn keeps all of its
+    debug lines; the other turns drop theirs.
+  - Profiles: "development" is the default (text logs, every debug line,
+    Flask debug mode). "production" logs JSON lines at INFO, samples 1% of
+    debug logs and turns Flask debug mode off.
+
+Configuration (environment variables):
+    COMPTUTOR_PROFILE          - development (default) or production
+    COMPTUTOR_LOG_LEVEL        - DEBUG, INFO, WARNING, ... (profile default)
+    COMPTUTOR_LOG_FORMAT       - text or json (profile default)
+    COMPTUTOR_LOG_FILE         - also write to this file, rotated by size
+    COMPTUTOR_LOG_MAX_BYTES    - rotate after this many bytes (default 10 MB)
+    COMPTUTOR_LOG_BACKUPS      - rotated files kept (default 5)
+    COMPTUTOR_DEBUG_SAMPLE     - share of traces whose DEBUG logs are kept (0-1)
+"""
+import os
+import sys
+import copy
+import json
+import zlib
+import queue
+import random
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from tracing import tracer
+
+PROFILES = {
+    'development': {'level': 'DEBUG', 'format': 'text', 'debug_sample': 1.0, 'flask_debug': True},
+    'production': {'level': 'INFO', 'format': 'json', 'debug_sample': 0.01, 'flask_debug': False},
+}
+# Records waiting for the listener; beyond this they are dropped
+QUEUE_SIZE = 10000
+LOGGER_PREFIX = 'comptutor'
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s [%(trace_id)s] %(message)s"
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'trace_id'}
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with extra={...} fields at the top level."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'trace_id': getattr(record, 'trace_id', None),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The standard text format with extra={...} fields appended as key=value."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+def trace_sampled(trace_id: str, rate: float) -> bool:
+    """Whether a trace keeps its DEBUG logs (the same answer for every record of the trace)."""
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    if not trace_id:
+        return random.random() < rate
+    return zlib.crc32(trace_id.encode('ascii')) % 10000 < rate * 10000
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamp records with the current trace id and sample DEBUG records per trace."""
+
+    def __init__(self, debug_sample: float = 1.0):
+        super().__init__()
+        self.debug_sample = debug_sample
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = tracer.current_span()
+        record.trace_id = span.trace_id if span else '-'
+        if record.levelno > logging.DEBUG:
+            return True
+        return trace_sampled(span.trace_id if span else None, self.debug_sample)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """A QueueHandler that never blocks the caller: records are dropped when the queue is full."""
+
+    def __init__(self, maxsize: int = QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like QueueHandler.prepare, but the traceback stays separate from the
+        # message, so the listener's formatter decides how to render it
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingConfig:
+    """The active profile and handlers; created by configure_logging()."""
+
+    def __init__(self, profile: str, level: int, debug_sample: float, flask_debug: bool,
+                 queue_handler: BoundedQueueHandler, listener: QueueListener):
+        self.profile = profile
+        self.level = level
+        self.debug_sample = debug_sample
+        self.flask_debug = flask_debug
+        self.queue_handler = queue_handler
+        self.listener = listener
+        self._stopped = False
+
+    def shutdown(self):
+        """Write out queued records and stop the listener thread (safe to call twice)."""
+        if not self._stopped:
+            self._stopped = True
+            self.listener.stop()
+
+    def stats(self) -> dict:
+        return {
+            'profile': self.profile,
+            'level': logging.getLevelName(self.level),
+            'debug_sample': self.debug_sample,
+            'queued': self.queue_handler.queue.qsize(),
+            'dropped': self.queue_handler.dropped,
+        }
+
+
+def get_logger(name: str) -> logging.Logger:
+    """A logger under the 'comptutor' prefix, e.g. get_logger('backend')."""
+    return logging.getLogger(f"{LOGGER_PREFIX}.{name}")
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def configure_logging(profile: str = None) -> LoggingConfig:
+    """Route the root logger through a bounded queue (once per process; later calls return the same config)."""
+    global _config
+    with _config_lock:
+        if _config is not None:
+            return _config
+
+        profile = profile or os.environ.get('COMPTUTOR_PROFILE', 'development')
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile {profile!r} (expected one of: {', '.join(PROFILES)})")
+        defaults = PROFILES[profile]
+        level = logging.getLevelName(os.environ.get('COMPTUTOR_LOG_LEVEL', defaults['level']).upper())
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level {os.environ['COMPTUTOR_LOG_LEVEL']!r}")
+        debug_sample = float(os.environ.get('COMPTUTOR_DEBUG_SAMPLE', defaults['debug_sample']))
+        if os.environ.get('COMPTUTOR_LOG_FORMAT', defaults['format']) == 'json':
+            formatter = JsonFormatter()
+        else:
+            formatter = TextFormatter(TEXT_FORMAT)
+
+        handlers = [logging.StreamHandler(sys.stderr)]
+        log_file = os.environ.get('COMPTUTOR_LOG_FILE')
+        if log_file:
+            handlers.append(RotatingFileHandler(
+                log_file,
+                maxBytes=int(os.environ.get('COMPTUTOR_LOG_MAX_BYTES', 10 * 1024 * 1024)),
+                backupCount=int(os.environ.get('COMPTUTOR_LOG_BACKUPS', 5)),
+                encoding='utf-8',
+            ))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        # Filters on the queue handler run in the thread that logs, where the current span is
+        queue_handler = BoundedQueueHandler()
+        queue_handler.addFilter(CorrelationFilter(debug_sample))
+        listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        # DEBUG is for our own loggers; libraries (HTTP clients, wayflowcore) stay at INFO
+        root.setLevel(max(level, logging.INFO))
+        logging.getLogger(LOGGER_PREFIX).setLevel(level)
+        # Werkzeug logs a line per request at INFO; keep those out of the production logs
+        if profile == 'production':
+            logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+        _config = LoggingConfig(profile, level, debug_sample, defaults['flask_debug'], queue_handler, listener)
+        atexit.register(_config.shutdown)
+        return _config
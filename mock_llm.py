@@ -0,0 +1,241 @@
+"""
+Mock OpenAI-compatible LLM server for local testing
+Answers /v1/chat/completions with canned tutoring replies, so the servers,
+model tiering (model_routing.py) and batch runs can be exercised without an
+API key. Replies are deterministic per request; per-model latency and a
+hedge rate (replies that trigger tier escalation) are configurable.
+Requests offering tools get a tool call when the student shared code.
+Structured-output requests get an object with every schema field, whether
+the schema comes as a JSON response_format or is written into the prompt
+(wayflowcore's LlmNode sends no response_format to OpenAI-compatible models).
+
+Usage:
+    python mock_llm.py [--port 8009] [--latency 8B=0.05,70B=0.4] [--hedge 8B=0.2]
+    COMPTUTOR_LLM_URL=http://localhost:8009/v1 python web_app.py
+
+GET /stats returns request counts per model.
+"""
+import re
+import sys
+import json
+import time
+import zlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLIES = (
+    "Nice start! Before we change anything, what do you expect this function to return for an empty list?",
+    "Good question. Walk me through what happens to `left` and `right` on each iteration - when does the loop stop?",
+    "You're close. Which line decides which half to keep, and is that comparison the right way round?",
+    "Great job, that's exactly it! You explained why the search space halves each time.",
+)
+HEDGE_REPLY = "I'm not sure about that one."
+CODE_PATTERN = re.compile(r"```|\[Current file:|^\s*def ", re.M)
+
+
+def _parse_rates(spec: str) -> list:
+    """'8B=0.05,70B=0.4' -> [('8B', 0.05), ('70B', 0.4)] (matched as model id substrings)."""
+    rates = []
+    for part in filter(None, (p.strip() for p in (spec or '').split(','))):
+        key, _, value = part.partition('=')
+        rates.append((key, float(value)))
+    return rates
+
+
+def _rate_for(rates: list, model: str) -> float:
+    return next((value for key, value in rates if key in model), 0.0)
+
+
+def _text(content) -> str:
+    if isinstance(content, list):
+        return ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+    return content or ''
+
+
+def _schema_object(schema: dict) -> dict:
+    """A value for every property of a JSON schema."""
+    values = {}
+    for name, prop in (schema.get('properties') or {}).items():
+        kind = prop.get('type')
+        if kind in ('integer', 'number'):
+            values[name] = 1
+        elif kind == 'boolean':
+            values[name] = True
+        elif kind == 'array':
+            values[name] = []
+        elif kind == 'object':
+            values[name] = _schema_object(prop)
+        else:
+            values[name] = f"mock {name}"
+    return values
+
+
+def _prompt_schema(messages) -> dict:
+    """A JSON schema (an object with 'properties') written into one of the messages, or None."""
+    decoder = json.JSONDecoder()
+    for message in messages:
+        text = _text(message.get('content'))
+        for match in re.finditer(r'"properties"\s*:', text):
+            # Try the nearest few opening braces before the key
+            start = match.start()
+            for _ in range(10):
+                start = text.rfind('{', 0, start)
+                if start < 0:
+                    break
+                try:
+                    value, _ = decoder.raw_decode(text, start)
+                except ValueError:
+                    continue
+                if isinstance(value, dict) and isinstance(value.get('properties'), dict):
+                    return value
+    return None
+
+
+class MockLLM:
+    """Builds completions; shared by all handler threads."""
+
+    def __init__(self, latency: list = (), hedge: list = ()):
+        self.latency = list(latency)
+        self.hedge = list(hedge)
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def complete(self, body: dict) -> dict:
+        model = body.get('model', 'mock')
+        with self._lock:
+            self.counts[model] = self.counts.get(model, 0) + 1
+        delay = _rate_for(self.latency, model)
+        if delay:
+            time.sleep(delay)
+
+        messages = body.get('messages') or []
+        last = messages[-1] if messages else {}
+        last_user = next((_text(m.get('content')) for m in reversed(messages) if m.get('role') == 'user'), '')
+        # Deterministic per conversation state, so reruns reproduce
+        seed = zlib.crc32(f"{model}|{len(messages)}|{last_user}".encode('utf-8'))
+
+        message = {'role': 'assistant', 'content': None}
+        tools = [t.get('function', {}).get('name') for t in body.get('tools') or []]
+        response_format = body.get('response_format') or {}
+        prompt_schema = None if tools or response_format else _prompt_schema(messages)
+        if response_format.get('type') == 'json_schema':
+            schema = response_format.get('json_schema', {}).get('schema', {})
+            message['content'] = json.dumps(_schema_object(schema))
+        elif prompt_schema is not None:
+            message['content'] = json.dumps(_schema_object(prompt_schema))
+        elif last.get('role') == 'user' and 'analyze_code' in tools and CODE_PATTERN.search(last_user):
+            message['tool_calls'] = [{
+                'id': f"call_{seed:08x}",
+                'type': 'function',
+                'function': {'name': 'analyze_code', 'arguments': json.dumps({'code': last_user})},
+            }]
+        elif (seed % 1000) / 1000 < _rate_for(self.hedge, model):
+            message['content'] = HEDGE_REPLY
+        else:
+            message['content'] = REPLIES[seed % len(REPLIES)]
+
+        prompt_tokens = sum(len(_text(m.get('content'))) for m in messages) // 4
+        completion_tokens = len(message['content'] or '') // 4 + 1
+        return {
+            'id': f"chatcmpl-{seed:08x}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': message,
+                'finish_reason': 'tool_calls' if message.get('tool_calls') else 'stop',
+            }],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens},
+        }
+
+
+def make_handler(llm: MockLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload: dict, status: int = 200):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip('/').endswith('/models'):
+                self._send_json({'object': 'list', 'data': [{'id': model, 'object': 'model'} for model in llm.counts]})
+            elif self.path.rstrip('/') == '/stats':
+                self._send_json({'requests': dict(llm.counts)})
+            else:
+                self._send_json({'error': 'not found'}, 404)
+
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._send_json({'error': {'message': f"Unknown endpoint {self.path}"}}, 404)
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            except ValueError as e:
+                self._send_json({'error': {'message': f"Invalid JSON: {e}"}}, 400)
+                return
+            completion = llm.complete(body)
+            if not body.get('stream'):
+                self._send_json(completion)
+                return
+
+            # Server-sent events, one chunk with the whole message
+            choice = completion['choices'][0]
+            delta = {key: value for key, value in choice['message'].items() if value is not None}
+            for index, call in enumerate(delta.get('tool_calls', [])):
+                call['index'] = index
+            chunks = [
+                dict(completion, object='chat.completion.chunk',
+                     choices=[{'index': 0, 'delta': delta, 'finish_reason': None}]),
+                dict(completion, object='chat.completion.chunk',
+                     choices=[{'index': 0, 'delta': {}, 'finish_reason': choice['finish_reason']}]),
+            ]
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            for chunk in chunks:
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return Handler
+
+
+def serve(port: int = 8009, latency: list = (), hedge: list = ()) -> ThreadingHTTPServer:
+    """Start the mock in a background thread and return the server (call shutdown() to stop)."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(MockLLM(latency, hedge)))
+    threading.Thread(target=server.serve_forever, name='mock-llm', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server.")
+    parser.add_argument('--port', type=int, default=8009)
+    parser.add_argument('--latency', default='', help="Seconds per reply by model id substring, e.g. 8B=0.05,70B=0.4")
+    parser.add_argument('--hedge', default='', help="Share of unsure replies by model id substring, e.g. 8B=0.2")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port),
+                                 make_handler(MockLLM(_parse_rates(args.latency), _parse_rates(args.hedge))))
+    print(f"Mock LLM listening on http://localhost:{args.port}/v1", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+Model tiering for the Autonomous Teaching Agent
+Sends each student turn to the cheapest adequate LLM tier: turns are scored
+for complexity (code or errors present, reasoning questions, conversation
+stage), routed to the largest tier whose min_score the score reaches (so
+easy turns stay on small models), and replayed on the next tier up when
+the reply looks unreliable (empty, hedged, too short, repeated) or the
+call fails. A conversation moves between tiers by replaying
+its messages into the other tier's agent (see conversation_snapshot.py).
+Per-tier latency shows up in /metrics as `llm.tier.<name>` spans; calls,
+escalations, estimated tokens and cost are in ModelRouter.stats().
+
+Configuration (environment variables):
+    COMPTUTOR_MODEL_TIERS   - JSON file with a list of tiers, smallest first
+                              (same fields as DEFAULT_TIERS)
+    COMPTUTOR_LLM_URL       - send every tier to this OpenAI-compatible URL,
+                              e.g. http://localhost:8009/v1 for mock_llm.py
+    COMPTUTOR_ROUTING       - set to 0 to always use the largest tier
+"""
+import os
+import re
+import json
+import time
+import threading
+
+from tracing import tracer, estimate_tokens
+from conversation_snapshot import snapshot_messages, restore_conversation
+
+# Smallest first; a tier takes turns scoring at least its min_score.
+# Prices are USD per million tokens (Together, input/output).
+DEFAULT_TIERS = [
+    {
+        'name': 'fast',
+        'model_id': 'meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo',
+        'url': 'https://api.together.xyz/v1',
+        'max_tokens': 384,
+        'min_score': 0,
+        'usd_per_mtok_in': 0.18,
+        'usd_per_mtok_out': 0.18,
+    },
+    {
+        'name': 'large',
+        'model_id': 'meta-llama/Meta-Llama-3.1-70B-Instruct-Turbo',
+        'url': 'https://api.together.xyz/v1',
+        'max_tokens': 1024,
+        'min_score': 2,
+        'usd_per_mtok_in': 0.88,
+        'usd_per_mtok_out': 0.88,
+    },
+]
+
+CODE_PATTERN = re.compile(
+    r"```|\[Current file:|^\s*(def |class |for .+:|while .+:|#include|int main|function |public static )", re.M
+)
+ERROR_PATTERN = re.compile(
+    r"Traceback|\w+(Error|Exception)\b|segmentation fault|\berror\b|doesn'?t work|wrong output", re.I
+)
+REASONING_PATTERN = re.compile(
+    r"\b(why|how does|how do|explain|complexity|big.?o|prove|difference|optimi[sz]e|efficient|recursi\w*|edge case)\b",
+    re.I
+)
+HEDGES = ("i'm not sure", "i am not sure", "i don't know", "i do not know", "i can't help", "i cannot help",
+          "unable to help", "as an ai")
+
+
+class ModelTier:
+    """One LLM endpoint the router can use."""
+
+    def __init__(self, name: str, model_id: str, url: str, max_tokens: int = 1024, min_score: int = 0,
+                 usd_per_mtok_in: float = 0.0, usd_per_mtok_out: float = 0.0, temperature: float = 0.7,
+                 top_p: float = 0.95):
+        self.name = name
+        self.model_id = model_id
+        self.url = url
+        self.max_tokens = max_tokens
+        self.min_score = min_score
+        self.usd_per_mtok_in = usd_per_mtok_in
+        self.usd_per_mtok_out = usd_per_mtok_out
+        self.temperature = temperature
+        self.top_p = top_p
+
+    def llm_config(self):
+        """The pyagentspec config for this tier."""
+        from pyagentspec.llms import OpenAiCompatibleConfig
+        from pyagentspec.llms.llmgenerationconfig import LlmGenerationConfig
+
+        return OpenAiCompatibleConfig(
+            name=f"{self.name} tier",
+            model_id=self.model_id,
+            url=self.url,
+            default_generation_parameters=LlmGenerationConfig(
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                top_p=self.top_p,
+            )
+        )
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.usd_per_mtok_in + completion_tokens * self.usd_per_mtok_out) / 1e6
+
+
+def load_tiers() -> list:
+    """Tiers from $COMPTUTOR_MODEL_TIERS (or DEFAULT_TIERS), smallest first, with $COMPTUTOR_LLM_URL applied."""
+    path = os.environ.get('COMPTUTOR_MODEL_TIERS')
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            specs = json.load(f)
+    else:
+        specs = DEFAULT_TIERS
+    url = os.environ.get('COMPTUTOR_LLM_URL')
+    tiers = [ModelTier(**dict(spec, **({'url': url} if url else {}))) for spec in specs]
+    if not tiers:
+        raise ValueError("At least one model tier is required")
+    return sorted(tiers, key=lambda tier: tier.min_score)
+
+
+def classify_turn(message: str, phase: str = None, turn: int = 0) -> tuple:
+    """Complexity score of a student turn and the reasons behind it."""
+    score, reasons = 0, []
+    if CODE_PATTERN.search(message):
+        score += 2
+        reasons.append('code')
+    if ERROR_PATTERN.search(message):
+        score += 2
+        reasons.append('error')
+    if REASONING_PATTERN.search(message):
+        score += 1
+        reasons.append('reasoning')
+    if len(message) > 600:
+        score += 1
+        reasons.append('long')
+    if turn <= 1:
+        # Opening questions set up the whole session
+        score += 1
+        reasons.append('first turn')
+    elif phase == 'understood':
+        # Celebrating and closing need no heavy model
+        score -= 2
+        reasons.append('wrap-up')
+    return score, reasons
+
+
+def _message_kind(message) -> str:
+    return str(getattr(message, 'message_type', '')).upper()
+
+
+def _reply_text(messages) -> str:
+    """The agent's final text in a list of new messages."""
+    for message in reversed(messages):
+        if 'AGENT' in _message_kind(message) and not getattr(message, 'tool_requests', None):
+            return str(getattr(message, 'content', '') or '')
+    return ''
+
+
+def low_confidence(new_messages, history, score: int):
+    """Why a tier's reply should be retried one tier up, or None if it looks fine."""
+    reply = _reply_text(new_messages).strip()
+    if not reply:
+        return 'empty reply'
+    lower = reply.lower()
+    if any(hedge in lower for hedge in HEDGES):
+        return 'hedged reply'
+    used_tools = any(getattr(m, 'tool_requests', None) for m in new_messages)
+    # A short Socratic question back ("What have you tried?") is a fine reply
+    if score >= 1 and len(reply) < 40 and not used_tools and not reply.endswith('?'):
+        return 'too short for the question'
+    if reply == _reply_text(history).strip():
+        return 'repeated the previous reply'
+    return None
+
+
+class _TierStats:
+    __slots__ = ('calls', 'errors', 'escalated', 'total_ms', 'prompt_tokens', 'completion_tokens', 'usd')
+
+    def __init__(self):
+        self.calls = self.errors = self.escalated = 0
+        self.total_ms = 0.0
+        self.prompt_tokens = self.completion_tokens = 0
+        self.usd = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'escalated': self.escalated,
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'usd': round(self.usd, 6),
+        }
+
+
+class ModelRouter:
+    """Routing policy and per-tier accounting, shared by every conversation in the process."""
+
+    def __init__(self, tiers: list = None, enabled: bool = True):
+        self.tiers = tiers or load_tiers()
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {tier.name: _TierStats() for tier in self.tiers}
+
+    @classmethod
+    def from_env(cls):
+        return cls(load_tiers(), enabled=os.environ.get('COMPTUTOR_ROUTING', '1') != '0')
+
+    @property
+    def top(self) -> int:
+        return len(self.tiers) - 1
+
+    def route(self, score: int) -> int:
+        """Index of the largest tier whose min_score this score reaches (0 if none does)."""
+        if not self.enabled:
+            return self.top
+        eligible = [i for i, tier in enumerate(self.tiers) if tier.min_score <= score]
+        return eligible[-1] if eligible else 0
+
+    def record(self, tier: int, duration_ms: float, prompt_tokens: int, completion_tokens: int,
+               escalated: bool = False, error: bool = False):
+        with self._lock:
+            stats = self._stats[self.tiers[tier].name]
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.escalated += int(escalated)
+            stats.total_ms += duration_ms
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.usd += self.tiers[tier].cost(prompt_tokens, completion_tokens)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'tiers': {tier.name: dict(self._stats[tier.name].to_dict(), model_id=tier.model_id)
+                          for tier in self.tiers},
+            }
+
+
+class RoutedConversation:
+    """
+    A conversation that runs each turn on the tier the router picks.
+    `load_agent(tier)` builds the executable agent for a ModelTier; agents are
+    built on first use and kept.
+    """
+
+    def __init__(self, router: ModelRouter, load_agent, tier: int = 0):
+        self.router = router
+        self._load_agent = load_agent
+        self._agents = {}
+        self.tier = tier
+        self.conversation = self._agent(tier).start_conversation()
+
+    def _agent(self, tier: int):
+        agent = self._agents.get(tier)
+        if agent is None:
+            agent = self._agents[tier] = self._load_agent(self.router.tiers[tier])
+        return agent
+
+    @property
+    def tier_name(self) -> str:
+        return self.router.tiers[self.tier].name
+
+    def switch(self, tier: int, messages=None):
+        """Continue on another tier with the messages so far (or just `messages`)."""
+        if messages is None:
+            messages = self.conversation.get_messages()
+        conversation = self._agent(tier).start_conversation()
+        restore_conversation(conversation, snapshot_messages(messages))
+        self.conversation, self.tier = conversation, tier
+
+    def execute(self, user_message: str, route_on: str = None, phase: str = None, turn: int = 0,
+                rollback=()) -> dict:
+        """
+        Append a student message and run the turn, escalating as needed.
+        The turn is classified on `route_on` (default: the message itself),
+        e.g. what the student typed without attached files or headers.
+        Objects in `rollback` (with to_dict()/restore()) are reset when an
+        attempt is discarded, so tool state isn't advanced twice and analytics
+        events aren't recorded twice (see SessionRecorder).
+        Returns the routing decision for logging.
+        """
+        score, reasons = classify_turn(user_message if route_on is None else route_on, phase, turn)
+        tier = self.router.route(score)
+        # The first-turn bonus buys a bigger model, not a longer answer: a short
+        # opener on turn one is not a reason to escalate
+        detail_score = score - 1 if 'first turn' in reasons else score
+        history = list(self.conversation.get_messages())
+        saved = [(obj, obj.to_dict()) for obj in rollback]
+        escalations = []
+        while True:
+            if tier != self.tier or escalations:
+                self.switch(tier, history)
+            self.conversation.append_user_message(user_message)
+            name = self.router.tiers[tier].name
+            started = time.perf_counter()
+            error = None
+            try:
+                with tracer.span(f"llm.tier.{name}", tier=name, score=score):
+                    self.conversation.execute()
+            except Exception as e:
+                if tier >= self.router.top or not self.router.enabled:
+                    self.router.record(tier, (time.perf_counter() - started) * 1000, 0, 0, error=True)
+                    raise
+                error = f"{type(e).__name__}: {e}"
+            duration_ms = (time.perf_counter() - started) * 1000
+
+            new_messages = list(self.conversation.get_messages())[len(history):]
+            reason = error or low_confidence(new_messages, history, detail_score)
+            escalate = reason is not None and tier < self.router.top and self.router.enabled
+            prompt_text = ''.join(str(getattr(m, 'content', '') or '') for m in history) + user_message
+            completion_text = ''.join(str(getattr(m, 'content', '') or '') for m in new_messages[1:])
+            self.router.record(tier, duration_ms, estimate_tokens(prompt_text), estimate_tokens(completion_text),
+                               escalated=escalate, error=error is not None)
+            if not escalate:
+                return {'tier': name, 'score': score, 'reasons': reasons, 'escalations': escalations}
+
+            escalations.append({'from': name, 'reason': reason})
+            for obj, state in saved:
+                obj.restore(state)
+            tier += 1
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Process-wide router configured from the environment."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter.from_env()
+        return _router
@@ -0,0 +1,54 @@
+"""
+Cursor-based pagination for message histories
+Cursors are message indexes: `since` returns messages at or after an index
+(polling for new ones), `before` returns the page just older than an index
+(scrolling back), and with neither the newest page is returned.
+"""
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_page_args(args) -> dict:
+    """Read since/before/limit from request args (a dict-like), clamping bad values."""
+    def int_arg(name):
+        value = args.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return max(int(value), 0)
+        except (TypeError, ValueError):
+            return None
+
+    limit = int_arg('limit') or DEFAULT_PAGE_SIZE
+    return {
+        'since': int_arg('since'),
+        'before': int_arg('before'),
+        'limit': min(limit, MAX_PAGE_SIZE),
+    }
+
+
+def paginate(items: list, since: int = None, before: int = None, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+    """
+    Slice `items` by cursor. Each returned item is a copy with its 'index'.
+
+    Returns the page plus cursors: pass `next_cursor` as `since` to get newer
+    messages, and `first_index` as `before` to get older ones.
+    """
+    total = len(items)
+    if since is not None:
+        start = min(since, total)
+        end = min(start + limit, total)
+    else:
+        end = min(before, total) if before is not None else total
+        start = max(end - limit, 0)
+
+    page = [dict(item, index=i) for i, item in enumerate(items[start:end], start=start)]
+    return {
+        'messages': page,
+        'total': total,
+        'first_index': start,
+        'next_cursor': end,
+        'has_older': start > 0,
+        'has_newer': end < total,
+    }
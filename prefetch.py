@@ -0,0 +1,163 @@
+"""
+Background prefetch of tool results for the Autonomous Teaching Agent
+The extension posts the active file on save / editor change; the analysis
+(and optionally a dry run) is computed in a worker thread and cached so
+that the agent's first analyze_code call is a cache hit.
+"""
+import hashlib
+import inspect
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def normalize_code(code: str) -> str:
+    """
+    Normalize whitespace so the LLM re-quoting the file still hits the cache.
+    Only trailing whitespace and surrounding blank lines go: leading
+    indentation changes how the code parses, so it stays part of the key.
+    """
+    return '\n'.join(line.rstrip() for line in (code or '').splitlines()).strip('\n')
+
+
+def cache_key(tool_name: str, *args) -> str:
+    digest = hashlib.sha256()
+    digest.update(tool_name.encode('utf-8'))
+    for arg in args:
+        digest.update(b'\0')
+        digest.update(str(arg).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ToolResultCache:
+    """Thread-safe LRU cache of tool results with a per-entry time-to-live."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value, ttl_seconds: float = None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl_seconds or self.ttl_seconds), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: str):
+        """Like get(), but removes the entry so it is served only once."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class Prefetcher:
+    """Computes tool results ahead of time and serves them to the agent's tool calls."""
+
+    # Executions can depend on time/randomness, so dry runs expire quickly
+    RUN_TTL_SECONDS = 60.0
+    # Tools whose output can change between calls: a prefetched result
+    # answers one call, and the tool's own calls are never cached
+    ONE_SHOT_TOOLS = frozenset({'run_code'})
+
+    def __init__(self, cache: ToolResultCache = None, max_workers: int = 2):
+        self.cache = cache or ToolResultCache()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self._in_flight = {}   # key -> Future
+        self._lock = threading.Lock()
+
+    def _ttl_for(self, tool_name: str):
+        return self.RUN_TTL_SECONDS if tool_name == 'run_code' else None
+
+    @staticmethod
+    def _key(tool_name: str, func, args, kwargs) -> str:
+        """Cache key from the bound call arguments, so positional and keyword calls match."""
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        values = dict(bound.arguments)
+        values.pop('kwargs', None)
+        if 'code' in values:
+            values['code'] = normalize_code(values['code'])
+        return cache_key(tool_name, *(f"{name}={value}" for name, value in values.items()))
+
+    def _compute(self, key: str, tool_name: str, func, kwargs):
+        try:
+            result = func(**kwargs)
+        except BaseException:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            raise
+        # Published and un-marked together, so a caller sees one or the other
+        with self._lock:
+            self.cache.put(key, result, self._ttl_for(tool_name))
+            self._in_flight.pop(key, None)
+        return result
+
+    def schedule(self, tool_name: str, func, **kwargs) -> str:
+        """Queue func(**kwargs) in the background unless it is cached or already running."""
+        key = self._key(tool_name, func, (), kwargs)
+        if self.cache.get(key) is not None:
+            return 'cached'
+        with self._lock:
+            if key in self._in_flight:
+                return 'in_flight'
+            self._in_flight[key] = self._executor.submit(self._compute, key, tool_name, func, kwargs)
+        return 'scheduled'
+
+    def cached_tool(self, tool_name: str, func):
+        """
+        Wrap a tool so calls are served from the cache, or wait on a prefetch
+        that is already running for the same input, before computing directly.
+        For ONE_SHOT_TOOLS only a prefetched result is used, and only once, so
+        re-running a program really runs it again.
+        """
+        one_shot = tool_name in self.ONE_SHOT_TOOLS
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = self._key(tool_name, func, args, kwargs)
+            with self._lock:
+                future = self._in_flight.get(key)
+                if future is None:
+                    result = self.cache.pop(key) if one_shot else self.cache.get(key)
+                    if result is not None:
+                        return result
+            if future is not None:
+                result = future.result()
+                if not one_shot:
+                    return result
+                # Claim the prefetched run; if another caller got it first, run again
+                result = self.cache.pop(key)
+                if result is not None:
+                    return result
+            result = func(*args, **kwargs)
+            if not one_shot:
+                self.cache.put(key, result, self._ttl_for(tool_name))
+            return result
+
+        return wrapper
@@ -0,0 +1,236 @@
+"""
+Shared session-state storage for the Autonomous Teaching Agent
+Lets any server worker resume any student's session: the serialized agent
+session (web history + conversation) lives in SQLite or Redis instead of
+one process's memory.
+
+Configuration (environment variables):
+    COMPTUTOR_SESSION_STORE   - sqlite:///path/to/sessions.sqlite3 (default)
+                                or redis://host:6379/0
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_SQLITE_PATH = Path(__file__).parent / "sessions.sqlite3"
+
+
+class SessionLockTimeout(Exception):
+    """Raised when another worker holds a session's lock for too long."""
+
+
+class SessionStore:
+    """Interface for session-state backends. States are JSON-serializable dicts."""
+
+    # Locks expire so a crashed worker cannot block a session forever
+    LOCK_TTL_SECONDS = 120.0
+
+    def load(self, session_id: str):
+        """Return the stored state dict, or None."""
+        raise NotImplementedError
+
+    def version(self, session_id: str) -> int:
+        """Return the stored state's version (0 if missing) without deserializing it."""
+        raise NotImplementedError
+
+    def save(self, session_id: str, state: dict) -> int:
+        """Store a new state and return its version number."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+    def _try_acquire(self, session_id: str, token: str) -> bool:
+        raise NotImplementedError
+
+    def _release(self, session_id: str, token: str):
+        raise NotImplementedError
+
+    @contextmanager
+    def lock(self, session_id: str, timeout: float = 60.0, poll_interval: float = 0.05):
+        """Serialize turns of one session across workers."""
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while not self._try_acquire(session_id, token):
+            if time.monotonic() >= deadline:
+                raise SessionLockTimeout(f"Session {session_id} is busy")
+            time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            self._release(session_id, token)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session store in a local SQLite file (shared by all workers on one host)."""
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self.path = str(path)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS session_locks (
+                    session_id TEXT PRIMARY KEY,
+                    token TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str):
+        row = self._connect().execute(
+            "SELECT version, state FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        state = json.loads(row[1])
+        state['version'] = row[0]
+        return state
+
+    def version(self, session_id: str) -> int:
+        row = self._connect().execute(
+            "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def save(self, session_id: str, state: dict) -> int:
+        payload = json.dumps({k: v for k, v in state.items() if k != 'version'}, ensure_ascii=False)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT version FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            version = (row[0] if row else 0) + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, version, state, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, version, payload, time.time())
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+
+    def delete(self, session_id: str):
+        self._connect().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _try_acquire(self, session_id: str, token: str) -> bool:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM session_locks WHERE session_id = ? AND expires_at < ?", (session_id, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO session_locks (session_id, token, expires_at) VALUES (?, ?, ?)",
+                (session_id, token, now + self.LOCK_TTL_SECONDS)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def _release(self, session_id: str, token: str):
+        self._connect().execute(
+            "DELETE FROM session_locks WHERE session_id = ? AND token = ?", (session_id, token)
+        )
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store in Redis (shared by workers on any host).
+
+    Works with any client exposing get/set/delete/incr/pipeline (redis-py,
+    or fakeredis.FakeRedis() as a local stand-in for testing).
+    """
+
+    # Compare-and-delete so a worker only releases its own lock
+    _RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+    def __init__(self, client=None, url: str = None, prefix: str = 'comptutor:session:',
+                 ttl_seconds: int = 7 * 24 * 3600):
+        if client is None:
+            import redis  # Optional dependency, only needed for this backend
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, session_id: str, kind: str) -> str:
+        return f"{self.prefix}{session_id}:{kind}"
+
+    def load(self, session_id: str):
+        pipe = self.client.pipeline()
+        pipe.get(self._key(session_id, 'state'))
+        pipe.get(self._key(session_id, 'version'))
+        payload, version = pipe.execute()
+        if payload is None:
+            return None
+        state = json.loads(payload)
+        state['version'] = int(version or 0)
+        return state
+
+    def version(self, session_id: str) -> int:
+        version = self.client.get(self._key(session_id, 'version'))
+        return int(version) if version else 0
+
+    def save(self, session_id: str, state: dict) -> int:
+        payload = json.dumps({k: v for k, v in state.items() if k != 'version'}, ensure_ascii=False)
+        pipe = self.client.pipeline()
+        pipe.set(self._key(session_id, 'state'), payload, ex=self.ttl_seconds)
+        pipe.incr(self._key(session_id, 'version'))
+        pipe.expire(self._key(session_id, 'version'), self.ttl_seconds)
+        _, version, _ = pipe.execute()
+        return int(version)
+
+    def delete(self, session_id: str):
+        self.client.delete(self._key(session_id, 'state'), self._key(session_id, 'version'))
+
+    def _try_acquire(self, session_id: str, token: str) -> bool:
+        return bool(self.client.set(
+            self._key(session_id, 'lock'), token, nx=True, px=int(self.LOCK_TTL_SECONDS * 1000)
+        ))
+
+    def _release(self, session_id: str, token: str):
+        try:
+            self.client.eval(self._RELEASE_SCRIPT, 1, self._key(session_id, 'lock'), token)
+        except Exception:
+            # Stand-ins without Lua support: non-atomic compare-and-delete
+            current = self.client.get(self._key(session_id, 'lock'))
+            if current is not None and (current.decode() if isinstance(current, bytes) else current) == token:
+                self.client.delete(self._key(session_id, 'lock'))
+
+
+def create_session_store(url: str = None) -> SessionStore:
+    """Build a store from a URL (sqlite:///path or redis://...), defaulting to $COMPTUTOR_SESSION_STORE."""
+    url = url or os.environ.get('COMPTUTOR_SESSION_STORE') or f"sqlite:///{DEFAULT_SQLITE_PATH}"
+    if url.startswith('sqlite:///'):
+        return SQLiteSessionStore(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisSessionStore(url=url)
+    raise ValueError(f"Unsupported session store URL: {url}")
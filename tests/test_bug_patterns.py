@@ -0,0 +1,54 @@
+"""
+Tests for bug_patterns.py: each built-in rule fires on the mistake it
+describes and stays quiet on the corrected code.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import ast
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bug_patterns import DEFAULT_RULES, RuleError, RuleSet, find_bugs
+
+
+def rule_ids(code: str) -> list:
+    return [(finding.rule_id, finding.line) for finding in find_bugs(code)]
+
+
+@pytest.mark.parametrize('code, expected', [
+    ("def middle(a):\n    return a[len(a) / 2]\n", ('float-index-division', 2)),
+    ("for i in range(len(a)):\n    print(a[i + 1])\n", ('off-by-one-bound', 2)),
+    ("for x in xs:\n    xs.remove(x)\n", ('mutate-while-iterating', 2)),
+    ("def countdown(n):\n    return countdown(n - 1)\n", ('missing-base-case', 1)),
+    ("list = [1, 2]\n", ('shadowed-builtin', 1)),
+])
+def test_rule_fires(code, expected):
+    assert rule_ids(code) == [expected]
+
+
+@pytest.mark.parametrize('code', [
+    "def middle(a):\n    return a[len(a) // 2]\n",
+    "for i in range(len(a) - 1):\n    print(a[i + 1])\n",
+    "for x in xs[:]:\n    xs.remove(x)\n",
+    "def fact(n):\n    if n == 0:\n        return 1\n    return n * fact(n - 1)\n",
+    # A method named after a builtin doesn't hide it
+    "class Report:\n    def print(self):\n        pass\n",
+])
+def test_correct_code_has_no_findings(code):
+    assert rule_ids(code) == []
+
+
+def test_invalid_python_has_no_findings():
+    assert find_bugs("def broken(:\n") == ()
+
+
+def test_rules_can_be_disabled_and_rejected():
+    ruleset = RuleSet.merged([{'id': 'shadowed-builtin', 'enabled': False}])
+    assert ruleset.check(ast.parse("list = [1]\n")) == []
+    with pytest.raises(RuleError):
+        RuleSet([dict(DEFAULT_RULES[0], check='no_such_predicate')])
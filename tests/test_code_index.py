@@ -0,0 +1,60 @@
+"""
+Tests for code_index.py: what update_file (used by /prefetch and /index)
+lets into the index.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from code_index import WorkspaceIndex
+
+
+def make_index(tmp_path, **kwargs):
+    (tmp_path / 'main.py').write_text("def solve():\n    return helper()\n", encoding='utf-8')
+    index = WorkspaceIndex(tmp_path, refresh_interval=3600, **kwargs)
+    index.refresh(force=True)
+    return index
+
+
+def test_update_file_indexes_python(tmp_path):
+    index = make_index(tmp_path)
+    (tmp_path / 'extra.py').write_text("def extra():\n    pass\n", encoding='utf-8')
+    assert index.update_file(tmp_path / 'extra.py')
+    assert [s.path for s in index.find_symbol('extra')] == ['extra.py']
+
+
+def test_update_file_ignores_other_languages(tmp_path):
+    index = make_index(tmp_path)
+    (tmp_path / 'main.c').write_text("int solve(void) { return 0; }\n", encoding='utf-8')
+    assert not index.update_file(str(tmp_path / 'main.c'))
+    assert index.stats()['files'] == 1
+    assert not index.search_text('int')
+
+
+def test_update_file_ignores_skipped_dirs(tmp_path):
+    index = make_index(tmp_path)
+    for directory in ('node_modules', '.venv', 'build'):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / 'lib.py').write_text("def vendored():\n    pass\n", encoding='utf-8')
+        assert not index.update_file(tmp_path / directory / 'lib.py')
+    assert not index.find_symbol('vendored')
+
+
+def test_file_grown_past_limit_is_removed(tmp_path):
+    index = make_index(tmp_path, max_file_bytes=200)
+    assert index.find_symbol('solve')
+    (tmp_path / 'main.py').write_text("def solve():\n    pass\n" + "# padding\n" * 50, encoding='utf-8')
+    assert not index.update_file('main.py')
+    assert not index.find_symbol('solve')
+    assert index.stats()['files'] == 0
+
+
+def test_deleted_file_is_removed(tmp_path):
+    index = make_index(tmp_path)
+    (tmp_path / 'main.py').unlink()
+    index.update_file('main.py')
+    assert not index.find_symbol('solve')
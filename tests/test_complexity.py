@@ -0,0 +1,49 @@
+"""
+Tests for complexity.py: Big-O estimates for the loop and recursion shapes
+students write most.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from complexity import analyze_complexity, format_complexity
+
+
+def big_o(code: str) -> dict:
+    return {result.name: result.big_o for result in analyze_complexity(code)}
+
+
+@pytest.mark.parametrize('code, expected', [
+    ("def first(a):\n    return a[0]\n", 'O(1)'),
+    ("def total(a):\n    s = 0\n    for x in a:\n        s += x\n    return s\n", 'O(n)'),
+    ("def pairs(a):\n    for x in a:\n        for y in a:\n            print(x, y)\n", 'O(n^2)'),
+    ("def dups(a):\n    for x in a:\n        if a.count(x) > 1:\n            return True\n", 'O(n^2)'),
+    ("def search(a, t):\n    lo, hi = 0, len(a)\n    while lo < hi:\n        mid = (lo + hi) // 2\n"
+     "        if a[mid] < t:\n            lo = mid + 1\n        else:\n            hi = mid\n    return lo\n",
+     'O(log n)'),
+    ("def fib(n):\n    if n < 2:\n        return n\n    return fib(n - 1) + fib(n - 2)\n", 'O(2^n)'),
+])
+def test_estimates(code, expected):
+    assert big_o(code) == {code.split('(')[0][4:]: expected}
+
+
+def test_calls_to_other_functions_are_included():
+    code = ("def contains(a, t):\n    for x in a:\n        if x == t:\n            return True\n    return False\n\n"
+            "def common(a, b):\n    return [x for x in a if contains(b, x)]\n")
+    assert big_o(code) == {'contains': 'O(n)', 'common': 'O(n^2)'}
+
+
+def test_format_lists_reasons_with_lines():
+    text = format_complexity(analyze_complexity("def pairs(a):\n    for x in a:\n        for y in a:\n            pass\n"))
+    assert text.startswith("pairs() line 1: O(n^2) - ")
+    assert "(line 3)" in text
+
+
+def test_invalid_python():
+    assert analyze_complexity("def broken(:\n") == ()
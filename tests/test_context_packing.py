@@ -0,0 +1,76 @@
+"""
+Tests for context_packing.py: chunking, windowing and the token budget of
+the '[Current file: ...]' block.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_packing import chunk_source, pack_context, render_file_context, parse_token_budget, DEFAULT_TOKEN_BUDGET
+from tracing import estimate_tokens
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def flat_script(statements: int = 1500) -> str:
+    return '\n'.join(f"x{i} = int(input())\nprint(x{i} * {i})" for i in range(statements)) + '\n'
+
+
+def render(content: str, message: str, budget: int, file_name: str = 'main.py') -> str:
+    return render_file_context({'fileName': file_name, 'content': content, 'languageId': 'python'},
+                               message, (), budget)
+
+
+def test_small_file_is_sent_whole():
+    source = "def add(a, b):\n    return a + b\n"
+    packed = pack_context(source, "why?", token_budget=100)
+    assert packed.text == source
+    assert not packed.omitted
+
+
+def test_flat_script_is_split_into_module_code_blocks():
+    chunks = chunk_source(flat_script(), token_budget=1500)
+    assert len(chunks) > 1
+    assert all(chunk.name.startswith('module code') for chunk in chunks)
+
+
+def test_flat_script_over_budget_with_generic_question_shows_code():
+    source = flat_script()
+    assert estimate_tokens(source) > 1500
+    block = render(source, "why is my output wrong?", 1500)
+    assert "showing 0 of" not in block
+    assert "x0 = int(input())" in block
+    assert estimate_tokens(block) <= 1500
+
+
+def test_long_function_is_windowed_around_error_line():
+    body = '\n'.join(f"    total += {i}" for i in range(800))
+    source = f"def big(values):\n    total = 0\n{body}\n    return total\n"
+    errors = ['Traceback (most recent call last):\n  File "main.py", line 600, in big\nZeroDivisionError']
+    packed = pack_context(source, "why does big crash?", errors, token_budget=500)
+    names = [chunk.name for chunk in packed.included]
+    assert "def big (signature)" in names
+    assert any(chunk.start <= 600 <= chunk.end for chunk in packed.included)
+    assert packed.packed_tokens <= 500
+
+
+def test_block_stays_within_budget_and_caps_omitted_list():
+    with open(os.path.join(REPO, 'complexity.py'), encoding='utf-8') as f:
+        source = f.read()
+    for budget in (300, 800, 1500):
+        for message in ("why is my output wrong?", "how does resolve work?"):
+            block = render(source, message, budget, 'complexity.py')
+            assert estimate_tokens(block) <= budget
+    block = render(source, "why is my output wrong?", 800, 'complexity.py')
+    assert " more. Use search_code" in block
+
+
+def test_parse_token_budget():
+    assert parse_token_budget('800') == 800
+    assert parse_token_budget(None) == DEFAULT_TOKEN_BUDGET
+    assert parse_token_budget('lots') == DEFAULT_TOKEN_BUDGET
+    assert parse_token_budget(-5) == DEFAULT_TOKEN_BUDGET
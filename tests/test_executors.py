@@ -0,0 +1,108 @@
+"""
+Tests for executors.py's ArtifactCache: LRU eviction, build-lock cleanup and
+which directories / files it trusts.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+import stat
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executors import ArtifactCache, get_executor
+
+C = get_executor('c')
+GCC = C.find_tool()
+KEY = 'ab' * 16
+
+needs_gcc = pytest.mark.skipif(GCC is None, reason="no C compiler installed")
+posix_only = pytest.mark.skipif(not hasattr(os, 'getuid'), reason="POSIX owners and modes")
+
+
+def program(i: int) -> str:
+    return f"int main(void) {{ return {i}; }}\n"
+
+
+@needs_gcc
+def test_evicts_least_recently_used(tmp_path):
+    cache = ArtifactCache(tmp_path / 'artifacts', max_artifacts=2)
+    first, _ = cache.build(C, GCC, program(1))
+    cache.build(C, GCC, program(2))
+    cache.build(C, GCC, program(1))          # 1 is now the most recently used
+    cache.build(C, GCC, program(3))
+    assert os.path.exists(first)
+    assert cache.stats()['artifacts'] == 2
+    assert cache.stats()['evictions'] == 1
+    assert len(os.listdir(cache.directory)) == 2
+
+
+@needs_gcc
+def test_drops_locks_of_evicted_keys(tmp_path):
+    cache = ArtifactCache(tmp_path / 'artifacts', max_artifacts=2, max_failures=2)
+    for i in range(5):
+        cache.build(C, GCC, program(i))
+    for i in range(5):
+        path, error = cache.build(C, GCC, f"not C {i}")
+        assert path is None and error
+    assert len(cache._locks) == 4
+
+
+@needs_gcc
+def test_adopts_own_artifacts_after_restart(tmp_path):
+    directory = tmp_path / 'artifacts'
+    path, _ = ArtifactCache(directory).build(C, GCC, program(1))
+    cache = ArtifactCache(directory)
+    assert cache.build(C, GCC, program(1)) == (path, None)
+    assert cache.stats()['hits'] == 1
+
+
+@posix_only
+def test_creates_private_directory(tmp_path):
+    cache = ArtifactCache(tmp_path / 'artifacts')
+    assert stat.S_IMODE(os.stat(cache.directory).st_mode) == 0o700
+
+
+@posix_only
+def test_tightens_own_permissive_directory(tmp_path):
+    directory = tmp_path / 'artifacts'
+    directory.mkdir(mode=0o777)
+    os.chmod(directory, 0o777)
+    cache = ArtifactCache(directory)
+    assert cache.directory == directory
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+
+@posix_only
+def test_does_not_follow_symlinked_directory(tmp_path):
+    target = tmp_path / 'elsewhere'
+    target.mkdir()
+    link = tmp_path / 'artifacts'
+    link.symlink_to(target)
+    cache = ArtifactCache(link)
+    assert cache.directory != link
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid') or os.getuid() != 0, reason="needs root to chown")
+def test_does_not_trust_another_users_directory(tmp_path):
+    directory = tmp_path / 'artifacts'
+    directory.mkdir(mode=0o700)
+    os.chown(directory, 12345, 12345)
+    cache = ArtifactCache(directory)
+    assert cache.directory != directory
+
+
+@posix_only
+def test_ignores_planted_files(tmp_path):
+    directory = tmp_path / 'artifacts'
+    directory.mkdir(mode=0o700)
+    writable = directory / f"c-{KEY}"
+    writable.write_bytes(b'#!/bin/sh\n')
+    os.chmod(writable, 0o777)
+    (directory / 'c-not-a-key').write_bytes(b'')
+    (directory / f"cpp-{'cd' * 16}").symlink_to(writable)
+    cache = ArtifactCache(directory)
+    assert cache.stats()['artifacts'] == 0
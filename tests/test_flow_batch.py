@@ -0,0 +1,52 @@
+"""
+Tests for flow_batch.py's checkpoint: a rerun resumes only results written
+with the same flow, tier and --set values.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flow_batch import run_config, load_config_checkpoint
+
+CONFIG = run_config('submission_feedback', 'small', {'concept': 'recursion'}, 'spec')
+
+
+def write(path, *records):
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def test_resumes_items_with_outputs(tmp_path):
+    output = tmp_path / 'results.jsonl'
+    write(output, {'id': 'a', 'outputs': {}, 'config': CONFIG},
+          {'id': 'b', 'error': 'TimeoutError', 'config': CONFIG})
+    with open(output, 'a', encoding='utf-8') as f:
+        f.write('{"id": "c", "outp')  # Cut short by a crash
+    assert load_config_checkpoint(output, CONFIG) == {'a'}
+    assert load_config_checkpoint(tmp_path / 'missing.jsonl', CONFIG) == set()
+
+
+@pytest.mark.parametrize('other', [
+    run_config('submission_feedback', 'large', {'concept': 'recursion'}, 'spec'),
+    run_config('submission_feedback', 'small', {'concept': 'loops'}, 'spec'),
+    run_config('article_analysis', 'small', {'concept': 'recursion'}, 'spec'),
+    run_config('submission_feedback', 'small', {'concept': 'recursion'}, 'edited spec'),
+    None,  # Written before records carried their config
+])
+def test_refuses_results_of_another_config(tmp_path, other):
+    output = tmp_path / 'results.jsonl'
+    write(output, {'id': 'a', 'outputs': {}, 'config': CONFIG}, {'id': 'b', 'outputs': {}, 'config': other})
+    with pytest.raises(ValueError):
+        load_config_checkpoint(output, CONFIG)
+
+
+def test_set_order_does_not_matter():
+    assert run_config('f', None, {'a': '1', 'b': '2'}, 'x') == run_config('f', None, {'b': '2', 'a': '1'}, 'x')
@@ -0,0 +1,54 @@
+"""
+Tests for grade_batch.py: a worker process that dies doesn't end the batch.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+import json
+import multiprocessing
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import grade_batch
+
+
+def _stage_echo(submission: dict) -> str:
+    if 'CRASH' in submission['code']:
+        os._exit(1)  # Like a segfault or an OOM kill: no exception, the process is gone
+    return submission['code'].upper()
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason="stage is patched in before forking")
+def test_dead_worker_is_recorded_and_batch_continues(tmp_path, monkeypatch):
+    monkeypatch.setitem(grade_batch.STAGES, 'echo', _stage_echo)
+    source = tmp_path / 'submissions.jsonl'
+    ids = [f"s{i}" for i in range(8)]
+    with open(source, 'w', encoding='utf-8') as f:
+        for i, submission_id in enumerate(ids):
+            code = 'CRASH' if i == 3 else f"print({i})"
+            f.write(json.dumps({'id': submission_id, 'code': code}) + '\n')
+    output = tmp_path / 'results.jsonl'
+
+    stats = grade_batch.run_batch(source, output, ('echo',), workers=2, defaults={})
+
+    records = {r['id']: r for r in map(json.loads, output.read_text(encoding='utf-8').splitlines())}
+    assert sorted(records) == ids
+    assert 'Worker process died' in records['s3']['error']
+    assert records['s0']['stages']['echo']['result'] == 'PRINT(0)'
+    assert all('result' in records[i]['stages']['echo'] for i in ids if i != 's3')
+    assert stats['graded'] == 8 and stats['errors'] == 1
+
+
+def test_resume_terminates_a_cut_line(tmp_path):
+    source = tmp_path / 'submissions.jsonl'
+    source.write_text(json.dumps({'id': 'a', 'code': 'x = 1'}) + '\n', encoding='utf-8')
+    output = tmp_path / 'results.jsonl'
+    output.write_text('{"id": "cut', encoding='utf-8')
+    grade_batch.run_batch(source, output, ('analyze_code',), workers=1, defaults={})
+    lines = output.read_text(encoding='utf-8').splitlines()
+    assert lines[0] == '{"id": "cut'
+    assert json.loads(lines[1])['id'] == 'a'
@@ -0,0 +1,71 @@
+"""
+Tests for learning_analytics.py: recorded concepts, buffered events and
+instructor access to /analytics.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from learning_analytics import AnalyticsStore, SessionRecorder, instructor_auth_error
+from tutoring_state import TutoringState
+
+
+def tutoring_tools(store):
+    tutoring = TutoringState()
+    recorder = SessionRecorder(store, 'student', 'session', resolve_concept=tutoring.resolve_concept)
+    tools = tutoring.wrap_tools(recorder.wrap_tools({
+        'generate_hint': lambda problem, hint_level: f"hint {hint_level}",
+        'detect_completion': lambda response, concept: "UNDERSTOOD - Nice explanation!",
+        'end_session': lambda summary="": "SESSION_ENDED",
+    }))
+    return tutoring, recorder, tools
+
+
+def test_hint_and_completion_share_the_concept(tmp_path):
+    store = AnalyticsStore(tmp_path / 'analytics.sqlite3')
+    _, recorder, tools = tutoring_tools(store)
+    recorder.turn = 1
+    tools['generate_hint']("The binary search bug in find()")
+    recorder.turn = 2
+    tools['generate_hint']("binary search bug")   # a rewording of the same problem
+    tools['detect_completion']("mid should be an int", "binary search")
+    recorder.flush()
+
+    hints = store.hints_by_concept()
+    outcomes = store.outcomes_by_concept()
+    assert [row['concept'] for row in hints] == ["the binary search bug in find()"]
+    assert hints[0]['hints'] == 2
+    assert [row['concept'] for row in outcomes] == ["the binary search bug in find()"]
+    assert outcomes[0]['understood'] == 1
+
+
+def test_rolled_back_attempt_is_not_recorded(tmp_path):
+    store = AnalyticsStore(tmp_path / 'analytics.sqlite3')
+    _, recorder, tools = tutoring_tools(store)
+    saved = recorder.to_dict()
+    tools['generate_hint']("recursion")
+    tools['end_session']("done")
+    assert recorder.ended
+    recorder.restore(saved)
+    recorder.flush()
+    assert not recorder.ended
+    assert store.hints_by_concept() == []
+
+
+def test_analytics_refused_without_token(monkeypatch):
+    monkeypatch.delenv('COMPTUTOR_INSTRUCTOR_TOKEN', raising=False)
+    assert instructor_auth_error({})[1] == 403
+    assert instructor_auth_error({}, '10.0.0.2', allow_local=True)[1] == 403
+    assert instructor_auth_error({}, '127.0.0.1', allow_local=True) is None
+    assert instructor_auth_error({}, '127.0.0.1') is not None
+
+
+def test_analytics_token_checked(monkeypatch):
+    monkeypatch.setenv('COMPTUTOR_INSTRUCTOR_TOKEN', 'secret')
+    assert instructor_auth_error({'Authorization': 'Bearer secret'}) is None
+    assert instructor_auth_error({'Authorization': 'Bearer wrong'})[1] == 401
+    assert instructor_auth_error({}, '127.0.0.1', allow_local=True)[1] == 401
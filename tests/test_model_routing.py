@@ -0,0 +1,172 @@
+"""
+Tests for model_routing.py: turn scoring, tier choice and escalation (with
+the rollback of tool state when an attempt is discarded).
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_routing
+from model_routing import ModelTier, ModelRouter, RoutedConversation, classify_turn, low_confidence
+
+
+class FakeMessage:
+    def __init__(self, message_type: str, content: str):
+        self.message_type = message_type
+        self.content = content
+        self.tool_requests = None
+
+
+class FakeConversation:
+    def __init__(self, agent):
+        self.agent = agent
+        self.messages = []
+
+    def get_messages(self):
+        return self.messages
+
+    def append_user_message(self, text: str):
+        self.messages.append(FakeMessage('USER', text))
+
+    def execute(self):
+        self.agent.calls += 1
+        self.agent.counter.value += 1  # Tool state a turn advances
+        if isinstance(self.agent.reply, Exception):
+            raise self.agent.reply
+        self.messages.append(FakeMessage('AGENT', self.agent.reply))
+
+
+class FakeAgent:
+    def __init__(self, reply, counter):
+        self.reply = reply
+        self.counter = counter
+        self.calls = 0
+
+    def start_conversation(self):
+        return FakeConversation(self)
+
+
+class Counter:
+    """Stands in for TutoringState / SessionRecorder in the rollback protocol."""
+
+    def __init__(self):
+        self.value = 0
+
+    def to_dict(self) -> dict:
+        return {'value': self.value}
+
+    def restore(self, state: dict):
+        self.value = state['value']
+
+
+TIERS = [
+    ModelTier('fast', 'small-model', 'http://localhost:1/v1', min_score=0),
+    ModelTier('large', 'big-model', 'http://localhost:1/v1', min_score=2),
+]
+GOOD_REPLY = "What do you expect the loop to print on its last pass, and what does it print?"
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    """switch() replays messages through conversation_snapshot, which needs wayflowcore; copy them instead."""
+    monkeypatch.setattr(model_routing, 'snapshot_messages', list)
+    monkeypatch.setattr(model_routing, 'restore_conversation',
+                        lambda conversation, messages: conversation.messages.extend(messages))
+
+
+def routed(replies: dict, counter: Counter, enabled: bool = True):
+    agents = {}
+
+    def load_agent(tier):
+        agents[tier.name] = FakeAgent(replies[tier.name], counter)
+        return agents[tier.name]
+
+    return RoutedConversation(ModelRouter(TIERS, enabled=enabled), load_agent), agents
+
+
+def test_classify_turn():
+    assert classify_turn("hi", turn=1) == (1, ['first turn'])
+    score, reasons = classify_turn("Why does this raise IndexError?\n```\nfor i in range(n):\n```", turn=3)
+    assert score == 5 and reasons == ['code', 'error', 'reasoning']
+    assert classify_turn("thanks, got it!", phase='understood', turn=5) == (-2, ['wrap-up'])
+    assert 'long' in classify_turn("x" * 601, turn=3)[1]
+
+
+def test_route_picks_largest_tier_the_score_reaches():
+    router = ModelRouter(TIERS)
+    assert router.route(-2) == 0
+    assert router.route(1) == 0
+    assert router.route(2) == 1
+    assert router.route(9) == 1
+    assert ModelRouter(TIERS, enabled=False).route(0) == 1
+
+
+def test_route_with_no_eligible_tier_uses_the_first():
+    tiers = [ModelTier('mid', 'm', 'u', min_score=1), ModelTier('top', 't', 'u', min_score=3)]
+    assert ModelRouter(tiers).route(0) == 0
+
+
+def test_load_tiers_sorted_and_url_override(monkeypatch, tmp_path):
+    path = tmp_path / 'tiers.json'
+    path.write_text('[{"name": "big", "model_id": "b", "url": "x", "min_score": 3},'
+                    ' {"name": "small", "model_id": "s", "url": "x"}]', encoding='utf-8')
+    monkeypatch.setenv('COMPTUTOR_MODEL_TIERS', str(path))
+    monkeypatch.setenv('COMPTUTOR_LLM_URL', 'http://localhost:8009/v1')
+    tiers = model_routing.load_tiers()
+    assert [tier.name for tier in tiers] == ['small', 'big']
+    assert all(tier.url == 'http://localhost:8009/v1' for tier in tiers)
+
+
+def test_low_confidence():
+    history = [FakeMessage('AGENT', GOOD_REPLY)]
+    assert low_confidence([FakeMessage('USER', 'q')], [], 0) == 'empty reply'
+    assert low_confidence([FakeMessage('AGENT', "I'm not sure about that.")], [], 0) == 'hedged reply'
+    assert low_confidence([FakeMessage('AGENT', "Use a loop.")], [], 1) == 'too short for the question'
+    assert low_confidence([FakeMessage('AGENT', "What have you tried?")], [], 1) is None
+    assert low_confidence([FakeMessage('AGENT', GOOD_REPLY)], history, 0) == 'repeated the previous reply'
+    assert low_confidence([FakeMessage('AGENT', GOOD_REPLY)], [], 3) is None
+
+
+def test_easy_turn_stays_on_fast_tier(replay):
+    counter = Counter()
+    conversation, agents = routed({'fast': GOOD_REPLY, 'large': GOOD_REPLY}, counter)
+    decision = conversation.execute("what is a list?", turn=3)
+    assert decision == {'tier': 'fast', 'score': 0, 'reasons': [], 'escalations': []}
+    assert 'large' not in agents
+    assert counter.value == 1
+
+
+def test_escalation_rolls_back_state(replay):
+    counter = Counter()
+    conversation, agents = routed({'fast': '', 'large': GOOD_REPLY}, counter)
+    decision = conversation.execute("what is a list?", turn=3, rollback=[counter])
+    assert decision['tier'] == 'large'
+    assert decision['escalations'] == [{'from': 'fast', 'reason': 'empty reply'}]
+    assert agents['fast'].calls == 1 and agents['large'].calls == 1
+    # The discarded attempt's state change was undone; only the kept one counts
+    assert counter.value == 1
+    # The large tier saw the message once, not the failed attempt too
+    assert [m.content for m in conversation.conversation.get_messages()] == ["what is a list?", GOOD_REPLY]
+    stats = conversation.router.stats()['tiers']
+    assert stats['fast']['escalated'] == 1 and stats['large']['calls'] == 1
+
+
+def test_error_escalates_then_raises_on_top_tier(replay):
+    counter = Counter()
+    conversation, _ = routed({'fast': RuntimeError('timeout'), 'large': RuntimeError('down')}, counter)
+    with pytest.raises(RuntimeError, match='down'):
+        conversation.execute("what is a list?", turn=3, rollback=[counter])
+    stats = conversation.router.stats()['tiers']
+    assert stats['fast']['errors'] == 1 and stats['large']['errors'] == 1
+
+
+def test_no_escalation_when_routing_disabled(replay):
+    conversation, agents = routed({'fast': GOOD_REPLY, 'large': ''}, Counter(), enabled=False)
+    decision = conversation.execute("what is a list?", turn=3)
+    assert decision['tier'] == 'large' and decision['escalations'] == []
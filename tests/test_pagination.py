@@ -0,0 +1,52 @@
+"""
+Tests for pagination.py: newest page, polling with `since`, scrolling back
+with `before`, and request-arg clamping.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, parse_page_args
+
+ITEMS = [{'text': f"m{i}"} for i in range(12)]
+
+
+def indexes(page: dict) -> list:
+    return [message['index'] for message in page['messages']]
+
+
+def test_newest_page():
+    page = paginate(ITEMS, limit=5)
+    assert indexes(page) == [7, 8, 9, 10, 11]
+    assert page['messages'][0] == {'text': 'm7', 'index': 7}
+    assert (page['first_index'], page['next_cursor'], page['has_older'], page['has_newer']) == (7, 12, True, False)
+    assert 'index' not in ITEMS[7]
+
+
+def test_scroll_back_to_the_start():
+    page = paginate(ITEMS, before=7, limit=5)
+    assert indexes(page) == [2, 3, 4, 5, 6]
+    page = paginate(ITEMS, before=page['first_index'], limit=5)
+    assert indexes(page) == [0, 1]
+    assert not page['has_older'] and page['has_newer']
+
+
+def test_poll_for_new_messages():
+    page = paginate(ITEMS, since=10, limit=5)
+    assert indexes(page) == [10, 11]
+    page = paginate(ITEMS, since=page['next_cursor'])
+    assert page['messages'] == [] and page['next_cursor'] == 12
+    assert indexes(paginate(ITEMS, since=50)) == []
+
+
+def test_parse_page_args():
+    assert parse_page_args({}) == {'since': None, 'before': None, 'limit': DEFAULT_PAGE_SIZE}
+    assert parse_page_args({'since': '3', 'limit': '10'}) == {'since': 3, 'before': None, 'limit': 10}
+    assert parse_page_args({'before': '-4', 'limit': 'all'}) == {'since': None, 'before': 0,
+                                                                 'limit': DEFAULT_PAGE_SIZE}
+    assert parse_page_args({'limit': '100000'})['limit'] == MAX_PAGE_SIZE
+    assert parse_page_args({'limit': '0'})['limit'] == DEFAULT_PAGE_SIZE
@@ -0,0 +1,54 @@
+"""
+Tests for prefetch.py: cache keys and which tool results are reused.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prefetch import Prefetcher, normalize_code
+
+
+def test_normalize_code_keeps_leading_indentation():
+    assert normalize_code("\n\n    x = 1  \n    y\n\n") == "    x = 1\n    y"
+    assert normalize_code("x = 1 \n\n") == normalize_code("x = 1")
+    assert normalize_code("    x = 1") != normalize_code("x = 1")
+
+
+def counting_tool():
+    calls = []
+
+    def tool(code: str, test_input: str = ""):
+        calls.append(code)
+        return f"run {len(calls)}"
+    return tool, calls
+
+
+def test_analyze_results_are_cached():
+    prefetcher = Prefetcher()
+    tool, calls = counting_tool()
+    cached = prefetcher.cached_tool("analyze_code", tool)
+    assert cached("x = 1") == cached(code="x = 1\n") == "run 1"
+    assert len(calls) == 1
+
+
+def test_agent_run_code_calls_are_not_cached():
+    prefetcher = Prefetcher()
+    tool, calls = counting_tool()
+    cached = prefetcher.cached_tool("run_code", tool)
+    assert cached("import random") == "run 1"
+    assert cached("import random") == "run 2"
+    assert len(calls) == 2
+
+
+def test_prefetched_dry_run_is_served_once():
+    prefetcher = Prefetcher()
+    tool, calls = counting_tool()
+    assert prefetcher.schedule("run_code", tool, code="print(1)") == 'scheduled'
+    cached = prefetcher.cached_tool("run_code", tool)
+    assert cached("print(1)") == "run 1"       # the prefetched run (or waits for it)
+    assert cached("print(1)") == "run 2"       # a real re-run
+    assert len(calls) == 2
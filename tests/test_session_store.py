@@ -0,0 +1,178 @@
+"""
+Tests for session_store.py: versioning (how web_app.py spots a stale cached
+session) and cross-worker locks, against SQLite and an in-memory Redis
+stand-in.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import SQLiteSessionStore, RedisSessionStore, SessionLockTimeout
+
+
+class FakeRedis:
+    """The slice of redis-py RedisSessionStore uses (no Lua, so eval() is missing)."""
+
+    def __init__(self):
+        self._data = {}      # key -> bytes
+        self._expires = {}   # key -> time.monotonic() deadline
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        deadline = self._expires.get(key)
+        if deadline is not None and time.monotonic() >= deadline:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._live(key) else None
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self._lock:
+            if nx and self._live(key):
+                return None
+            self._data[key] = value if isinstance(value, bytes) else str(value).encode('utf-8')
+            self._expires.pop(key, None)
+            if ex is not None or px is not None:
+                self._expires[key] = time.monotonic() + (ex if ex is not None else px / 1000)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = sum(1 for key in keys if self._live(key))
+            for key in keys:
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._data[key]) + 1 if self._live(key) else 1
+            self._data[key] = str(value).encode('utf-8')
+            return value
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._live(key):
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((getattr(self._client, name), args, kwargs))
+        return queue
+
+    def execute(self):
+        return [func(*args, **kwargs) for func, args, kwargs in self._calls]
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteSessionStore(tmp_path / 'sessions.sqlite3')
+    return RedisSessionStore(client=FakeRedis())
+
+
+def test_missing_session(store):
+    assert store.load('s1') is None
+    assert store.version('s1') == 0
+
+
+def test_save_bumps_version(store):
+    assert store.save('s1', {'history': ['a']}) == 1
+    assert store.save('s1', {'history': ['a', 'b'], 'version': 1}) == 2
+    state = store.load('s1')
+    assert state == {'history': ['a', 'b'], 'version': 2}
+    assert store.version('s1') == 2
+
+
+def test_version_conflict_is_visible_to_other_workers(store):
+    # Worker A caches version 1; worker B then saves over it
+    cached_version = store.save('s1', {'turn': 1})
+    assert store.save('s1', {'turn': 2}) == cached_version + 1
+
+    # A sees its copy is stale and reloads B's state
+    assert store.version('s1') != cached_version
+    assert store.load('s1') == {'turn': 2, 'version': 2}
+
+
+def test_delete(store):
+    store.save('s1', {'turn': 1})
+    store.delete('s1')
+    assert store.load('s1') is None
+    assert store.version('s1') == 0
+
+
+def test_lock_times_out_while_held(store):
+    with store.lock('s1'):
+        start = time.monotonic()
+        with pytest.raises(SessionLockTimeout):
+            with store.lock('s1', timeout=0.2, poll_interval=0.01):
+                pass
+        assert time.monotonic() - start >= 0.2
+        # Other sessions are not blocked
+        with store.lock('s2', timeout=0.2):
+            pass
+    # Released on exit
+    with store.lock('s1', timeout=0.2):
+        pass
+
+
+def test_lock_released_on_error(store):
+    with pytest.raises(RuntimeError):
+        with store.lock('s1'):
+            raise RuntimeError('turn failed')
+    with store.lock('s1', timeout=0.2):
+        pass
+
+
+def test_expired_lock_is_taken_over(store):
+    store.LOCK_TTL_SECONDS = 0.1
+    assert store._try_acquire('s1', 'crashed-worker')
+    with store.lock('s1', timeout=2, poll_interval=0.02):
+        # The crashed worker's late release must not free the new holder's lock
+        store._release('s1', 'crashed-worker')
+        assert not store._try_acquire('s1', 'other-worker')
+
+
+def test_lock_serializes_threads(store):
+    store.save('s1', {'count': 0})
+    errors = []
+
+    def turn():
+        try:
+            with store.lock('s1', timeout=10, poll_interval=0.005):
+                state = store.load('s1')
+                time.sleep(0.01)
+                store.save('s1', {'count': state['count'] + 1})
+        except Exception as e:  # surfaced below; pytest doesn't see thread errors
+            errors.append(e)
+
+    threads = [threading.Thread(target=turn) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert store.load('s1')['count'] == 5
+    assert store.version('s1') == 6
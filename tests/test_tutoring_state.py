@@ -0,0 +1,54 @@
+"""
+Tests for tutoring_state.py: hint levels, verdicts and the per-message header.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tutoring_state import TutoringState, MAX_HINT_LEVEL, HINTING, CHECKING, UNDERSTOOD
+
+
+def test_hint_levels_advance_per_concept_and_stop_at_max():
+    state = TutoringState()
+    levels = [state.next_hint_level('binary search') for _ in range(MAX_HINT_LEVEL + 3)]
+    assert levels == list(range(MAX_HINT_LEVEL + 1)) + [MAX_HINT_LEVEL, MAX_HINT_LEVEL]
+    assert state.next_hint_level('recursion') == 0
+    assert state.current.phase == HINTING
+
+
+def test_rewording_matches_known_concept():
+    state = TutoringState()
+    state.next_hint_level('binary search')
+    assert state.next_hint_level('Binary Search bug') == 1
+
+
+def test_verdicts_move_phase():
+    state = TutoringState()
+    state.record_verdict('loops', 'PARTIAL - Can you explain a bit more?')
+    assert state.current.phase == CHECKING
+    state.record_verdict('loops', 'UNDERSTOOD - Nice explanation!')
+    state.next_hint_level('loops')
+    assert state.current.phase == UNDERSTOOD
+
+
+def test_header_round_trip():
+    state = TutoringState()
+    assert state.with_header("hi") == "hi"
+    state.next_hint_level('binary search')
+    message = state.with_header("why does it loop?\nsecond line")
+    assert message.startswith(TutoringState.HEADER_PREFIX)
+    assert TutoringState.strip_header(message) == "why does it loop?\nsecond line"
+    assert TutoringState.strip_header("plain") == "plain"
+
+
+def test_restore_round_trip():
+    state = TutoringState()
+    state.next_hint_level('binary search')
+    state.record_verdict('binary search', 'PARTIAL - one more question')
+    copy = TutoringState()
+    copy.restore(state.to_dict())
+    assert copy.header() == state.header()
@@ -0,0 +1,387 @@
+"""
+Span-based tracing for the Autonomous Teaching Agent
+Records one trace per chat turn (request -> execute -> tool / LLM calls),
+exports finished spans to a JSONL file or an OpenTelemetry collector,
+and aggregates durations into histograms for the /metrics endpoint.
+
+Configuration (environment variables):
+    COMPTUTOR_TRACE_FILE      - append finished spans to this JSONL file
+    COMPTUTOR_OTLP_ENDPOINT   - OTLP/HTTP JSON traces endpoint,
+                                e.g. http://localhost:4318/v1/traces
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import functools
+import threading
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+
+# logging_setup.py imports this module, so its get_logger() isn't used here
+log = logging.getLogger('comptutor.tracing')
+
+# Histogram bucket upper bounds in milliseconds
+DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Span:
+    """A single timed operation inside a trace."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self._start_perf = time.perf_counter()
+        self.duration_ms = None
+        self.child_ms = 0.0  # Time spent in direct children (e.g. tools inside execute)
+        self.status = 'ok'
+
+    def set_attribute(self, key: str, value):
+        """Attach a key/value pair to the span."""
+        self.attributes[key] = value
+
+    def finish(self, duration_ms: float = None):
+        """Close the span; an explicit duration is used for synthetic spans."""
+        if duration_ms is None:
+            duration_ms = (time.perf_counter() - self._start_perf) * 1000
+        self.duration_ms = duration_ms
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_time': self.start_time,
+            'duration_ms': round(self.duration_ms or 0.0, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile from bucket counts (upper bound of the bucket)."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(float(self.buckets[i]), self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        bounds = [str(b) for b in self.buckets] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum_ms': round(self.total, 3),
+            'avg_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max, 3),
+            'p50_ms': self.quantile(0.50),
+            'p95_ms': self.quantile(0.95),
+            'buckets': dict(zip(bounds, self.counts)),
+        }
+
+
+class MetricsRegistry:
+    """Aggregates span durations and numeric span attributes."""
+
+    # Span attributes that are summed into counters (sizes, token estimates)
+    COUNTED_ATTRIBUTES = ('input_bytes', 'output_bytes', 'prompt_tokens', 'completion_tokens')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._errors = {}
+
+    def record(self, span: Span):
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = Histogram()
+            histogram.observe(span.duration_ms or 0.0)
+
+            for key in self.COUNTED_ATTRIBUTES:
+                value = span.attributes.get(key)
+                if isinstance(value, (int, float)):
+                    counter_key = f"{span.name}.{key}"
+                    self._counters[counter_key] = self._counters.get(counter_key, 0) + value
+
+            if span.status != 'ok':
+                self._errors[span.name] = self._errors.get(span.name, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'histograms': {name: h.to_dict() for name, h in sorted(self._histograms.items())},
+                'counters': dict(sorted(self._counters.items())),
+                'errors': dict(sorted(self._errors.items())),
+            }
+
+    def to_prometheus(self) -> str:
+        """Render histograms in the Prometheus text exposition format."""
+        lines = ['# TYPE comptutor_span_duration_ms histogram']
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'comptutor_span_duration_ms_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'comptutor_span_duration_ms_sum{{span="{name}"}} {histogram.total:.3f}')
+                lines.append(f'comptutor_span_duration_ms_count{{span="{name}"}} {histogram.count}')
+            for key, value in sorted(self._counters.items()):
+                span_name, attribute = key.rsplit('.', 1)
+                lines.append(f'comptutor_span_{attribute}_total{{span="{span_name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._errors.clear()
+
+
+class _BackgroundExporter:
+    """Exports finished spans from a daemon thread so requests never block on I/O."""
+
+    def __init__(self, batch_size: int = 64, flush_interval: float = 1.0):
+        self._queue = queue.Queue(maxsize=10000)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            pass  # Drop spans rather than slow down the request
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._flush_interval
+            while len(batch) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.write_batch(batch)
+            except Exception as e:
+                log.warning("Trace export failed: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until queued spans have been written."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def write_batch(self, batch: list):
+        raise NotImplementedError
+
+
+class JsonlFileExporter(_BackgroundExporter):
+    """Appends spans to a local JSONL file, one span per line."""
+
+    def __init__(self, path, **kwargs):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(**kwargs)
+
+    def write_batch(self, batch: list):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in batch:
+                f.write(json.dumps(span, ensure_ascii=False) + '\n')
+
+
+class OtlpHttpExporter(_BackgroundExporter):
+    """Posts spans to an OpenTelemetry collector using OTLP/HTTP with JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str = 'comptutor', **kwargs):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        super().__init__(**kwargs)
+
+    @staticmethod
+    def _attribute(key: str, value) -> dict:
+        if isinstance(value, bool):
+            return {'key': key, 'value': {'boolValue': value}}
+        if isinstance(value, int):
+            return {'key': key, 'value': {'intValue': str(value)}}
+        if isinstance(value, float):
+            return {'key': key, 'value': {'doubleValue': value}}
+        return {'key': key, 'value': {'stringValue': str(value)}}
+
+    def _to_otlp(self, span: dict) -> dict:
+        start_ns = int(span['start_time'] * 1e9)
+        end_ns = start_ns + int(span['duration_ms'] * 1e6)
+        otlp_span = {
+            'traceId': span['trace_id'],
+            'spanId': span['span_id'],
+            'name': span['name'],
+            'kind': 1,
+            'startTimeUnixNano': str(start_ns),
+            'endTimeUnixNano': str(end_ns),
+            'attributes': [self._attribute(k, v) for k, v in span['attributes'].items()],
+            'status': {'code': 1 if span['status'] == 'ok' else 2},
+        }
+        if span['parent_id']:
+            otlp_span['parentSpanId'] = span['parent_id']
+        return otlp_span
+
+    def write_batch(self, batch: list):
+        payload = {
+            'resourceSpans': [{
+                'resource': {'attributes': [self._attribute('service.name', self.service_name)]},
+                'scopeSpans': [{
+                    'scope': {'name': 'comptutor.tracing'},
+                    'spans': [self._to_otlp(span) for span in batch],
+                }],
+            }]
+        }
+        req = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+        )
+        with urllib.request.urlopen(req, timeout=5):
+            pass
+
+
+class Tracer:
+    """Creates spans, tracks the current span per thread and fans out finished spans."""
+
+    def __init__(self, exporters=None, metrics: MetricsRegistry = None):
+        self.exporters = list(exporters or [])
+        self.metrics = metrics or MetricsRegistry()
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls):
+        exporters = []
+        trace_file = os.environ.get('COMPTUTOR_TRACE_FILE')
+        if trace_file:
+            exporters.append(JsonlFileExporter(trace_file))
+        otlp_endpoint = os.environ.get('COMPTUTOR_OTLP_ENDPOINT')
+        if otlp_endpoint:
+            exporters.append(OtlpHttpExporter(otlp_endpoint))
+        return cls(exporters)
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current_span(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block of code as a child of the current span (or a new trace)."""
+        parent = self.current_span()
+        trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.status = 'error'
+            span.set_attribute('error', f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            stack.pop()
+            span.finish()
+            if parent is not None:
+                parent.child_ms += span.duration_ms
+            self._emit(span)
+
+    def record_span(self, name: str, duration_ms: float, **attributes) -> Span:
+        """Record an already-measured operation as a child of the current span."""
+        parent = self.current_span()
+        trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+        span.finish(duration_ms)
+        self._emit(span)
+        return span
+
+    def _emit(self, span: Span):
+        self.metrics.record(span)
+        for exporter in self.exporters:
+            exporter.export(span)
+
+
+def _payload_size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    return len(str(value).encode('utf-8'))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) for prompt/response sizes."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def trace_tool(name: str, func, active_tracer: 'Tracer' = None):
+    """Wrap a tool function so each call is recorded as a 'tool.<name>' span."""
+    @functools.wraps(func)
+    def traced(*args, **kwargs):
+        tracer_ = active_tracer or tracer
+        input_bytes = sum(_payload_size(a) for a in args) + sum(_payload_size(v) for v in kwargs.values())
+        with tracer_.span(f"tool.{name}", tool=name, input_bytes=input_bytes) as span:
+            result = func(*args, **kwargs)
+            span.set_attribute('output_bytes', _payload_size(result))
+            return result
+
+    return traced
+
+
+def trace_tools(tool_registry: dict, active_tracer: 'Tracer' = None) -> dict:
+    """Return a copy of a tool registry with every tool wrapped in trace_tool."""
+    return {name: trace_tool(name, func, active_tracer) for name, func in tool_registry.items()}
+
+
+# Process-wide tracer used by the servers
+tracer = Tracer.from_env()
@@ -0,0 +1,177 @@
+"""
+Server-side tutoring state for the Autonomous Teaching Agent
+Tracks, per session and problem, which hint level the student is on, how
+many times their understanding was checked and the last verdict, instead
+of leaving the LLM to re-derive them from the transcript every turn.
+The state drives generate_hint (the next level is chosen here, so levels
+are never repeated or skipped) and is shown to the model as a one-line
+header on each student message.
+"""
+import functools
+from collections import OrderedDict
+
+from learning_analytics import normalize_concept, parse_outcome
+
+# generate_hint levels: 0=question, 1=approach, 2=steps, 3=skeleton, 4=nudge
+MAX_HINT_LEVEL = 4
+HINT_LEVEL_NAMES = ('question', 'approach', 'steps', 'skeleton', 'nudge')
+
+# Problems remembered per session (oldest are dropped)
+MAX_PROBLEMS = 16
+
+# Phases of one problem and the events that move between them
+ASSESSING = 'assessing'     # no hint yet
+HINTING = 'hinting'         # hints given, no verdict since
+CHECKING = 'checking'       # last verdict was PARTIAL
+UNDERSTOOD = 'understood'   # detect_completion said UNDERSTOOD
+TRANSITIONS = {
+    (ASSESSING, 'hint'): HINTING,
+    (ASSESSING, 'PARTIAL'): CHECKING,
+    (ASSESSING, 'UNDERSTOOD'): UNDERSTOOD,
+    (HINTING, 'hint'): HINTING,
+    (HINTING, 'PARTIAL'): CHECKING,
+    (HINTING, 'UNDERSTOOD'): UNDERSTOOD,
+    (CHECKING, 'hint'): HINTING,
+    (CHECKING, 'PARTIAL'): CHECKING,
+    (CHECKING, 'UNDERSTOOD'): UNDERSTOOD,
+    # A student who got it stays there; more hints or checks don't undo it
+}
+
+
+class ProblemState:
+    """Tutoring progress on one problem."""
+
+    __slots__ = ('concept', 'phase', 'hint_level', 'attempts', 'partials', 'last_verdict')
+
+    def __init__(self, concept: str, phase: str = ASSESSING, hint_level: int = 0, attempts: int = 0,
+                 partials: int = 0, last_verdict: str = None):
+        self.concept = concept
+        self.phase = phase
+        self.hint_level = hint_level      # level the next generate_hint gives
+        self.attempts = attempts          # detect_completion calls
+        self.partials = partials          # ... of which were PARTIAL
+        self.last_verdict = last_verdict
+
+    def apply(self, event: str):
+        self.phase = TRANSITIONS.get((self.phase, event), self.phase)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def header(self) -> str:
+        parts = [f"{self.concept or 'current problem'}: {self.phase}"]
+        if self.hint_level:
+            parts.append(f"{self.hint_level} hint{'s' if self.hint_level != 1 else ''} given")
+        if self.attempts:
+            parts.append(f"{self.attempts} check{'s' if self.attempts != 1 else ''} "
+                         f"({self.partials} PARTIAL), last {self.last_verdict}")
+        if self.phase == UNDERSTOOD:
+            parts.append("next: end_session")
+        elif self.hint_level <= MAX_HINT_LEVEL:
+            parts.append(f"next hint: level {self.hint_level} ({HINT_LEVEL_NAMES[self.hint_level]})")
+        else:
+            parts.append("all hint levels used")
+        return ", ".join(parts)
+
+
+class TutoringState:
+    """Per-session problems, most recent last."""
+
+    HEADER_PREFIX = "[Tutoring state]"
+
+    def __init__(self):
+        self.problems = OrderedDict()
+
+    def resolve_concept(self, concept: str) -> str:
+        """
+        The problem a concept refers to, matching rewordings like 'binary search' /
+        'binary search bug'; no concept means the problem being worked on.
+        """
+        key = normalize_concept(concept)
+        if not key and self.problems:
+            return next(reversed(self.problems))
+        if key not in self.problems:
+            key = next((known for known in reversed(self.problems) if known and (known in key or key in known)), key)
+        return key
+
+    def _problem(self, concept: str) -> ProblemState:
+        """The state for a concept (see resolve_concept), created if new."""
+        key = self.resolve_concept(concept)
+        if key not in self.problems:
+            self.problems[key] = ProblemState(key)
+            while len(self.problems) > MAX_PROBLEMS:
+                self.problems.popitem(last=False)
+        self.problems.move_to_end(key)
+        return self.problems[key]
+
+    @property
+    def current(self):
+        return self.problems[next(reversed(self.problems))] if self.problems else None
+
+    def next_hint_level(self, concept: str) -> int:
+        """Level for the next hint on a concept, advancing the state."""
+        problem = self._problem(concept)
+        level = min(problem.hint_level, MAX_HINT_LEVEL)
+        problem.hint_level = min(problem.hint_level + 1, MAX_HINT_LEVEL + 1)
+        problem.apply('hint')
+        return level
+
+    def record_verdict(self, concept: str, result: str):
+        """Update a concept from a detect_completion result."""
+        verdict = parse_outcome(result)
+        problem = self._problem(concept)
+        problem.attempts += 1
+        problem.last_verdict = verdict or problem.last_verdict
+        if verdict == 'PARTIAL':
+            problem.partials += 1
+        if verdict:
+            problem.apply(verdict)
+
+    def header(self) -> str:
+        """One line for the model, or '' before any hint or check."""
+        problem = self.current
+        return f"{self.HEADER_PREFIX} {problem.header()}" if problem else ""
+
+    def with_header(self, message: str) -> str:
+        header = self.header()
+        return f"{header}\n{message}" if header else message
+
+    @classmethod
+    def strip_header(cls, message: str) -> str:
+        """The student's message without the header with_header() added (for display and saving)."""
+        if not message.startswith(cls.HEADER_PREFIX):
+            return message
+        return message.partition('\n')[2]
+
+    def wrap_tools(self, tool_registry: dict) -> dict:
+        """Return a copy of a tool registry where generate_hint levels come from this state."""
+        wrapped = dict(tool_registry)
+        if 'generate_hint' in wrapped:
+            generate_hint = wrapped['generate_hint']
+
+            @functools.wraps(generate_hint)
+            def hint_wrapper(problem: str, hint_level: int = None) -> str:
+                # The model's hint_level, if it still sends one, is ignored
+                return generate_hint(problem, self.next_hint_level(problem))
+
+            wrapped['generate_hint'] = hint_wrapper
+        if 'detect_completion' in wrapped:
+            detect_completion = wrapped['detect_completion']
+
+            @functools.wraps(detect_completion)
+            def completion_wrapper(response: str, concept: str) -> str:
+                result = detect_completion(response, concept)
+                self.record_verdict(concept, result)
+                return result
+
+            wrapped['detect_completion'] = completion_wrapper
+        return wrapped
+
+    def to_dict(self) -> dict:
+        return {'problems': [problem.to_dict() for problem in self.problems.values()]}
+
+    def restore(self, data: dict):
+        """Load a to_dict() copy in place (wrapped tools keep pointing at this object)."""
+        self.problems.clear()
+        for fields in (data or {}).get('problems', []):
+            self.problems[fields['concept']] = ProblemState(**fields)
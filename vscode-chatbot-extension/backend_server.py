@@ -1,13 +1,24 @@
 """
 Flask API server for the Autonomous Teaching Agent
 Provides REST API for VS Code extension to communicate with the agent
+
+The port is bound straight away: pyagentspec/wayflowcore are imported and
+the agent is built by a background warm-up, tracked by the `ready` flag of
+/health. Endpoints that don't need the LLM (/analyze, /run, /index, ...)
+work during warm-up; /chat waits for it. Set COMPTUTOR_EAGER_START=1 to
+build the agent before serving instead.
 """
 import os
 import warnings
 import json
+import uuid
+import functools
+import getpass
+import threading
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 
 warnings.filterwarnings('ignore')
@@ -17,23 +28,62 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from autonomous_mentor import create_teaching_agent, TeachingTools
-from wayflowcore.agentspec import AgentSpecLoader
-from wayflowcore import MessageType
+from tracing import tracer, trace_tools, estimate_tokens
+from logging_setup import configure_logging, get_logger
+from code_index import get_workspace_index
+from context_packing import render_file_context, parse_token_budget
+from prefetch import Prefetcher
+from executors import get_executor, stream_execute
+from conversation_snapshot import snapshot_messages, restore_conversation, SnapshotError
+from pagination import parse_page_args, paginate
+from tutoring_state import TutoringState
+from model_routing import RoutedConversation, get_model_router
+from learning_analytics import (SessionRecorder, get_analytics_store, run_report, instructor_auth_error,
+                                REPORTS as ANALYTICS_REPORTS)
 
 # TEMPORARY: Set API key if not already in environment
 # TODO: Remove this before committing - use system environment variable instead
 if not os.environ.get('OPENAI_API_KEY'):
     os.environ['OPENAI_API_KEY'] = 'tgp_v1_vW09RC97sOgr4CxmYdfF9OF9LlY_ED73B8QFP4gzaA8'
 
+# Queue-based logging with trace ids; COMPTUTOR_PROFILE=production for serving
+logging_config = configure_logging()
+log = get_logger('backend')
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for VS Code extension
 
 # Global agent state
-agent_instance = None
+routed_conversation = None
 conversation_instance = None
 tools_registry = None
 message_index = -1
 
+# Background warm-up (imports + agent build) started by start_warmup()
+agent_lock = threading.Lock()
+warmup_thread = None
+warmup_error = None
+
+# One chat turn at a time: held for a whole /chat turn and by everything that
+# replaces or snapshots the conversation (/init, /reset, /save, /restore).
+# A client that stops waiting does not stop the turn, so the next /chat waits
+# for it rather than running on the same conversation concurrently.
+turn_lock = threading.Lock()
+
+# Hint levels, completion outcomes and summaries of the current conversation
+# feed learning analytics; the student is whoever runs the extension
+STUDENT_ID = os.environ.get('COMPTUTOR_STUDENT_ID') or getpass.getuser()
+recorder = None
+
+# Hint level, checks and last verdict per problem, shown to the model each turn
+tutoring = TutoringState()
+
+# Last few run_code errors, used to rank which parts of the file to send
+recent_run_errors = deque(maxlen=3)
+
+# analyze_code / run_code results computed ahead of time via /prefetch
+prefetcher = Prefetcher()
+
 # Conversation storage
 CONVERSATIONS_DIR = Path(__file__).parent / "saved_conversations"
 CONVERSATIONS_DIR.mkdir(exist_ok=True)
@@ -41,44 +91,194 @@ CONVERSATIONS_DIR.mkdir(exist_ok=True)
 
 def initialize_agent():
     """Initialize the teaching agent and conversation."""
-    global agent_instance, conversation_instance, tools_registry, message_index
+    with agent_lock:
+        return _initialize_agent()
+
 
-    # Create agent
-    agent_instance = create_teaching_agent()
+def _initialize_agent():
+    global routed_conversation, conversation_instance, tools_registry, message_index, recorder
+    from wayflowcore.agentspec import AgentSpecLoader
+    recent_run_errors.clear()
+    recorder = SessionRecorder(get_analytics_store(), STUDENT_ID, uuid.uuid4().hex,
+                               resolve_concept=tutoring.resolve_concept)
+    tutoring.restore(None)
 
-    # Create tool registry
+    # Create tool registry (each tool call is recorded as a span)
     tools = TeachingTools()
-    tools_registry = {
-        "analyze_code": tools.analyze_code,
-        "run_code": tools.run_code,
+    tools_registry = trace_tools(tutoring.wrap_tools(recorder.wrap_tools({
+        "analyze_code": prefetcher.cached_tool("analyze_code", tools.analyze_code),
+        "run_code": _remember_run_errors(prefetcher.cached_tool("run_code", tools.run_code)),
+        "search_code": tools.search_code,
         "generate_hint": tools.generate_hint,
         "check_understanding": tools.check_understanding,
         "detect_completion": tools.detect_completion,
         "end_session": tools.end_session,
-    }
+    })))
+
+    # Start the conversation; each turn runs on the model tier the router
+    # picks, with one agent per tier built on first use
+    registry = tools_registry
+
+    def load_agent(tier):
+        return AgentSpecLoader(registry).load_component(create_teaching_agent(tier.llm_config()))
 
-    # Load agent and start conversation
-    executable_agent = AgentSpecLoader(tools_registry).load_component(agent_instance)
-    conversation_instance = executable_agent.start_conversation()
+    routed_conversation = RoutedConversation(get_model_router(), load_agent)
+    conversation_instance = routed_conversation.conversation
     message_index = -1
 
     return True
 
 
+def _remember_run_errors(run_code):
+    """Wrap run_code so error output is kept for context ranking."""
+    @functools.wraps(run_code)
+    def wrapper(code: str, test_input: str = "", language: str = "python") -> str:
+        result = run_code(code, test_input, language)
+        if 'ERROR:' in result:
+            recent_run_errors.append(result)
+        return result
+
+    return wrapper
+
+
+def _warm_up():
+    """Import the LLM stack and build the agent (runs in the warm-up thread)."""
+    global warmup_error
+    try:
+        with tracer.span('startup.warmup'), agent_lock:
+            # /init, /reset or /restore may already have built one
+            if conversation_instance is None:
+                _initialize_agent()
+        log.info("Agent ready")
+    except Exception as e:
+        warmup_error = str(e)
+        log.exception("Agent warm-up failed")
+
+
+def start_warmup():
+    """Start building the agent in the background, so the server can listen immediately."""
+    global warmup_thread
+    warmup_thread = threading.Thread(target=_warm_up, name='agent-warmup', daemon=True)
+    warmup_thread.start()
+
+
+def ensure_agent():
+    """Wait for the warm-up to finish, initializing here if it didn't produce an agent."""
+    if warmup_thread is not None:
+        warmup_thread.join()
+    if conversation_instance is None:
+        initialize_agent()
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint."""
+    """
+    Health check endpoint. Answers as soon as the port is bound; `ready`
+    turns true once the agent is loaded and /chat can respond without waiting.
+    """
+    ready = conversation_instance is not None
     return jsonify({
         'status': 'healthy',
-        'agent_initialized': conversation_instance is not None
+        'ready': ready,
+        'agent_initialized': ready,
+        'warming_up': warmup_thread is not None and warmup_thread.is_alive(),
+        'warmup_error': warmup_error
     })
 
 
+@app.route('/analytics/<report>', methods=['GET'])
+def analytics(report):
+    """
+    Read-only learning analytics for instructors (see learning_analytics.py).
+
+    Reports:
+        hints      - concepts by number of hints requested (?since=, ?limit=)
+        outcomes   - UNDERSTOOD / PARTIAL counts per concept (?since=)
+        mastery    - median / p90 turns to UNDERSTOOD per concept (?concept=)
+        student    - one student's progress per concept (?student_id=)
+        sessions   - latest end_session summaries (?limit=)
+    Requires `Authorization: Bearer $COMPTUTOR_INSTRUCTOR_TOKEN`; without that
+    variable only localhost requests are answered.
+    """
+    denied = instructor_auth_error(request.headers, request.remote_addr, allow_local=True)
+    if denied:
+        error, status = denied
+        return jsonify({'success': False, 'error': error}), status
+    if report not in ANALYTICS_REPORTS:
+        return jsonify({
+            'success': False,
+            'error': f"Unknown report '{report}'",
+            'reports': list(ANALYTICS_REPORTS)
+        }), 404
+    try:
+        return jsonify({
+            'success': True,
+            'report': report,
+            'rows': run_report(report, request.args)
+        })
+    except (KeyError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': f"Missing or invalid parameter: {e}"
+        }), 400
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Latency histograms and size counters aggregated from trace spans,
+    calls, escalations, estimated tokens and cost per model tier, and the
+    log queue (profile, queued and dropped records).
+
+    Query parameters:
+        format=prometheus  - Prometheus text exposition instead of JSON
+    """
+    if request.args.get('format') == 'prometheus':
+        return Response(tracer.metrics.to_prometheus(), mimetype='text/plain; version=0.0.4')
+    return jsonify({
+        'success': True,
+        'metrics': tracer.metrics.snapshot(),
+        'routing': get_model_router().stats(),
+        'logging': logging_config.stats()
+    })
+
+
+def _record_llm_span(execute_span, messages, new_messages):
+    """
+    Record the LLM share of an execute() call as a synthetic span.
+
+    wayflowcore does not expose per-call hooks, so LLM time is derived as the
+    execute duration minus the time spent in tool spans, and token counts are
+    estimated from message sizes.
+    """
+    from wayflowcore import MessageType
+
+    llm_calls = sum(
+        1 for m in new_messages
+        if m.message_type == MessageType.TOOL_REQUEST or 'AGENT' in str(m.message_type).upper()
+    )
+    prompt_text = ''.join(str(getattr(m, 'content', '') or '') for m in messages[:len(messages) - len(new_messages)])
+    completion_text = ''.join(
+        str(getattr(m, 'content', '') or '') + str(getattr(m, 'tool_requests', '') or '')
+        for m in new_messages
+        if m.message_type == MessageType.TOOL_REQUEST or 'AGENT' in str(m.message_type).upper()
+    )
+    tracer.record_span(
+        'llm',
+        max(execute_span.duration_ms - execute_span.child_ms, 0.0),
+        calls=llm_calls,
+        prompt_tokens=estimate_tokens(prompt_text),
+        completion_tokens=estimate_tokens(completion_text),
+        tokens_estimated=True,
+    )
+
+
 @app.route('/init', methods=['POST'])
 def init_agent():
     """Initialize or reset the agent."""
     try:
-        initialize_agent()
+        with turn_lock:
+            initialize_agent()
         return jsonify({
             'success': True,
             'message': 'Agent initialized successfully'
@@ -102,114 +302,156 @@ def chat():
             "fileName": "example.py",
             "content": "code content...",
             "languageId": "python"
-        }
+        },
+        "context_tokens": [optional] token budget for the attached file
     }
-    """
-    global conversation_instance, message_index
 
-    if conversation_instance is None:
-        initialize_agent()
+    Large files are not sent whole: only the functions/classes most relevant
+    to the message and recent run_code errors are packed into the budget.
 
-    try:
-        data = request.json
-        user_message = data.get('message', '')
-        file_context = data.get('file_context', None)
-
-        # Add file context to message if provided
-        if file_context:
-            context_message = f"\n\n[Current file: {file_context.get('fileName', 'unknown')}]\n"
-            if 'content' in file_context:
-                context_message += f"```{file_context.get('languageId', '')}\n{file_context['content']}\n```"
-            user_message = user_message + context_message
-
-        # Send user message to agent
-        conversation_instance.append_user_message(user_message)
-
-        # Execute conversation
-        conversation_instance.execute()
-        messages = conversation_instance.get_messages()
-
-        # Collect new messages - only get ASSISTANT messages for response
-        responses = []
-        tool_actions = []
-        assistant_messages = []
-
-        for message in messages[message_index + 1:]:
-            # Track tool usage
-            if message.message_type == MessageType.TOOL_REQUEST:
-                # Extract tool names - try different attribute names
-                tool_names = []
-                for req in message.tool_requests:
-                    if hasattr(req, 'name'):
-                        tool_names.append(req.name)
-                    elif hasattr(req, 'tool_name'):
-                        tool_names.append(req.tool_name)
-                    elif hasattr(req, 'tool'):
-                        tool_names.append(req.tool)
-                    else:
-                        tool_names.append(str(req))
-
-                if tool_names:
-                    tool_actions.append({
-                        'type': 'tool_use',
-                        'tools': tool_names
-                    })
-
-            # Skip tool-related messages (tool results, etc)
-            elif hasattr(message, 'tool_requests') and message.tool_requests:
-                continue
+    Turns are serialized: a /chat that arrives while another turn is running
+    waits for it, then answers with only its own new messages.
+    """
+    global conversation_instance, message_index
 
-            # Collect assistant responses (has content but no tool_requests)
-            elif hasattr(message, 'content') and message.content:
-                # Skip user messages - only collect assistant responses
-                # User messages were already added via append_user_message, so we skip them here
-                message_str = str(message.message_type) if hasattr(message, 'message_type') else ''
-                if 'USER' not in message_str.upper():
-                    # Ensure content is a string
-                    content = str(message.content) if not isinstance(message.content, str) else message.content
-                    assistant_messages.append(content)
-
-        # Consolidate all assistant messages into one response
-        if assistant_messages:
-            # Join multiple messages with double newline
-            consolidated_response = '\n\n'.join(assistant_messages)
-            responses.append({
-                'type': 'text',
-                'content': consolidated_response
+    with tracer.span('http.chat', endpoint='/chat') as request_span, turn_lock:
+        try:
+            # Inside the try, so a failed warm-up or agent build is a JSON error too
+            ensure_agent()
+            from wayflowcore import MessageType
+
+            data = request.json
+            user_message = data.get('message', '')
+            file_context = data.get('file_context', None)
+
+            # Add file context to message if provided, keeping only the
+            # sections relevant to the question within the token budget
+            if file_context:
+                with tracer.span('context.pack') as pack_span:
+                    context_message = render_file_context(
+                        file_context,
+                        user_message,
+                        recent_errors=list(recent_run_errors),
+                        token_budget=parse_token_budget(data.get('context_tokens'))
+                    )
+                    pack_span.set_attribute('input_bytes', len(file_context.get('content', '').encode('utf-8')))
+                    pack_span.set_attribute('output_bytes', len(context_message.encode('utf-8')))
+                user_message = user_message + context_message
+
+            request_span.set_attribute('input_bytes', len(user_message.encode('utf-8')))
+
+            recorder.turn += 1
+
+            # Execute conversation (LLM calls + tool calls) on the model tier the
+            # router picks from what the student typed; the model sees the
+            # message prefixed with the tutoring state
+            problem = tutoring.current
+            with tracer.span('agent.execute') as execute_span:
+                try:
+                    routing = routed_conversation.execute(
+                        tutoring.with_header(user_message),
+                        route_on=data.get('message', ''),
+                        phase=problem.phase if problem else None,
+                        turn=recorder.turn,
+                        rollback=[tutoring, recorder],
+                    )
+                finally:
+                    # Only the attempt that produced the reply is left to write
+                    recorder.flush()
+                execute_span.set_attribute('tier', routing['tier'])
+            conversation_instance = routed_conversation.conversation
+            messages = conversation_instance.get_messages()
+            _record_llm_span(execute_span, messages, messages[message_index + 1:])
+
+            # Collect new messages - only get ASSISTANT messages for response
+            responses = []
+            tool_actions = []
+            assistant_messages = []
+
+            for message in messages[message_index + 1:]:
+                # Track tool usage
+                if message.message_type == MessageType.TOOL_REQUEST:
+                    # Extract tool names - try different attribute names
+                    tool_names = []
+                    for req in message.tool_requests:
+                        if hasattr(req, 'name'):
+                            tool_names.append(req.name)
+                        elif hasattr(req, 'tool_name'):
+                            tool_names.append(req.tool_name)
+                        elif hasattr(req, 'tool'):
+                            tool_names.append(req.tool)
+                        else:
+                            tool_names.append(str(req))
+
+                    if tool_names:
+                        tool_actions.append({
+                            'type': 'tool_use',
+                            'tools': tool_names
+                        })
+
+                # Skip tool-related messages (tool results, etc)
+                elif hasattr(message, 'tool_requests') and message.tool_requests:
+                    continue
+
+                # Collect assistant responses (has content but no tool_requests)
+                elif hasattr(message, 'content') and message.content:
+                    # Skip user messages - only collect assistant responses
+                    # User messages were already added via append_user_message, so we skip them here
+                    message_str = str(message.message_type) if hasattr(message, 'message_type') else ''
+                    if 'USER' not in message_str.upper():
+                        # Ensure content is a string
+                        content = str(message.content) if not isinstance(message.content, str) else message.content
+                        assistant_messages.append(content)
+
+            # Consolidate all assistant messages into one response
+            if assistant_messages:
+                # Join multiple messages with double newline
+                consolidated_response = '\n\n'.join(assistant_messages)
+                responses.append({
+                    'type': 'text',
+                    'content': consolidated_response
+                })
+
+            log.debug("Chat turn processed", extra={
+                'new_messages': len(messages[message_index + 1:]),
+                'tool_actions': len(tool_actions),
+                'assistant_messages': len(assistant_messages),
+                'response_chars': len(responses[0]['content']) if responses else 0,
+                'tier': routing['tier'],
             })
 
-        # Debug logging
-        print(f"[DEBUG] Processed {len(messages[message_index + 1:])} new messages")
-        print(f"[DEBUG] Tool actions: {len(tool_actions)}")
-        print(f"[DEBUG] Assistant messages: {len(assistant_messages)}")
-        if responses:
-            print(f"[DEBUG] Sending response length: {len(responses[0]['content'])} chars")
-
-        message_index = len(messages) - 1
-
-        return jsonify({
-            'success': True,
-            'responses': responses,
-            'tool_actions': tool_actions,
-            'message_count': len(messages)
-        })
-
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"ERROR in /chat endpoint:\n{error_details}")
-        return jsonify({
-            'success': False,
-            'error': str(e),
-            'details': 'Check server logs for full traceback'
-        }), 500
+            message_index = len(messages) - 1
+
+            with tracer.span('http.serialize') as serialize_span:
+                response = jsonify({
+                    'success': True,
+                    'responses': responses,
+                    'tool_actions': tool_actions,
+                    'message_count': len(messages),
+                    'model_tier': routing['tier'],
+                    'trace_id': request_span.trace_id
+                })
+                serialize_span.set_attribute('output_bytes', response.content_length or 0)
+            return response
+
+        except Exception as e:
+            log.exception("Error in /chat")
+            request_span.status = 'error'
+            request_span.set_attribute('error', str(e))
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'details': 'Check server logs for full traceback',
+                'trace_id': request_span.trace_id
+            }), 500
 
 
 @app.route('/reset', methods=['POST'])
 def reset_conversation():
     """Reset the conversation to start fresh."""
     try:
-        initialize_agent()
+        with turn_lock:
+            initialize_agent()
         return jsonify({
             'success': True,
             'message': 'Conversation reset successfully'
@@ -241,8 +483,9 @@ def analyze_code():
                 'error': 'No code provided'
             }), 400
 
-        tools = TeachingTools()
-        analysis = tools.analyze_code(code)
+        analyze = prefetcher.cached_tool("analyze_code", TeachingTools.analyze_code)
+        with tracer.span('http.analyze', endpoint='/analyze', input_bytes=len(code.encode('utf-8'))):
+            analysis = analyze(code)
 
         return jsonify({
             'success': True,
@@ -256,6 +499,54 @@ def analyze_code():
         }), 500
 
 
+@app.route('/prefetch', methods=['POST'])
+def prefetch():
+    """
+    Warm the tool cache for a file the student is looking at.
+    Called (debounced) by the extension on save and editor change; returns
+    immediately while the work runs in the background.
+
+    Request body:
+    {
+        "code": "file content",
+        "languageId": "python",
+        "filePath": [optional] absolute path, re-indexed for search_code,
+        "run": [optional] also do a dry run_code with empty input
+               (any language with a local toolchain, see /run)
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        code = data.get('code', '')
+
+        if not code:
+            return jsonify({
+                'success': False,
+                'error': 'No code provided'
+            }), 400
+
+        scheduled = {'analyze_code': prefetcher.schedule("analyze_code", TeachingTools.analyze_code, code=code)}
+        language = data.get('languageId', 'python')
+        if data.get('run') and get_executor(language) is not None:
+            scheduled['run_code'] = prefetcher.schedule(
+                "run_code", TeachingTools.run_code, code=code, test_input="", language=language
+            )
+        if data.get('filePath'):
+            get_workspace_index().update_file(data['filePath'])
+
+        return jsonify({
+            'success': True,
+            'scheduled': scheduled,
+            'cache': prefetcher.cache.stats()
+        }), 202
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/run', methods=['POST'])
 def run_code():
     """
@@ -264,13 +555,18 @@ def run_code():
     Request body:
     {
         "code": "code to run",
-        "test_input": "optional test input"
+        "test_input": "optional test input",
+        "language": "optional languageId: python (default), c, cpp or javascript"
     }
+
+    Compiled languages use the locally installed compiler; unchanged
+    source reuses the previously built program.
     """
     try:
         data = request.json
         code = data.get('code', '')
         test_input = data.get('test_input', '')
+        language = data.get('language') or data.get('languageId') or 'python'
 
         if not code:
             return jsonify({
@@ -279,10 +575,13 @@ def run_code():
             }), 400
 
         tools = TeachingTools()
-        result = tools.run_code(code, test_input)
+        with tracer.span('http.run', endpoint='/run', language=language, input_bytes=len(code.encode('utf-8'))):
+            result = tools.run_code(code, test_input, language)
 
         # Parse the result to separate output and error
         has_error = 'ERROR:' in result
+        if has_error:
+            recent_run_errors.append(result)
 
         return jsonify({
             'success': True,
@@ -297,6 +596,79 @@ def run_code():
         }), 500
 
 
+@app.route('/run/stream', methods=['POST'])
+def run_code_stream():
+    """
+    Execute code and stream its output while it runs, as NDJSON lines:
+        {"stream": "stdout" | "stderr", "data": "..."}
+        {"done": true, "result": "<same report as /run>", "has_error": ..., "timed_out": ...}
+
+    Request body: same as /run. A program that times out still returns the
+    output it printed, so infinite loops can be diagnosed.
+    """
+    data = request.get_json(silent=True) or {}
+    code = data.get('code', '')
+    test_input = data.get('test_input', '')
+    language = data.get('language') or data.get('languageId') or 'python'
+
+    if not code:
+        return jsonify({
+            'success': False,
+            'error': 'No code provided'
+        }), 400
+
+    def generate():
+        with tracer.span('http.run_stream', endpoint='/run/stream', language=language,
+                         input_bytes=len(code.encode('utf-8'))) as span:
+            for event in stream_execute(code, language, test_input):
+                if event.get('done'):
+                    span.set_attribute('timed_out', event['timed_out'])
+                    if event['has_error']:
+                        recent_run_errors.append(event['result'])
+                yield json.dumps(event, ensure_ascii=False) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/index', methods=['GET', 'POST'])
+def workspace_index():
+    """
+    Inspect or refresh the workspace code index used by the search_code tool.
+
+    POST body (optional):
+    {
+        "paths": ["relative/or/absolute/file.py", ...]  # re-index just these files
+    }
+    """
+    try:
+        index = get_workspace_index()
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            paths = data.get('paths')
+            if paths:
+                updated = sum(1 for path in paths if index.update_file(path))
+                refreshed = {'updated': updated}
+            else:
+                refreshed = index.refresh(force=True)
+            return jsonify({
+                'success': True,
+                'refreshed': refreshed,
+                'index': index.stats()
+            })
+
+        return jsonify({
+            'success': True,
+            'index': index.stats()
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/save', methods=['POST'])
 def save_conversation():
     """
@@ -321,15 +693,18 @@ def save_conversation():
         title = data.get('title', f"Conversation {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         file_context = data.get('file_context', None)
 
-        # Get all messages
-        messages = conversation_instance.get_messages()
+        # Get all messages (not halfway through a turn)
+        with turn_lock:
+            messages = list(conversation_instance.get_messages())
+            snapshot = snapshot_messages(messages, message_index)
+            tutoring_state = tutoring.to_dict()
 
-        # Serialize messages
+        # Serialize messages as the student saw them (the snapshot keeps the tutoring headers)
         serialized_messages = []
         for msg in messages:
             msg_data = {
                 'type': str(msg.message_type) if hasattr(msg, 'message_type') else 'unknown',
-                'content': str(msg.content) if hasattr(msg, 'content') else '',
+                'content': TutoringState.strip_header(str(msg.content)) if hasattr(msg, 'content') else '',
             }
             serialized_messages.append(msg_data)
 
@@ -341,7 +716,10 @@ def save_conversation():
             'timestamp': datetime.now().isoformat(),
             'file_context': file_context,
             'messages': serialized_messages,
-            'message_count': len(serialized_messages)
+            'message_count': len(serialized_messages),
+            # Restorable copy (tool requests/results, sender/recipients, message index) used by /restore
+            'snapshot': snapshot,
+            'tutoring': tutoring_state
         }
 
         # Save to file
@@ -356,8 +734,7 @@ def save_conversation():
         })
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("Could not save conversation")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -382,7 +759,7 @@ def list_conversations():
                         'file_context': data.get('file_context')
                     })
             except Exception as e:
-                print(f"Error loading {file_path}: {e}")
+                log.warning("Could not load saved conversation %s: %s", file_path, e)
                 continue
 
         # Sort by timestamp (newest first)
@@ -400,9 +777,73 @@ def list_conversations():
         }), 500
 
 
+def _load_saved_conversation(file_path: Path) -> dict:
+    """Read a saved conversation, reusing the parsed file while it is unchanged."""
+    mtime = file_path.stat().st_mtime
+    cached = _saved_conversation_cache.get(file_path.name)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    # Conversations saved before /save stripped them still carry tutoring headers
+    for message in data.get('messages', []):
+        message['content'] = TutoringState.strip_header(message.get('content') or '')
+
+    if len(_saved_conversation_cache) >= 16:
+        _saved_conversation_cache.pop(next(iter(_saved_conversation_cache)))
+    _saved_conversation_cache[file_path.name] = (mtime, data)
+    return data
+
+
+_saved_conversation_cache = {}
+
+
 @app.route('/conversation/<conversation_id>', methods=['GET'])
 def get_conversation(conversation_id):
-    """Load a specific conversation."""
+    """
+    Load a specific conversation, one page of messages at a time.
+
+    Query parameters (all optional):
+        since=N   - messages with index >= N
+        before=N  - the page of messages just older than index N
+        limit=M   - page size (default 50, max 200)
+    Without since/before the newest page is returned.
+    """
+    try:
+        file_path = CONVERSATIONS_DIR / f"{conversation_id}.json"
+
+        if not file_path.exists():
+            return jsonify({
+                'success': False,
+                'error': 'Conversation not found'
+            }), 404
+
+        data = _load_saved_conversation(file_path)
+        page = paginate(data.get('messages', []), **parse_page_args(request.args))
+
+        # The snapshot is only needed server-side for /restore
+        conversation = {k: v for k, v in data.items() if k not in ('messages', 'snapshot')}
+        conversation['messages'] = page.pop('messages')
+
+        return jsonify({
+            'success': True,
+            'conversation': conversation,
+            'page': page
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/conversation/<conversation_id>/restore', methods=['POST'])
+def restore_saved_conversation(conversation_id):
+    """Make a saved conversation the active one, so the student can continue it."""
+    global message_index
+
     try:
         file_path = CONVERSATIONS_DIR / f"{conversation_id}.json"
 
@@ -415,11 +856,29 @@ def get_conversation(conversation_id):
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
 
+        if 'snapshot' not in data:
+            return jsonify({
+                'success': False,
+                'error': 'Conversation was saved without a snapshot and cannot be restored'
+            }), 400
+
+        with turn_lock:
+            initialize_agent()
+            message_index, _ = restore_conversation(conversation_instance, data['snapshot'])
+            recorder.turn = sum(1 for m in data.get('messages', []) if m.get('type', '').endswith('USER'))
+            tutoring.restore(data.get('tutoring'))
+
         return jsonify({
             'success': True,
-            'conversation': data
+            'message': f"Conversation restored: {data.get('title')}",
+            'message_count': len(conversation_instance.get_messages())
         })
 
+    except SnapshotError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -464,14 +923,25 @@ if __name__ == '__main__':
     print("  POST   /reset                   - Reset conversation")
     print("  POST   /analyze                 - Analyze code")
     print("  POST   /run                     - Execute code")
-    print("  GET    /health                  - Health check")
+    print("  POST   /run/stream              - Execute code, streaming output (NDJSON)")
+    print("  POST   /prefetch                - Precompute analysis for a file")
+    print("  GET    /health                  - Health check (ready once agent is loaded)")
+    print("  GET    /metrics                 - Latency histograms from traces")
+    print("  GET    /analytics/<report>      - Learning analytics for instructors (read-only)")
+    print("  GET    /index                   - Workspace code index stats")
+    print("  POST   /index                   - Refresh workspace code index")
     print("  POST   /save                    - Save current conversation")
     print("  GET    /conversations           - List saved conversations")
     print("  GET    /conversation/<id>       - Load specific conversation")
+    print("  POST   /conversation/<id>/restore - Continue a saved conversation")
     print("  DELETE /conversation/<id>       - Delete conversation")
     print("=" * 60)
 
-    # Initialize agent on startup
-    initialize_agent()
+    if os.environ.get('COMPTUTOR_EAGER_START') == '1':
+        initialize_agent()
+    else:
+        # Listen right away; the agent loads in the background
+        start_warmup()
 
-    app.run(host='localhost', port=5000, debug=True, use_reloader=False)
+    # Debug mode (interactive debugger, verbose errors) only in the development profile
+    app.run(host='localhost', port=5000, debug=logging_config.flask_debug, use_reloader=False)
@@ -0,0 +1,277 @@
+import * as http from 'http';
+
+export interface RequestOptions {
+    timeoutMs?: number;          // whole request for JSON calls, idle time between chunks for streams
+    retries?: number;            // extra attempts after a transport error or 502/503/504
+    idempotent?: boolean;        // POSTs are only retried when safe to repeat
+    signal?: AbortSignal;        // abort to cancel (see supersede())
+}
+
+export class RequestCancelledError extends Error {
+    constructor(endpoint: string) {
+        super(`Request to ${endpoint} was cancelled`);
+        this.name = 'RequestCancelledError';
+    }
+}
+
+export class RequestTimeoutError extends Error {
+    constructor(endpoint: string, timeoutMs: number) {
+        super(`No response from ${endpoint} within ${timeoutMs} ms`);
+        this.name = 'RequestTimeoutError';
+    }
+}
+
+// Methods that are safe to repeat when a response was lost
+const IDEMPOTENT_METHODS = new Set(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE']);
+// Gateway-style statuses worth another attempt; anything else is the backend's answer
+const RETRY_STATUSES = new Set([502, 503, 504]);
+const DEFAULT_TIMEOUT_MS = 15000;
+const DEFAULT_RETRIES = 2;
+const BACKOFF_BASE_MS = 250;
+const BACKOFF_MAX_MS = 4000;
+// Consecutive failed requests before the backend counts as down
+const FAILURES_TO_DISCONNECT = 2;
+// A response this recent answers a health check without calling /health
+const HEALTH_FRESH_MS = 10000;
+
+/**
+ * HTTP client for the teaching agent backend.
+ *
+ * All calls share one keep-alive agent, so the TCP connection is reused
+ * instead of being set up for every request. Each call has a timeout.
+ * Idempotent calls are retried with exponential backoff and jitter.
+ * A request keyed with supersede() cancels the previous one with that key.
+ * Connection health comes from the responses themselves; /health is only
+ * called when there has been no recent traffic.
+ */
+export class BackendClient {
+    private _agent = new http.Agent({ keepAlive: true, keepAliveMsecs: 1000, maxSockets: 8 });
+    private _connected = false;
+    private _consecutiveFailures = 0;
+    private _lastResponseAt = 0;
+    private _inFlight = new Map<string, AbortController>();
+
+    constructor(
+        private readonly _baseUrl: string,
+        private readonly _onHealthChange?: (connected: boolean) => void
+    ) {}
+
+    public get connected(): boolean {
+        return this._connected;
+    }
+
+    /**
+     * Returns a signal for a new request under `key` and cancels the
+     * previous one, e.g. a chat turn the student has already followed up on
+     */
+    public supersede(key: string): AbortSignal {
+        this._inFlight.get(key)?.abort();
+        const controller = new AbortController();
+        this._inFlight.set(key, controller);
+        return controller.signal;
+    }
+
+    /**
+     * Whether the backend is up, from recent traffic or (if there was none) a /health call
+     */
+    public async checkHealth(force: boolean = false): Promise<boolean> {
+        if (!force && this._connected && Date.now() - this._lastResponseAt < HEALTH_FRESH_MS) {
+            return true;
+        }
+        try {
+            const health = await this.request('/health', 'GET', undefined, { timeoutMs: 2000, retries: 0 });
+            return health.success !== false;
+        } catch (error) {
+            // An explicit probe is conclusive; no need to wait for a second failure
+            this._setConnected(false);
+            return false;
+        }
+    }
+
+    /**
+     * Sends a JSON request and resolves with the parsed body (whatever the HTTP status)
+     */
+    public async request(endpoint: string, method: string = 'POST', data?: any, options: RequestOptions = {}): Promise<any> {
+        const retryable = options.idempotent ?? IDEMPOTENT_METHODS.has(method);
+        const retries = options.retries ?? DEFAULT_RETRIES;
+
+        for (let attempt = 0; ; attempt++) {
+            try {
+                const { status, body } = await this._send(endpoint, method, data, options);
+                if (RETRY_STATUSES.has(status) && retryable && attempt < retries) {
+                    await this._backoff(attempt, options.signal, endpoint);
+                    continue;
+                }
+                try {
+                    return JSON.parse(body);
+                } catch (e) {
+                    return { success: false, error: 'Invalid response' };
+                }
+            } catch (error: any) {
+                if (error instanceof RequestCancelledError) {
+                    throw error;
+                }
+                // A keep-alive socket the server already closed fails before the
+                // request is processed, so even a POST can safely go again once
+                const staleSocket = error.reusedSocket && error.code === 'ECONNRESET' && attempt === 0;
+                if ((retryable || staleSocket) && attempt < retries) {
+                    await this._backoff(attempt, options.signal, endpoint);
+                    continue;
+                }
+                if (!(error instanceof RequestTimeoutError)) {
+                    this._recordFailure();
+                }
+                throw error;
+            }
+        }
+    }
+
+    /**
+     * POSTs to an NDJSON endpoint and calls onEvent for each line as it arrives.
+     * Streams are never retried (events may already have been delivered);
+     * the timeout applies to the gap between chunks, not the whole stream.
+     */
+    public stream(endpoint: string, data: any, onEvent: (event: any) => void, options: RequestOptions = {}): Promise<void> {
+        const timeoutMs = options.timeoutMs ?? DEFAULT_TIMEOUT_MS;
+        return new Promise((resolve, reject) => {
+            const url = new URL(endpoint, this._baseUrl);
+            const req = http.request({
+                hostname: url.hostname,
+                port: url.port,
+                path: url.pathname + url.search,
+                method: 'POST',
+                agent: this._agent,
+                signal: options.signal,
+                headers: {
+                    'Content-Type': 'application/json',
+                }
+            }, (res) => {
+                this._recordResponse();
+                res.setEncoding('utf8');
+                let buffered = '';
+                const emit = (line: string) => {
+                    if (!line) {
+                        return;
+                    }
+                    try {
+                        onEvent(JSON.parse(line));
+                    } catch (e) {
+                        console.error('Invalid stream event:', line);
+                    }
+                };
+                res.on('data', (chunk: string) => {
+                    // A chunk can end mid-line; keep the remainder for the next one
+                    buffered += chunk;
+                    const lines = buffered.split('\n');
+                    buffered = lines.pop() || '';
+                    lines.forEach(emit);
+                });
+                res.on('end', () => {
+                    emit(buffered);
+                    resolve();
+                });
+                res.on('error', reject);
+            });
+
+            req.setTimeout(timeoutMs, () => req.destroy(new RequestTimeoutError(endpoint, timeoutMs)));
+            req.on('error', (error: any) => {
+                if (options.signal?.aborted) {
+                    reject(new RequestCancelledError(endpoint));
+                    return;
+                }
+                if (!(error instanceof RequestTimeoutError)) {
+                    this._recordFailure();
+                }
+                reject(error);
+            });
+            req.end(JSON.stringify(data));
+        });
+    }
+
+    public dispose(): void {
+        this._inFlight.forEach(controller => controller.abort());
+        this._inFlight.clear();
+        this._agent.destroy();
+    }
+
+    private _send(endpoint: string, method: string, data: any, options: RequestOptions):
+        Promise<{ status: number; body: string }> {
+        const timeoutMs = options.timeoutMs ?? DEFAULT_TIMEOUT_MS;
+        return new Promise((resolve, reject) => {
+            if (options.signal?.aborted) {
+                reject(new RequestCancelledError(endpoint));
+                return;
+            }
+
+            const url = new URL(endpoint, this._baseUrl);
+            const payload = data === undefined ? undefined : JSON.stringify(data);
+            const headers: http.OutgoingHttpHeaders = { 'Content-Type': 'application/json' };
+            if (payload !== undefined) {
+                headers['Content-Length'] = Buffer.byteLength(payload);
+            }
+
+            const req = http.request({
+                hostname: url.hostname,
+                port: url.port,
+                path: url.pathname + url.search,
+                method: method,
+                agent: this._agent,
+                signal: options.signal,
+                headers: headers
+            }, (res) => {
+                let body = '';
+                res.setEncoding('utf8');
+                res.on('data', (chunk) => body += chunk);
+                res.on('end', () => {
+                    this._recordResponse();
+                    resolve({ status: res.statusCode || 0, body });
+                });
+                res.on('error', reject);
+            });
+
+            // Timer covers the whole exchange; req.setTimeout alone only catches idle sockets
+            const timer = setTimeout(() => req.destroy(new RequestTimeoutError(endpoint, timeoutMs)), timeoutMs);
+            req.on('close', () => clearTimeout(timer));
+            req.on('error', (error: any) => {
+                if (options.signal?.aborted) {
+                    reject(new RequestCancelledError(endpoint));
+                    return;
+                }
+                error.reusedSocket = req.reusedSocket;
+                reject(error);
+            });
+            req.end(payload);
+        });
+    }
+
+    private _backoff(attempt: number, signal: AbortSignal | undefined, endpoint: string): Promise<void> {
+        const delay = Math.min(BACKOFF_BASE_MS * 2 ** attempt, BACKOFF_MAX_MS) * (0.5 + Math.random());
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(resolve, delay);
+            signal?.addEventListener('abort', () => {
+                clearTimeout(timer);
+                reject(new RequestCancelledError(endpoint));
+            }, { once: true });
+        });
+    }
+
+    private _recordResponse(): void {
+        this._lastResponseAt = Date.now();
+        this._consecutiveFailures = 0;
+        this._setConnected(true);
+    }
+
+    private _recordFailure(): void {
+        this._consecutiveFailures++;
+        if (this._consecutiveFailures >= FAILURES_TO_DISCONNECT) {
+            this._setConnected(false);
+        }
+    }
+
+    private _setConnected(connected: boolean): void {
+        if (connected !== this._connected) {
+            this._connected = connected;
+            this._onHealthChange?.(connected);
+        }
+    }
+}
@@ -1,6 +1,6 @@
 import * as vscode from 'vscode';
 import { FileScanner, FileInfo } from './fileScanner';
-import * as http from 'http';
+import { BackendClient, RequestOptions, RequestCancelledError, RequestTimeoutError } from './backendClient';
 
 interface BackendResponse {
     success: boolean;
@@ -9,35 +9,63 @@ interface BackendResponse {
     error?: string;
 }
 
+// Messages kept in _conversationHistory; older ones are dropped (saved
+// conversations can be paged back in from the backend)
+const MAX_HISTORY = 200;
+// Messages per /conversation/<id> page when loading a saved conversation
+const HISTORY_PAGE_SIZE = 50;
+// A chat turn can run several LLM and tool calls (and a tier escalation)
+const CHAT_TIMEOUT_MS = 180000;
+// Longest silence between chunks of /run/stream (compiling included)
+const RUN_STREAM_IDLE_MS = 60000;
+
+interface SavedMessage {
+    type: string;
+    content: string;
+    index?: number;
+}
+
 export class ChatbotViewProvider implements vscode.WebviewViewProvider {
     public static readonly viewType = 'chatbotView';
     private _view?: vscode.WebviewView;
     private _conversationHistory: Array<{ role: 'user' | 'bot'; message: string }> = [];
     private _backendUrl = 'http://localhost:5000';
-    private _backendConnected = false;
+    private _client: BackendClient;
     private _statusCallback?: (connected: boolean) => void;
+    // Debounce timers and last prefetched version, per document URI
+    private _prefetchTimers = new Map<string, NodeJS.Timeout>();
+    private _lastPrefetchKeys = new Map<string, string>();
+    // True from sending a message until its reply (or error) is shown
+    private _turnPending = false;
 
     constructor(
         private readonly _extensionUri: vscode.Uri,
         statusCallback?: (connected: boolean) => void
     ) {
         this._statusCallback = statusCallback;
+        // Connection state follows the responses (or failures) of real requests
+        this._client = new BackendClient(this._backendUrl, (connected) => {
+            console.log(connected
+                ? 'Connected to teaching agent backend'
+                : 'Teaching agent backend not available, using local mode');
+            this._statusCallback?.(connected);
+        });
         this._checkBackendConnection();
     }
 
+    private get _backendConnected(): boolean {
+        return this._client.connected;
+    }
+
     private async _checkBackendConnection(): Promise<void> {
-        try {
-            const response = await this._makeRequest('/health', 'GET');
-            if (response.success !== false) {
-                this._backendConnected = true;
-                console.log('Connected to teaching agent backend');
-                this._statusCallback?.(true);
-            }
-        } catch (error) {
-            this._backendConnected = false;
-            console.log('Teaching agent backend not available, using local mode');
-            this._statusCallback?.(false);
-        }
+        await this._client.checkHealth(true);
+    }
+
+    public dispose(): void {
+        this._prefetchTimers.forEach(timer => clearTimeout(timer));
+        this._prefetchTimers.clear();
+        this._lastPrefetchKeys.clear();
+        this._client.dispose();
     }
 
     public async recheckConnection(): Promise<void> {
@@ -52,40 +80,102 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
         }
     }
 
-    private async _makeRequest(endpoint: string, method: string = 'POST', data?: any): Promise<any> {
-        return new Promise((resolve, reject) => {
-            const url = new URL(endpoint, this._backendUrl);
-            const options = {
-                hostname: url.hostname,
-                port: url.port,
-                path: url.pathname,
-                method: method,
-                headers: {
-                    'Content-Type': 'application/json',
-                }
-            };
-
-            const req = http.request(options, (res) => {
-                let body = '';
-                res.on('data', (chunk) => body += chunk);
-                res.on('end', () => {
-                    try {
-                        resolve(JSON.parse(body));
-                    } catch (e) {
-                        resolve({ success: false, error: 'Invalid response' });
-                    }
-                });
-            });
+    /**
+     * Asks the backend to precompute analyze_code for a document (debounced),
+     * so the agent's first tool call is already cached when the student hits send
+     */
+    public schedulePrefetch(document: vscode.TextDocument, run: boolean = false, delayMs: number = 800): void {
+        if (!this._backendConnected || document.uri.scheme !== 'file') {
+            return;
+        }
 
-            req.on('error', (e) => {
-                reject(e);
-            });
+        // Debounced per document, so switching files doesn't drop another file's pending prefetch
+        const uri = document.uri.toString();
+        const pending = this._prefetchTimers.get(uri);
+        if (pending) {
+            clearTimeout(pending);
+        }
 
-            if (data) {
-                req.write(JSON.stringify(data));
+        this._prefetchTimers.set(uri, setTimeout(async () => {
+            this._prefetchTimers.delete(uri);
+            const key = `${document.version}:${run}`;
+            if (key === this._lastPrefetchKeys.get(uri)) {
+                return;
             }
-            req.end();
-        });
+            this._lastPrefetchKeys.set(uri, key);
+
+            try {
+                await this._makeRequest('/prefetch', 'POST', {
+                    code: document.getText(),
+                    languageId: document.languageId,
+                    filePath: document.uri.fsPath,
+                    run: run
+                }, { idempotent: true });
+            } catch (error) {
+                // Prefetch is best-effort; the chat path reports connection problems
+            }
+        }, delayMs));
+    }
+
+    /**
+     * Drops a closed document's pending prefetch and its last prefetched version
+     */
+    public cancelPrefetch(document: vscode.TextDocument): void {
+        const uri = document.uri.toString();
+        const pending = this._prefetchTimers.get(uri);
+        if (pending) {
+            clearTimeout(pending);
+        }
+        this._prefetchTimers.delete(uri);
+        this._lastPrefetchKeys.delete(uri);
+    }
+
+    private _makeRequest(endpoint: string, method: string = 'POST', data?: any, options?: RequestOptions): Promise<any> {
+        return this._client.request(endpoint, method, data, options);
+    }
+
+    /**
+     * POSTs to an NDJSON endpoint and calls onEvent for each line as it arrives
+     */
+    private _streamRequest(endpoint: string, data: any, onEvent: (event: any) => void): Promise<void> {
+        return this._client.stream(endpoint, data, onEvent, { timeoutMs: RUN_STREAM_IDLE_MS });
+    }
+
+    /**
+     * Runs the active file on the backend, streaming its output into the panel
+     */
+    private async _runActiveFile() {
+        if (!this._backendConnected) {
+            this._sendSystemMessage('⚠️ Start the teaching agent backend to run code.');
+            return;
+        }
+
+        const activeFile = FileScanner.getActiveFile();
+        if (!activeFile) {
+            this._sendSystemMessage('ℹ️ No file is currently active. Open a file in the editor first.');
+            return;
+        }
+
+        const post = (message: any) => this._view?.webview.postMessage(message);
+        post({ type: 'runStart', title: `▶ Running ${activeFile.fileName}` });
+
+        try {
+            await this._streamRequest('/run/stream', {
+                code: activeFile.content,
+                language: activeFile.languageId
+            }, (event) => {
+                if (event.done) {
+                    this._remember('bot', event.result);
+                    post({ type: 'runEnd', result: event.result, hasError: event.has_error, timedOut: event.timed_out });
+                } else if (event.stream) {
+                    post({ type: 'runChunk', stream: event.stream, data: event.data });
+                } else if (event.success === false) {
+                    post({ type: 'runEnd', result: event.error, hasError: true, timedOut: false });
+                }
+            });
+        } catch (error) {
+            post({ type: 'runEnd', result: `Error: ${error}`, hasError: true, timedOut: false });
+        }
     }
 
     public resolveWebviewView(
@@ -110,6 +200,9 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
                 case 'scanFiles':
                     this._scanOpenFiles();
                     break;
+                case 'runActiveFile':
+                    await this._runActiveFile();
+                    break;
                 case 'resetAgent':
                     await this._resetAgent();
                     break;
@@ -129,6 +222,9 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
                 case 'loadConversation':
                     await this._loadConversation(data.conversationId);
                     break;
+                case 'loadOlder':
+                    await this._loadOlderMessages(data.conversationId, data.before);
+                    break;
                 case 'deleteConversation':
                     await this._deleteConversation(data.conversationId);
                     break;
@@ -143,8 +239,38 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
         this._sendBotMessage(greeting);
     }
 
+    private _remember(role: 'user' | 'bot', message: string) {
+        this._conversationHistory.push({ role, message });
+        if (this._conversationHistory.length > MAX_HISTORY) {
+            this._conversationHistory.splice(0, this._conversationHistory.length - MAX_HISTORY);
+        }
+    }
+
+    /**
+     * Handles one chat turn. Only one turn runs at a time: the panel disables
+     * its input until the reply arrives, and the backend serializes /chat,
+     * since a client that stops waiting does not stop the turn on the server.
+     */
     private async _handleUserMessage(userMessage: string) {
-        this._conversationHistory.push({ role: 'user', message: userMessage });
+        if (this._turnPending) {
+            this._sendSystemMessage('⏳ Still working on your previous message - please wait for the reply.');
+            return;
+        }
+        this._setTurnPending(true);
+        try {
+            await this._runTurn(userMessage);
+        } finally {
+            this._setTurnPending(false);
+        }
+    }
+
+    private _setTurnPending(pending: boolean) {
+        this._turnPending = pending;
+        this._view?.webview.postMessage({ type: 'turnState', pending });
+    }
+
+    private async _runTurn(userMessage: string) {
+        this._remember('user', userMessage);
 
         // Get current file context
         const activeFile = FileScanner.getActiveFile();
@@ -159,13 +285,19 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
             this._sendSystemMessage('ℹ️ No file is currently active. Open a file in the editor first.');
         }
 
+        // The backend may have come up since the last request failed
+        if (!this._backendConnected) {
+            await this._client.checkHealth();
+        }
+
         // If backend is connected, use the teaching agent
         if (this._backendConnected) {
             try {
+                // Keyed so dispose() cancels the wait; the turn itself runs to completion
                 const response: BackendResponse = await this._makeRequest('/chat', 'POST', {
                     message: userMessage,
                     file_context: fileContext
-                });
+                }, { signal: this._client.supersede('chat'), timeoutMs: CHAT_TIMEOUT_MS });
 
                 if (response.success && response.responses) {
                     // Show tool actions if any
@@ -189,9 +321,17 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
                     this._sendBotMessage(`Error: ${response.error || 'Unknown error'}`);
                 }
             } catch (error) {
-                this._backendConnected = false;
-                this._sendBotMessage('Lost connection to teaching agent. Falling back to local mode.');
-                await this._handleLocalMessage(userMessage);
+                if (error instanceof RequestCancelledError) {
+                    return;  // The panel is being disposed
+                }
+                if (error instanceof RequestTimeoutError) {
+                    this._sendBotMessage('The teaching agent is taking too long to answer. Please try again.');
+                } else if (this._backendConnected) {
+                    this._sendBotMessage(`Request to the teaching agent failed (${error}). Please try again.`);
+                } else {
+                    this._sendBotMessage('Lost connection to teaching agent. Falling back to local mode.');
+                    await this._handleLocalMessage(userMessage);
+                }
             }
         } else {
             // Use local simple chatbot
@@ -307,7 +447,8 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
         }
 
         try {
-            const response = await this._makeRequest(`/conversation/${conversationId}`, 'GET');
+            // Newest page only; the panel asks for older pages as the student scrolls up
+            const response = await this._makeRequest(`/conversation/${conversationId}?limit=${HISTORY_PAGE_SIZE}`, 'GET');
 
             if (response.success && response.conversation && this._view) {
                 // Clear current conversation
@@ -322,16 +463,31 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
                     this._sendSystemMessage(`📄 File context: ${conversation.file_context.fileName}`);
                 }
 
-                // Display messages
-                for (const msg of conversation.messages) {
-                    if (msg.type.toLowerCase().includes('user')) {
-                        this._view.webview.postMessage({
-                            type: 'addUserMessage',
-                            message: msg.content
-                        });
-                    } else if (msg.content && !msg.type.toLowerCase().includes('tool')) {
-                        this._sendBotMessage(msg.content);
-                    }
+                const items = this._savedMessageItems(conversation.messages);
+                items.forEach(item => this._remember(item.role === 'user' ? 'user' : 'bot', item.message));
+                this._view.webview.postMessage({
+                    type: 'appendMessages',
+                    messages: items,
+                    conversationId: conversationId,
+                    olderCursor: response.page && response.page.has_older ? response.page.first_index : null
+                });
+
+                // Restoring replaces the active agent conversation, which may be
+                // unsaved, so only do it when the student explicitly continues
+                const choice = await vscode.window.showInformationMessage(
+                    `Continue "${conversation.title}"? This replaces the current agent conversation; save it first to keep it.`,
+                    { modal: true },
+                    'Continue'
+                );
+                if (choice !== 'Continue') {
+                    this._sendSystemMessage('👀 Viewing only - new messages still go to the current agent conversation');
+                    return;
+                }
+                const restored = await this._makeRequest(`/conversation/${conversationId}/restore`, 'POST');
+                if (restored.success) {
+                    this._sendSystemMessage('▶️ Conversation restored - you can keep chatting');
+                } else {
+                    this._sendSystemMessage(`ℹ️ Read-only: ${restored.error}`);
                 }
             } else {
                 this._sendBotMessage(`Failed to load conversation: ${response.error}`);
@@ -341,6 +497,50 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
         }
     }
 
+    /**
+     * Fetches the page of a saved conversation just older than `before` for the panel
+     */
+    private async _loadOlderMessages(conversationId: string, before: number) {
+        if (!this._view) {
+            return;
+        }
+
+        let messages: Array<{ role: string; message: string; index?: number }> = [];
+        let olderCursor: number | null = null;
+        try {
+            const response = await this._makeRequest(
+                `/conversation/${conversationId}?before=${before}&limit=${HISTORY_PAGE_SIZE}`, 'GET'
+            );
+            if (response.success && response.conversation) {
+                messages = this._savedMessageItems(response.conversation.messages);
+                olderCursor = response.page && response.page.has_older ? response.page.first_index : null;
+            } else {
+                this._sendSystemMessage(`⚠️ Could not load older messages: ${response.error || 'unknown error'}`);
+            }
+        } catch (error) {
+            this._sendSystemMessage('⚠️ Could not load older messages');
+        }
+
+        // Always answered, so the panel stops waiting for this page
+        this._view.webview.postMessage({ type: 'prependMessages', messages, olderCursor });
+    }
+
+    /**
+     * Saved messages as panel items (user and agent text only; tool traffic is skipped)
+     */
+    private _savedMessageItems(messages: SavedMessage[]): Array<{ role: string; message: string; index?: number }> {
+        const items: Array<{ role: string; message: string; index?: number }> = [];
+        for (const msg of messages) {
+            const type = msg.type.toLowerCase();
+            if (type.includes('user')) {
+                items.push({ role: 'user', message: msg.content, index: msg.index });
+            } else if (msg.content && !type.includes('tool')) {
+                items.push({ role: 'bot', message: msg.content, index: msg.index });
+            }
+        }
+        return items;
+    }
+
     private async _deleteConversation(conversationId: string) {
         if (!this._backendConnected) {
             this._sendBotMessage('Backend not connected. Cannot delete conversation.');
@@ -487,7 +687,7 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
     }
 
     private _sendBotMessage(message: string) {
-        this._conversationHistory.push({ role: 'bot', message });
+        this._remember('bot', message);
 
         if (this._view) {
             this._view.webview.postMessage({
@@ -530,8 +730,12 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
             margin-bottom: 10px;
         }
 
+        /* Spacing lives on the row, so a row's measured height includes it */
+        .message-row {
+            padding-bottom: 15px;
+        }
+
         .message {
-            margin-bottom: 15px;
             padding: 10px;
             border-radius: 5px;
             line-height: 1.4;
@@ -556,6 +760,30 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
             font-style: italic;
         }
 
+        .message-body code,
+        .code-block {
+            font-family: var(--vscode-editor-font-family);
+            background-color: var(--vscode-textCodeBlock-background);
+        }
+
+        .code-block {
+            margin: 5px 0;
+            padding: 6px;
+            overflow-x: auto;
+        }
+
+        .run-output {
+            margin: 0;
+            max-height: 300px;
+            overflow-y: auto;
+            white-space: pre-wrap;
+            font-family: var(--vscode-editor-font-family);
+        }
+
+        .run-output .stderr {
+            color: var(--vscode-errorForeground);
+        }
+
         .message-header {
             font-weight: bold;
             margin-bottom: 5px;
@@ -593,6 +821,12 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
             background-color: var(--vscode-button-hoverBackground);
         }
 
+        button:disabled,
+        #userInput:disabled {
+            opacity: 0.5;
+            cursor: default;
+        }
+
         #quickActions {
             display: flex;
             gap: 5px;
@@ -702,9 +936,10 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
 <body>
     <div id="chatContainer">
         <div id="quickActions">
-            <button class="quick-action" onclick="sendQuickMessage('Show me the current file')">📄 Current File</button>
-            <button class="quick-action" onclick="sendQuickMessage('Analyze my code')">🔍 Analyze Code</button>
-            <button class="quick-action" onclick="sendQuickMessage('Help')">❓ Help</button>
+            <button class="quick-action chat-action" onclick="sendQuickMessage('Show me the current file')">📄 Current File</button>
+            <button class="quick-action chat-action" onclick="sendQuickMessage('Analyze my code')">🔍 Analyze Code</button>
+            <button class="quick-action" onclick="runActiveFile()">▶ Run File</button>
+            <button class="quick-action chat-action" onclick="sendQuickMessage('Help')">❓ Help</button>
             <button class="quick-action" onclick="saveConversation()">💾 Save</button>
             <button class="quick-action" onclick="loadConversations()">📂 Load</button>
             <button class="quick-action" onclick="reconnect()">🔄 Reconnect</button>
@@ -716,7 +951,7 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
         <div id="messages"></div>
         <div id="inputContainer">
             <input type="text" id="userInput" placeholder="Ask me about code or show me what you're working on..." />
-            <button onclick="sendMessage()">Send</button>
+            <button id="sendButton" onclick="sendMessage()">Send</button>
         </div>
     </div>
 
@@ -734,41 +969,335 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
         const messagesDiv = document.getElementById('messages');
         const userInput = document.getElementById('userInput');
 
+        // Virtualized message list: every message lives in 'items', but only
+        // the rows in (or near) the viewport are in the DOM. Spacers stand in
+        // for the rest, using measured heights (or an estimate until a row has
+        // been shown once). Each message's HTML is rendered once and cached.
+        const MAX_ITEMS = 1000;        // older messages are dropped beyond this
+        const OVERSCAN_PX = 800;       // rows kept mounted above/below the viewport
+        const LOAD_OLDER_PX = 200;     // ask for older history this close to the top
+        const HEADERS = { user: 'You', system: 'System', bot: '🎓 Teaching Agent' };
+        const CLASSES = { user: 'user-message', system: 'system-message', bot: 'bot-message' };
+
+        const items = [];              // { id, role, text, html, height, index, run }
+        const mounted = new Map();     // item id -> row element
+        let nextItemId = 0;
+
+        const topSpacer = document.createElement('div');
+        const rowsDiv = document.createElement('div');
+        const bottomSpacer = document.createElement('div');
+        messagesDiv.append(topSpacer, rowsDiv, bottomSpacer);
+
+        // Saved conversation being shown and the cursor of its next older page
+        let historyConversationId = null;
+        let olderCursor = null;
+        let loadingOlder = false;
+
+        // Incoming messages are applied once per animation frame, in a batch
+        const pendingMessages = [];
+        let frameRequested = false;
+        let stickToBottom = true;
+
+        function scheduleFrame() {
+            if (!frameRequested) {
+                frameRequested = true;
+                requestAnimationFrame(flushFrame);
+            }
+        }
+
+        function escapeHtml(text) {
+            return String(text)
+                .replace(/&/g, '&amp;')
+                .replace(/</g, '&lt;')
+                .replace(/>/g, '&gt;')
+                .replace(/"/g, '&quot;');
+        }
+
+        // Agent replies use a little markdown: fenced code, inline code, bold, headings
+        function renderMarkdown(text) {
+            const parts = escapeHtml(text).split(/\\u0060\\u0060\\u0060[^\\n]*\\n?/);
+            return parts.map((part, i) => {
+                if (i % 2 === 1) {
+                    return '<pre class="code-block"><code>' + part + '</code></pre>';
+                }
+                return part
+                    .replace(/\\u0060([^\\u0060\\n]+)\\u0060/g, '<code>$1</code>')
+                    .replace(/\\*\\*([^*\\n]+)\\*\\*/g, '<strong>$1</strong>')
+                    .replace(/^#{1,6} +(.+)$/gm, '<strong>$1</strong>');
+            }).join('');
+        }
+
+        function runHtml(run) {
+            return '<pre class="run-output">' + run.map(segment =>
+                '<span class="' + segment.stream + '">' + escapeHtml(segment.text) + '</span>'
+            ).join('') + '</pre>';
+        }
+
+        function itemHtml(item) {
+            if (item.html === null) {
+                const body = item.role === 'bot' ? renderMarkdown(item.text) : escapeHtml(item.text);
+                item.html = '<div class="message ' + CLASSES[item.role] + '">' +
+                    '<div class="message-header">' + HEADERS[item.role] + '</div>' +
+                    '<div class="message-body">' + body + '</div>' +
+                    (item.run ? runHtml(item.run) : '') +
+                    '</div>';
+            }
+            return item.html;
+        }
+
+        function makeItem(role, text, index) {
+            return { id: nextItemId++, role: role, text: text, html: null, height: 0, index: index, run: null };
+        }
+
+        // Rough height of a row that hasn't been shown yet (replaced once measured)
+        function heightOf(item) {
+            if (item.height) {
+                return item.height;
+            }
+            const width = Math.max(messagesDiv.clientWidth - 40, 100);
+            const charsPerLine = Math.max(Math.floor(width / 7), 10);
+            let lines = 0;
+            item.text.split('\\n').forEach(line => { lines += Math.max(1, Math.ceil(line.length / charsPerLine)); });
+            return 55 + lines * 18 + (item.run ? 60 : 0);
+        }
+
+        function offsetOf(position) {
+            let y = 0;
+            for (let i = 0; i < position; i++) {
+                y += heightOf(items[i]);
+            }
+            return y;
+        }
+
+        function appendItems(newItems) {
+            items.push(...newItems);
+            if (items.length > MAX_ITEMS) {
+                items.splice(0, items.length - MAX_ITEMS);
+                // Dropped saved messages can be paged back in from the backend
+                olderCursor = items[0].index !== undefined && items[0].index > 0 ? items[0].index : null;
+            }
+        }
+
+        function prependItems(newItems) {
+            const room = MAX_ITEMS - items.length;
+            if (newItems.length > room) {
+                newItems = newItems.slice(newItems.length - room);
+                olderCursor = null;
+                newItems.unshift(makeItem('system', 'Older messages are not shown (history limit reached).'));
+            }
+            items.unshift(...newItems);
+        }
+
         function addMessage(role, message) {
-            const messageDiv = document.createElement('div');
-            let className = 'message ';
-            let headerText = '';
-
-            if (role === 'user') {
-                className += 'user-message';
-                headerText = 'You';
-            } else if (role === 'system') {
-                className += 'system-message';
-                headerText = 'System';
+            pendingMessages.push({ type: 'localMessage', role: role, message: message });
+            stickToBottom = true;
+            scheduleFrame();
+        }
+
+        // Output of the run in progress, appended to as chunks arrive
+        let runItem = null;
+
+        function appendRunOutput(text, stream) {
+            if (!runItem || !text) {
+                return;
+            }
+            const last = runItem.run[runItem.run.length - 1];
+            if (last && last.stream === stream) {
+                last.text += text;
             } else {
-                className += 'bot-message';
-                headerText = '🎓 Teaching Agent';
+                runItem.run.push({ stream: stream, text: text });
+            }
+            runItem.html = null;
+            const row = mounted.get(runItem.id);
+            if (row) {
+                // Live row: append instead of re-rendering the whole output
+                const output = row.querySelector('.run-output');
+                const span = document.createElement('span');
+                span.className = stream;
+                span.textContent = text;
+                output.appendChild(span);
+                output.scrollTop = output.scrollHeight;
+            }
+        }
+
+        function applyMessage(message) {
+            if (message.type === 'localMessage') {
+                appendItems([makeItem(message.role, message.message)]);
+            } else if (message.type === 'botMessage') {
+                appendItems([makeItem('bot', message.message)]);
+                // Check if message indicates offline status
+                if (message.message.includes('Teaching Agent Offline') || message.message.includes('backend not connected')) {
+                    document.getElementById('connectionBar').style.display = 'block';
+                } else if (message.message.includes('Teaching Agent Connected')) {
+                    document.getElementById('connectionBar').style.display = 'none';
+                }
+            } else if (message.type === 'systemMessage') {
+                appendItems([makeItem('system', message.message)]);
+            } else if (message.type === 'addUserMessage') {
+                appendItems([makeItem('user', message.message)]);
+            } else if (message.type === 'appendMessages') {
+                appendItems(message.messages.map(m => makeItem(m.role, m.message, m.index)));
+                historyConversationId = message.conversationId;
+                olderCursor = message.olderCursor;
+            } else if (message.type === 'prependMessages') {
+                loadingOlder = false;
+                olderCursor = message.olderCursor;
+                prependItems(message.messages.map(m => makeItem(m.role, m.message, m.index)));
+            } else if (message.type === 'clearMessages') {
+                items.length = 0;
+                mounted.forEach(row => row.remove());
+                mounted.clear();
+                historyConversationId = null;
+                olderCursor = null;
+                loadingOlder = false;
+                runItem = null;
+            } else if (message.type === 'turnState') {
+                setTurnPending(message.pending);
+            } else if (message.type === 'showConversations') {
+                showConversations(message.conversations);
+            } else if (message.type === 'runStart') {
+                runItem = makeItem('system', message.title);
+                runItem.run = [];
+                appendItems([runItem]);
+            } else if (message.type === 'runChunk') {
+                appendRunOutput(message.data, message.stream);
+            } else if (message.type === 'runEnd') {
+                if (message.timedOut) {
+                    appendRunOutput('\\n⏱ Timed out - output above is what ran before it was stopped', 'stderr');
+                } else if (runItem && runItem.run.length === 0) {
+                    appendRunOutput(message.result, message.hasError ? 'stderr' : 'stdout');
+                }
+                runItem = null;
+            }
+        }
+
+        // Mount the rows overlapping [scrollTop - overscan, bottom + overscan],
+        // unmount the rest, then measure what is mounted
+        function layout(scrollTop) {
+            const top = scrollTop - OVERSCAN_PX;
+            const bottom = scrollTop + messagesDiv.clientHeight + OVERSCAN_PX;
+            let y = 0;
+            let first = -1;
+            let last = -1;
+            for (let i = 0; i < items.length; i++) {
+                const height = heightOf(items[i]);
+                if (y + height > top && y < bottom) {
+                    if (first < 0) {
+                        first = i;
+                    }
+                    last = i;
+                }
+                y += height;
+            }
+
+            const wanted = new Set();
+            let cursor = rowsDiv.firstChild;
+            for (let i = first; first >= 0 && i <= last; i++) {
+                const item = items[i];
+                wanted.add(item.id);
+                let row = mounted.get(item.id);
+                if (!row) {
+                    row = document.createElement('div');
+                    row.className = 'message-row';
+                    row.innerHTML = itemHtml(item);
+                    mounted.set(item.id, row);
+                }
+                if (row === cursor) {
+                    cursor = cursor.nextSibling;
+                } else {
+                    rowsDiv.insertBefore(row, cursor);
+                }
+            }
+            mounted.forEach((row, id) => {
+                if (!wanted.has(id)) {
+                    row.remove();
+                    mounted.delete(id);
+                }
+            });
+
+            // All DOM writes are done, so this is a single layout pass
+            for (let i = first; first >= 0 && i <= last; i++) {
+                items[i].height = mounted.get(items[i].id).offsetHeight || items[i].height;
+            }
+            const before = first >= 0 ? offsetOf(first) : 0;
+            const mountedHeight = first >= 0 ? offsetOf(last + 1) - before : 0;
+            topSpacer.style.height = before + 'px';
+            bottomSpacer.style.height = Math.max(offsetOf(items.length) - before - mountedHeight, 0) + 'px';
+        }
+
+        function flushFrame() {
+            frameRequested = false;
+            const scrollTop = messagesDiv.scrollTop;
+            const atBottom = stickToBottom ||
+                messagesDiv.scrollHeight - scrollTop - messagesDiv.clientHeight < 40;
+
+            // Keep the first visible row where it is while rows are added or
+            // re-measured above it (e.g. when older history is prepended)
+            let anchor = null;
+            let anchorOffset = 0;
+            if (!atBottom) {
+                let y = 0;
+                for (const item of items) {
+                    const height = heightOf(item);
+                    if (y + height > scrollTop) {
+                        anchor = item;
+                        anchorOffset = scrollTop - y;
+                        break;
+                    }
+                    y += height;
+                }
             }
 
-            messageDiv.className = className;
+            pendingMessages.splice(0).forEach(applyMessage);
 
-            const header = document.createElement('div');
-            header.className = 'message-header';
-            header.textContent = headerText;
+            let target = scrollTop;
+            if (anchor && items.includes(anchor)) {
+                target = offsetOf(items.indexOf(anchor)) + anchorOffset;
+            }
+            layout(atBottom ? offsetOf(items.length) : target);
+            if (atBottom) {
+                messagesDiv.scrollTop = messagesDiv.scrollHeight;
+            } else if (anchor && items.includes(anchor)) {
+                messagesDiv.scrollTop = offsetOf(items.indexOf(anchor)) + anchorOffset;
+            }
+            stickToBottom = false;
+        }
 
-            const content = document.createElement('div');
-            content.textContent = message;
+        messagesDiv.addEventListener('scroll', () => {
+            if (messagesDiv.scrollTop < LOAD_OLDER_PX && olderCursor !== null && !loadingOlder) {
+                loadingOlder = true;
+                vscode.postMessage({
+                    type: 'loadOlder',
+                    conversationId: historyConversationId,
+                    before: olderCursor
+                });
+            }
+            scheduleFrame();
+        }, { passive: true });
+
+        window.addEventListener('resize', () => {
+            // Rows reflow at a new width: keep the cached HTML, re-measure heights
+            items.forEach(item => { item.height = 0; });
+            scheduleFrame();
+        });
 
-            messageDiv.appendChild(header);
-            messageDiv.appendChild(content);
-            messagesDiv.appendChild(messageDiv);
+        // One turn at a time: input is disabled until the reply arrives
+        let turnPending = false;
 
-            messagesDiv.scrollTop = messagesDiv.scrollHeight;
+        function setTurnPending(pending) {
+            turnPending = pending;
+            userInput.disabled = pending;
+            document.getElementById('sendButton').disabled = pending;
+            document.querySelectorAll('.quick-action.chat-action').forEach(button => { button.disabled = pending; });
+            if (!pending) {
+                userInput.focus();
+            }
         }
 
         function sendMessage() {
             const message = userInput.value.trim();
-            if (message) {
+            if (message && !turnPending) {
+                setTurnPending(true);
                 addMessage('user', message);
                 vscode.postMessage({
                     type: 'userMessage',
@@ -779,6 +1308,10 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
         }
 
         function sendQuickMessage(message) {
+            if (turnPending) {
+                return;
+            }
+            setTurnPending(true);
             addMessage('user', message);
             vscode.postMessage({
                 type: 'userMessage',
@@ -786,6 +1319,12 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
             });
         }
 
+        function runActiveFile() {
+            vscode.postMessage({
+                type: 'runActiveFile'
+            });
+        }
+
         function resetAgent() {
             if (confirm('Reset the conversation? This will clear all history.')) {
                 vscode.postMessage({
@@ -850,67 +1389,54 @@ export class ChatbotViewProvider implements vscode.WebviewViewProvider {
             }
         });
 
-        window.addEventListener('message', event => {
-            const message = event.data;
-            if (message.type === 'botMessage') {
-                addMessage('bot', message.message);
-                // Check if message indicates offline status
-                if (message.message.includes('Teaching Agent Offline') || message.message.includes('backend not connected')) {
-                    document.getElementById('connectionBar').style.display = 'block';
-                } else if (message.message.includes('Teaching Agent Connected')) {
-                    document.getElementById('connectionBar').style.display = 'none';
-                }
-            } else if (message.type === 'systemMessage') {
-                addMessage('system', message.message);
-            } else if (message.type === 'clearMessages') {
-                // Clear all messages from the UI
-                messagesDiv.innerHTML = '';
-            } else if (message.type === 'showConversations') {
-                // Display conversations in modal
-                const conversationsList = document.getElementById('conversationsList');
-                conversationsList.innerHTML = '';
-
-                if (message.conversations && message.conversations.length > 0) {
-                    message.conversations.forEach(conv => {
-                        const item = document.createElement('div');
-                        item.className = 'conversation-item';
-                        item.onclick = () => loadConversation(conv.id);
-
-                        const info = document.createElement('div');
-                        info.className = 'conversation-info';
-
-                        const title = document.createElement('div');
-                        title.className = 'conversation-title';
-                        title.textContent = conv.title;
-
-                        const meta = document.createElement('div');
-                        meta.className = 'conversation-meta';
-                        const date = new Date(conv.timestamp);
-                        meta.textContent = date.toLocaleString() + ' • ' + conv.message_count + ' messages';
-                        if (conv.file_context) {
-                            meta.textContent += ' • ' + conv.file_context.fileName;
-                        }
-
-                        info.appendChild(title);
-                        info.appendChild(meta);
+        // Saved conversations, shown in the modal
+        function showConversations(conversations) {
+            const conversationsList = document.getElementById('conversationsList');
+            conversationsList.innerHTML = '';
+
+            if (conversations && conversations.length > 0) {
+                conversations.forEach(conv => {
+                    const item = document.createElement('div');
+                    item.className = 'conversation-item';
+                    item.onclick = () => loadConversation(conv.id);
+
+                    const info = document.createElement('div');
+                    info.className = 'conversation-info';
+
+                    const title = document.createElement('div');
+                    title.className = 'conversation-title';
+                    title.textContent = conv.title;
+
+                    const meta = document.createElement('div');
+                    meta.className = 'conversation-meta';
+                    const date = new Date(conv.timestamp);
+                    meta.textContent = date.toLocaleString() + ' • ' + conv.message_count + ' messages';
+                    if (conv.file_context) {
+                        meta.textContent += ' • ' + conv.file_context.fileName;
+                    }
 
-                        const deleteBtn = document.createElement('button');
-                        deleteBtn.className = 'delete-btn';
-                        deleteBtn.textContent = '🗑️ Delete';
-                        deleteBtn.onclick = (e) => deleteConversation(e, conv.id);
+                    info.appendChild(title);
+                    info.appendChild(meta);
 
-                        item.appendChild(info);
-                        item.appendChild(deleteBtn);
-                        conversationsList.appendChild(item);
-                    });
-                } else {
-                    conversationsList.innerHTML = '<p>No saved conversations yet.</p>';
-                }
+                    const deleteBtn = document.createElement('button');
+                    deleteBtn.className = 'delete-btn';
+                    deleteBtn.textContent = '🗑️ Delete';
+                    deleteBtn.onclick = (e) => deleteConversation(e, conv.id);
 
-                document.getElementById('conversationsModal').style.display = 'block';
-            } else if (message.type === 'addUserMessage') {
-                addMessage('user', message.message);
+                    item.appendChild(info);
+                    item.appendChild(deleteBtn);
+                    conversationsList.appendChild(item);
+                });
+            } else {
+                conversationsList.innerHTML = '<p>No saved conversations yet.</p>';
             }
+
+            document.getElementById('conversationsModal').style.display = 'block';
+        }
+
+        window.addEventListener('message', event => {
+            pendingMessages.push(event.data);
+            scheduleFrame();
         });
     </script>
 </body>
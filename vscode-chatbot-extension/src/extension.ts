@@ -1,5 +1,6 @@
 import * as vscode from 'vscode';
 import * as child_process from 'child_process';
+import * as http from 'http';
 import * as path from 'path';
 import { ChatbotViewProvider } from './chatbotProvider';
 import { FileScanner } from './fileScanner';
@@ -17,6 +18,9 @@ export function activate(context: vscode.ExtensionContext) {
     statusBarItem.show();
     context.subscriptions.push(statusBarItem);
 
+    // Keep the file scanner cache in sync with document and tab changes
+    FileScanner.register(context);
+
     // Register the chatbot view provider
     const provider = new ChatbotViewProvider(context.extensionUri, (connected: boolean) => {
         updateStatusBar(connected);
@@ -26,7 +30,8 @@ export function activate(context: vscode.ExtensionContext) {
         vscode.window.registerWebviewViewProvider(
             ChatbotViewProvider.viewType,
             provider
-        )
+        ),
+        provider  // Closes its keep-alive connections on deactivate
     );
 
     // Register command to open the chat
@@ -42,9 +47,10 @@ export function activate(context: vscode.ExtensionContext) {
     const scanFilesCommand = vscode.commands.registerCommand(
         'file-scanner-chatbot.scanOpenFiles',
         () => {
+            const files = FileScanner.scanOpenFiles();
             const summary = FileScanner.getOpenFilesSummary();
             vscode.window.showInformationMessage(
-                `Scanned Files: ${FileScanner.scanOpenFiles().length} files found`
+                `Scanned Files: ${files.length} files found`
             );
 
             // Show detailed output in output channel
@@ -56,6 +62,14 @@ export function activate(context: vscode.ExtensionContext) {
         }
     );
 
+    // Prefetch analysis for the file the student is working on
+    const prefetchOnSave = vscode.workspace.onDidSaveTextDocument((document) => {
+        const runOnSave = vscode.workspace
+            .getConfiguration('file-scanner-chatbot')
+            .get<boolean>('prefetchRunOnSave', false);
+        provider.schedulePrefetch(document, runOnSave);
+    });
+
     // Monitor file open/close events
     const onDidOpenTextDocument = vscode.workspace.onDidOpenTextDocument((document) => {
         console.log(`File opened: ${document.fileName}`);
@@ -63,12 +77,14 @@ export function activate(context: vscode.ExtensionContext) {
 
     const onDidCloseTextDocument = vscode.workspace.onDidCloseTextDocument((document) => {
         console.log(`File closed: ${document.fileName}`);
+        provider.cancelPrefetch(document);
     });
 
     // Monitor active editor changes
     const onDidChangeActiveTextEditor = vscode.window.onDidChangeActiveTextEditor((editor) => {
         if (editor) {
             console.log(`Active editor changed to: ${editor.document.fileName}`);
+            provider.schedulePrefetch(editor.document);
         }
     });
 
@@ -106,6 +122,7 @@ export function activate(context: vscode.ExtensionContext) {
         startBackendCommand,
         stopBackendCommand,
         toggleBackendCommand,
+        prefetchOnSave,
         onDidOpenTextDocument,
         onDidCloseTextDocument,
         onDidChangeActiveTextEditor
@@ -147,7 +164,8 @@ async function startBackend(context: vscode.ExtensionContext): Promise<void> {
             cwd: path.dirname(backendPath),
             env: {
                 ...process.env,  // Inherit all environment variables
-                OPENAI_API_KEY: process.env.OPENAI_API_KEY || ''
+                OPENAI_API_KEY: process.env.OPENAI_API_KEY || '',
+                COMPTUTOR_WORKSPACE: workspaceFolders[0].uri.fsPath  // Root for the search_code index
             }
         });
 
@@ -165,10 +183,18 @@ async function startBackend(context: vscode.ExtensionContext): Promise<void> {
             updateStatusBar(false);
         });
 
-        // Wait a bit for backend to start
-        await new Promise(resolve => setTimeout(resolve, 2000));
+        // The backend listens before the agent has loaded, so this returns quickly
+        const health = await waitForBackend();
+        if (!health) {
+            if (backendProcess) {
+                vscode.window.showErrorMessage('Teaching Agent backend did not respond. Check the output for errors.');
+            }
+            return;
+        }
 
-        vscode.window.showInformationMessage('Teaching Agent backend started! Refresh the chat to connect.');
+        vscode.window.showInformationMessage(health.ready
+            ? 'Teaching Agent backend started! Refresh the chat to connect.'
+            : 'Teaching Agent backend started; the agent is still loading. Refresh the chat to connect.');
         updateStatusBar(true);
 
     } catch (error) {
@@ -178,6 +204,40 @@ async function startBackend(context: vscode.ExtensionContext): Promise<void> {
     }
 }
 
+function fetchHealth(): Promise<any | null> {
+    return new Promise(resolve => {
+        const req = http.get('http://localhost:5000/health', { timeout: 1000 }, (res) => {
+            let body = '';
+            res.on('data', (chunk) => body += chunk);
+            res.on('end', () => {
+                try {
+                    resolve(JSON.parse(body));
+                } catch (e) {
+                    resolve(null);
+                }
+            });
+        });
+        req.on('timeout', () => req.destroy());
+        req.on('error', () => resolve(null));
+    });
+}
+
+/**
+ * Polls /health until the backend answers (or exits / times out).
+ * Returns the health payload, or null if it never came up
+ */
+async function waitForBackend(timeoutMs: number = 30000, intervalMs: number = 100): Promise<any | null> {
+    const deadline = Date.now() + timeoutMs;
+    while (backendProcess && Date.now() < deadline) {
+        const health = await fetchHealth();
+        if (health) {
+            return health;
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+    return null;
+}
+
 function stopBackend() {
     if (backendProcess) {
         backendProcess.kill();
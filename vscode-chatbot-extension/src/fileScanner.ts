@@ -9,56 +9,125 @@ export interface FileInfo {
     isDirty: boolean;
 }
 
+export interface SearchResult {
+    file: FileInfo;
+    matches: number;
+    lines: number[];
+}
+
+interface CachedDocument {
+    version: number;
+    content: string;
+    lines?: string[];                                   // built lazily on first search
+    searches: Map<string, { matches: number; lines: number[] }>;
+}
+
+// Upper bound on compiled search patterns kept around
+const MAX_CACHED_PATTERNS = 50;
+
 export class FileScanner {
+    // Per-document text cache keyed by URI, valid while document.version is unchanged
+    private static _documents = new Map<string, CachedDocument>();
+    // URIs of all open text tabs; rebuilt only after tab events
+    private static _openTabUris: Set<string> | null = null;
+    private static _patterns = new Map<string, RegExp>();
+
+    /**
+     * Subscribes to document and tab events so cached entries are invalidated
+     * incrementally instead of rescanning every file on each call
+     */
+    public static register(context: vscode.ExtensionContext): void {
+        context.subscriptions.push(
+            vscode.workspace.onDidChangeTextDocument(event => {
+                this._documents.delete(event.document.uri.toString());
+            }),
+            vscode.workspace.onDidCloseTextDocument(document => {
+                this._documents.delete(document.uri.toString());
+            }),
+            vscode.window.tabGroups.onDidChangeTabs(() => {
+                this._openTabUris = null;
+            }),
+            vscode.window.tabGroups.onDidChangeTabGroups(() => {
+                this._openTabUris = null;
+            })
+        );
+    }
+
     /**
      * Scans all currently open text editors
      */
     public static scanOpenFiles(): FileInfo[] {
-        const openFiles: FileInfo[] = [];
+        return this._openDocuments().map(document => this.extractFileInfo(document));
+    }
 
-        // Get all visible text editors
-        const visibleEditors = vscode.window.visibleTextEditors;
+    /**
+     * Gets the currently active file
+     */
+    public static getActiveFile(): FileInfo | null {
+        const activeEditor = vscode.window.activeTextEditor;
+        if (!activeEditor) {
+            return null;
+        }
 
-        // Get all tab groups to find all open files (not just visible ones)
-        const tabGroups = vscode.window.tabGroups.all;
-        const openDocuments = new Set<string>();
+        return this.extractFileInfo(activeEditor.document);
+    }
 
-        // Collect all open file URIs
-        tabGroups.forEach(group => {
-            group.tabs.forEach(tab => {
-                if (tab.input instanceof vscode.TabInputText) {
-                    openDocuments.add(tab.input.uri.toString());
-                }
-            });
-        });
+    /**
+     * Returns open documents: visible editors first, then remaining open tabs
+     */
+    private static _openDocuments(): vscode.TextDocument[] {
+        const openDocuments = new Set(this._getOpenTabUris());
+        const documents: vscode.TextDocument[] = [];
 
         // Process visible editors first
-        visibleEditors.forEach(editor => {
-            const document = editor.document;
-            openFiles.push(this.extractFileInfo(document));
-            openDocuments.delete(document.uri.toString());
+        vscode.window.visibleTextEditors.forEach(editor => {
+            documents.push(editor.document);
+            openDocuments.delete(editor.document.uri.toString());
         });
 
         // Process remaining open documents
         vscode.workspace.textDocuments.forEach(document => {
             if (openDocuments.has(document.uri.toString())) {
-                openFiles.push(this.extractFileInfo(document));
+                documents.push(document);
             }
         });
 
-        return openFiles;
+        return documents;
     }
 
     /**
-     * Gets the currently active file
+     * Collects all open file URIs from the tab groups (not just visible ones)
      */
-    public static getActiveFile(): FileInfo | null {
-        const activeEditor = vscode.window.activeTextEditor;
-        if (!activeEditor) {
-            return null;
+    private static _getOpenTabUris(): Set<string> {
+        if (!this._openTabUris) {
+            const uris = new Set<string>();
+            vscode.window.tabGroups.all.forEach(group => {
+                group.tabs.forEach(tab => {
+                    if (tab.input instanceof vscode.TabInputText) {
+                        uris.add(tab.input.uri.toString());
+                    }
+                });
+            });
+            this._openTabUris = uris;
         }
+        return this._openTabUris;
+    }
 
-        return this.extractFileInfo(activeEditor.document);
+    /**
+     * Returns the cached entry for a document, re-reading its text only when the version changed
+     */
+    private static _getCached(document: vscode.TextDocument): CachedDocument {
+        const key = document.uri.toString();
+        let cached = this._documents.get(key);
+        if (!cached || cached.version !== document.version) {
+            cached = {
+                version: document.version,
+                content: document.getText(),
+                searches: new Map()
+            };
+            this._documents.set(key, cached);
+        }
+        return cached;
     }
 
     /**
@@ -70,7 +139,7 @@ export class FileScanner {
             filePath: document.uri.fsPath,
             languageId: document.languageId,
             lineCount: document.lineCount,
-            content: document.getText(),
+            content: this._getCached(document).content,
             isDirty: document.isDirty
         };
     }
@@ -84,54 +153,83 @@ export class FileScanner {
     }
 
     /**
-     * Gets a summary of open files
+     * Gets a summary of open files (metadata only, never reads document text)
      */
     public static getOpenFilesSummary(): string {
-        const files = this.scanOpenFiles();
+        const documents = this._openDocuments();
 
-        if (files.length === 0) {
+        if (documents.length === 0) {
             return "No files are currently open.";
         }
 
-        let summary = `Found ${files.length} open file(s):\n\n`;
+        let summary = `Found ${documents.length} open file(s):\n\n`;
 
-        files.forEach((file, index) => {
-            summary += `${index + 1}. ${file.fileName} (${file.languageId})\n`;
-            summary += `   Path: ${file.filePath}\n`;
-            summary += `   Lines: ${file.lineCount}\n`;
-            summary += `   Modified: ${file.isDirty ? 'Yes' : 'No'}\n\n`;
+        documents.forEach((document, index) => {
+            summary += `${index + 1}. ${this.getFileName(document.uri)} (${document.languageId})\n`;
+            summary += `   Path: ${document.uri.fsPath}\n`;
+            summary += `   Lines: ${document.lineCount}\n`;
+            summary += `   Modified: ${document.isDirty ? 'Yes' : 'No'}\n\n`;
         });
 
         return summary;
     }
 
     /**
-     * Searches for a pattern in all open files
+     * Returns a compiled regex for a pattern, reusing earlier compilations
      */
-    public static searchInOpenFiles(pattern: string): { file: FileInfo; matches: number; lines: number[] }[] {
-        const files = this.scanOpenFiles();
-        const results: { file: FileInfo; matches: number; lines: number[] }[] = [];
-
-        const regex = new RegExp(pattern, 'gi');
-
-        files.forEach(file => {
-            const lines = file.content.split('\n');
-            const matchingLines: number[] = [];
-            let totalMatches = 0;
-
-            lines.forEach((line, index) => {
-                const matches = line.match(regex);
-                if (matches) {
-                    matchingLines.push(index + 1);
-                    totalMatches += matches.length;
+    private static _getPattern(pattern: string): RegExp {
+        let regex = this._patterns.get(pattern);
+        if (!regex) {
+            if (this._patterns.size >= MAX_CACHED_PATTERNS) {
+                // Drop the oldest pattern (Map keeps insertion order)
+                const oldest = this._patterns.keys().next().value;
+                if (oldest !== undefined) {
+                    this._patterns.delete(oldest);
                 }
-            });
+            }
+            regex = new RegExp(pattern, 'gi');
+            this._patterns.set(pattern, regex);
+        }
+        return regex;
+    }
+
+    /**
+     * Searches for a pattern in all open files.
+     * Results are cached per document version, so only changed documents are rescanned
+     */
+    public static searchInOpenFiles(pattern: string): SearchResult[] {
+        const results: SearchResult[] = [];
+        const regex = this._getPattern(pattern);
+
+        this._openDocuments().forEach(document => {
+            const cached = this._getCached(document);
+            let result = cached.searches.get(pattern);
+
+            if (!result) {
+                if (!cached.lines) {
+                    cached.lines = cached.content.split('\n');
+                }
+
+                const matchingLines: number[] = [];
+                let totalMatches = 0;
+
+                cached.lines.forEach((line, index) => {
+                    const matches = line.match(regex);
+                    if (matches) {
+                        matchingLines.push(index + 1);
+                        totalMatches += matches.length;
+                    }
+                });
+
+                result = { matches: totalMatches, lines: matchingLines };
+                cached.searches.set(pattern, result);
+            }
 
-            if (totalMatches > 0) {
+            if (result.matches > 0) {
                 results.push({
-                    file,
-                    matches: totalMatches,
-                    lines: matchingLines
+                    file: this.extractFileInfo(document),
+                    matches: result.matches,
+                    lines: result.lines
                 });
             }
         });
@@ -1,48 +1,141 @@
 """
 Web interface for the Autonomous Teaching Agent with real tools.
 Features: code analysis, execution, progressive hints, understanding checks.
+
+Sessions live in a shared store (see session_store.py), so the app can run
+with several workers, e.g.:
+    COMPTUTOR_SECRET_KEY=... gunicorn -w 4 -b :5001 web_app:app
+
+The LLM stack (pyagentspec/wayflowcore) is imported by a background
+warm-up, so each worker accepts requests at once; /health reports `ready`.
+
+Configuration (environment variables):
+    COMPTUTOR_WEB_RUN   - set to 1 to enable /run/stream (the Run Code button),
+                          which executes posted code on this host; off by
+                          default since the app may listen on all interfaces
 """
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response
 from flask_session import Session
+import os
+import json
 import secrets
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from autonomous_mentor import create_teaching_agent, TeachingTools
-from wayflowcore.agentspec import AgentSpecLoader
-from wayflowcore import MessageType
+from autonomous_mentor import create_teaching_agent, TeachingTools, load_llm_stack
+from tracing import tracer, trace_tools
+from logging_setup import configure_logging, get_logger
+from session_store import create_session_store, SessionLockTimeout
+from conversation_snapshot import snapshot_conversation, restore_conversation
+from pagination import parse_page_args, paginate
+from executors import stream_execute
+from tutoring_state import TutoringState
+from model_routing import RoutedConversation, get_model_router
+from learning_analytics import (SessionRecorder, get_analytics_store, run_report, instructor_auth_error,
+                                REPORTS as ANALYTICS_REPORTS)
+
+# Queue-based logging with trace ids; COMPTUTOR_PROFILE=production for serving
+logging_config = configure_logging()
+log = get_logger('web')
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = secrets.token_hex(16)
-app.config['SESSION_TYPE'] = 'filesystem'
+# The key must be shared by all workers, otherwise a cookie signed by one
+# worker is rejected by the next; a random key only suits a single process
+app.config['SECRET_KEY'] = os.environ.get('COMPTUTOR_SECRET_KEY') or secrets.token_hex(16)
+app.config['SESSION_TYPE'] = os.environ.get('COMPTUTOR_COOKIE_SESSION_TYPE', 'filesystem')
 Session(app)
 
-# Store active agent sessions
-active_sessions = {}
+# Source of truth for agent sessions, shared by all workers
+session_store = create_session_store()
+
+# Per-process cache of live sessions (rebuilding the agent is expensive);
+# an entry is reused only while its version matches the store
+MAX_CACHED_SESSIONS = 128
+active_sessions = OrderedDict()
+active_sessions_lock = threading.Lock()
+
+# /run/stream executes arbitrary code, so it is opt-in for a shared server
+WEB_RUN_ENABLED = os.environ.get('COMPTUTOR_WEB_RUN', '0') == '1'
+
+# Set once the LLM stack is imported; the first /chat no longer pays for it
+llm_stack_ready = threading.Event()
+warmup_error = None
+
+
+def _warm_up():
+    """Import the LLM stack in the background (one thread per worker process)."""
+    global warmup_error
+    try:
+        with tracer.span('startup.warmup'):
+            load_llm_stack()
+        llm_stack_ready.set()
+    except Exception as e:
+        warmup_error = str(e)
+        log.exception("LLM stack warm-up failed")
+
+
+threading.Thread(target=_warm_up, name='llm-warmup', daemon=True).start()
 
 
 class WebAgentSession:
     """Manages an autonomous agent session for web interface."""
 
-    def __init__(self, session_id: str):
+    def __init__(self, session_id: str, student_id: str = None):
+        from wayflowcore.agentspec import AgentSpecLoader
+
         self.session_id = session_id
+        self.student_id = student_id or session_id
         self.messages = []
         self.message_idx = -1
+        self.version = 0
 
-        # Create agent with tools
-        self.agent = create_teaching_agent()
+        # Create tools
         self.tools = TeachingTools()
-        self.session_ended = False
-        self.tool_registry = {
+        # Hint levels, completion outcomes and summaries feed learning analytics;
+        # the tutoring state picks hint levels and tracks verdicts per problem
+        self.tutoring = TutoringState()
+        self.recorder = SessionRecorder(get_analytics_store(), self.student_id, session_id,
+                                        resolve_concept=self.tutoring.resolve_concept)
+        self.tool_registry = trace_tools(self.tutoring.wrap_tools(self.recorder.wrap_tools({
             "analyze_code": self.tools.analyze_code,
             "run_code": self.tools.run_code,
+            "search_code": self.tools.search_code,
             "generate_hint": self.tools.generate_hint,
             "check_understanding": self.tools.check_understanding,
             "detect_completion": self.tools.detect_completion,
             "end_session": self._end_session_wrapper,
+        })))
+
+        # Start the conversation; each turn runs on the model tier the router
+        # picks, with one agent per tier built on first use
+        def load_agent(tier):
+            return AgentSpecLoader(self.tool_registry).load_component(create_teaching_agent(tier.llm_config()))
+
+        self.routed = RoutedConversation(get_model_router(), load_agent)
+        self.conversation = self.routed.conversation
+
+    def to_state(self) -> dict:
+        """Serialize the session so another worker can resume it."""
+        return {
+            'session_id': self.session_id,
+            'student_id': self.student_id,
+            'messages': self.messages,
+            'tutoring': self.tutoring.to_dict(),
+            'conversation': snapshot_conversation(self.conversation, self.message_idx, self.session_ended),
         }
 
-        # Load and start conversation
-        executable_agent = AgentSpecLoader(self.tool_registry).load_component(self.agent)
-        self.conversation = executable_agent.start_conversation()
+    @classmethod
+    def from_state(cls, state: dict) -> 'WebAgentSession':
+        """Rebuild a session from a stored state."""
+        agent_session = cls(state['session_id'], state.get('student_id'))
+        agent_session.messages = state.get('messages', [])
+        agent_session.recorder.turn = sum(1 for m in agent_session.messages if m['role'] == 'user')
+        agent_session.tutoring.restore(state.get('tutoring'))
+        agent_session.version = state.get('version', 0)
+        agent_session.message_idx, agent_session.session_ended = restore_conversation(
+            agent_session.conversation, state['conversation']
+        )
+        return agent_session
 
     def add_message(self, role: str, content: str):
         """Add a message to session history."""
@@ -52,19 +145,42 @@ class WebAgentSession:
             'timestamp': datetime.now().isoformat()
         })
 
+    @property
+    def session_ended(self) -> bool:
+        # Kept by the recorder, so an escalated (discarded) attempt's end_session is rolled back too
+        return self.recorder.ended
+
+    @session_ended.setter
+    def session_ended(self, ended: bool):
+        self.recorder.ended = ended
+
     def _end_session_wrapper(self, summary: str) -> str:
-        """Wrapper for end_session that sets flag."""
-        self.session_ended = True
+        """end_session for the web app (the recorder's wrapper sets session_ended)."""
         return f"SESSION_ENDED: {summary}"
 
     def process_user_message(self, user_message: str):
         """Process user message and get agent response."""
-        # Add user message
-        self.conversation.append_user_message(user_message)
-        self.add_message('user', user_message)
+        from wayflowcore import MessageType
 
-        # Execute conversation
-        self.conversation.execute()
+        self.add_message('user', user_message)
+        self.recorder.turn += 1
+
+        # Execute the turn; the model sees the message prefixed with the tutoring state
+        problem = self.tutoring.current
+        with tracer.span('agent.execute', session_id=self.session_id) as execute_span:
+            try:
+                routing = self.routed.execute(
+                    self.tutoring.with_header(user_message),
+                    route_on=user_message,
+                    phase=problem.phase if problem else None,
+                    turn=self.recorder.turn,
+                    rollback=[self.tutoring, self.recorder],
+                )
+            finally:
+                # Only the attempt that produced the reply is left to write
+                self.recorder.flush()
+            execute_span.set_attribute('tier', routing['tier'])
+        self.conversation = self.routed.conversation
 
         # Get new messages
         messages = self.conversation.get_messages()
@@ -90,18 +206,43 @@ class WebAgentSession:
                 response_text = message.content
                 self.add_message('assistant', response_text)
 
+        log.debug("Chat turn processed", extra={
+            'session_id': self.session_id,
+            'new_messages': len(new_messages),
+            'tools_used': len(tools_used),
+            'response_chars': len(response_text or ''),
+            'tier': routing['tier'],
+        })
         return {
             'response': response_text,
             'tools_used': tools_used,
             'session_ended': self.session_ended,
+            'history_cursor': len(self.messages),
+            'model_tier': routing['tier'],
         }
 
 
-def get_or_create_session(session_id: str) -> WebAgentSession:
-    """Get existing session or create new one."""
-    if session_id not in active_sessions:
-        active_sessions[session_id] = WebAgentSession(session_id)
-    return active_sessions[session_id]
+def get_or_create_session(session_id: str, student_id: str = None) -> WebAgentSession:
+    """Get existing session or create new one, resuming from the shared store."""
+    with active_sessions_lock:
+        agent_session = active_sessions.get(session_id)
+    stored_version = session_store.version(session_id)
+
+    if agent_session is None or agent_session.version != stored_version:
+        state = session_store.load(session_id) if stored_version else None
+        agent_session = WebAgentSession.from_state(state) if state else WebAgentSession(session_id, student_id)
+
+    with active_sessions_lock:
+        active_sessions[session_id] = agent_session
+        active_sessions.move_to_end(session_id)
+        while len(active_sessions) > MAX_CACHED_SESSIONS:
+            active_sessions.popitem(last=False)
+    return agent_session
+
+
+def save_session(agent_session: WebAgentSession):
+    """Persist a session after a turn so any worker can continue it."""
+    agent_session.version = session_store.save(agent_session.session_id, agent_session.to_state())
 
 
 @app.route('/')
@@ -109,7 +250,9 @@ def index():
     """Render the main chat interface."""
     if 'session_id' not in session:
         session['session_id'] = secrets.token_hex(16)
-    return render_template('index.html')
+    # Outlives /reset, so analytics can follow a student across sessions
+    session.setdefault('student_id', secrets.token_hex(16))
+    return render_template('index.html', run_enabled=WEB_RUN_ENABLED)
 
 
 @app.route('/chat', methods=['POST'])
@@ -126,17 +269,22 @@ def chat():
         if not session_id:
             return jsonify({'error': 'No session'}), 400
 
-        # Get agent session
-        agent_session = get_or_create_session(session_id)
+        with tracer.span('http.chat', endpoint='/chat', input_bytes=len(user_message.encode('utf-8'))):
+            # One turn at a time per session, across all workers
+            with session_store.lock(session_id):
+                # Get agent session
+                agent_session = get_or_create_session(session_id, session.get('student_id'))
 
-        # Process message
-        result = agent_session.process_user_message(user_message)
+                # Process message
+                result = agent_session.process_user_message(user_message)
+                save_session(agent_session)
 
-        return jsonify(result)
+            return jsonify(result)
 
+    except SessionLockTimeout as e:
+        return jsonify({'error': str(e)}), 409
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("Error in /chat")
         return jsonify({'error': str(e)}), 500
 
 
@@ -145,8 +293,10 @@ def reset():
     """Reset the current session."""
     try:
         session_id = session.get('session_id')
-        if session_id and session_id in active_sessions:
-            del active_sessions[session_id]
+        if session_id:
+            with active_sessions_lock:
+                active_sessions.pop(session_id, None)
+            session_store.delete(session_id)
 
         # Create new session ID
         session['session_id'] = secrets.token_hex(16)
@@ -158,18 +308,103 @@ def reset():
 
 @app.route('/history', methods=['GET'])
 def history():
-    """Get chat history for current session."""
+    """
+    Get a page of chat history for the current session.
+
+    Query parameters (all optional):
+        since=N   - messages with index >= N (new since the last poll)
+        before=N  - the page of messages just older than index N
+        limit=M   - page size (default 50, max 200)
+    Without since/before the newest page is returned.
+    """
     try:
+        page_args = parse_page_args(request.args)
         session_id = session.get('session_id')
-        if not session_id or session_id not in active_sessions:
-            return jsonify({'messages': []})
+        if not session_id:
+            return jsonify(paginate([], **page_args))
+
+        # History is read straight from the store; no need to rebuild the agent
+        agent_session = active_sessions.get(session_id)
+        if agent_session is not None and agent_session.version == session_store.version(session_id):
+            messages = agent_session.messages
+        else:
+            state = session_store.load(session_id)
+            messages = state['messages'] if state else []
 
-        agent_session = active_sessions[session_id]
-        return jsonify({'messages': agent_session.messages})
+        return jsonify(paginate(messages, **page_args))
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/run/stream', methods=['POST'])
+def run_stream():
+    """
+    Run the student's code and stream its output as NDJSON lines
+    ({"stream": ..., "data": ...}, then {"done": true, "result": ...}).
+    Output printed before a timeout is kept. Disabled unless
+    COMPTUTOR_WEB_RUN=1, and only answered for a browser session from `/`.
+    """
+    if not WEB_RUN_ENABLED:
+        return jsonify({'error': 'Running code is disabled on this server (set COMPTUTOR_WEB_RUN=1)'}), 403
+    if 'session_id' not in session:
+        return jsonify({'error': 'No session; open the app first'}), 403
+    data = request.get_json(silent=True) or {}
+    code = data.get('code', '')
+    if not code.strip():
+        return jsonify({'error': 'No code provided'}), 400
+    language = data.get('language') or 'python'
+    test_input = data.get('test_input', '')
+
+    def generate():
+        with tracer.span('http.run_stream', endpoint='/run/stream', language=language,
+                         input_bytes=len(code.encode('utf-8'))):
+            for event in stream_execute(code, language, test_input):
+                yield json.dumps(event, ensure_ascii=False) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Answers as soon as the worker listens; `ready` once the LLM stack is loaded."""
+    return jsonify({
+        'status': 'healthy',
+        'ready': llm_stack_ready.is_set(),
+        'warmup_error': warmup_error
+    })
+
+
+@app.route('/analytics/<report>', methods=['GET'])
+def analytics(report):
+    """
+    Read-only learning analytics for instructors (see learning_analytics.py).
+
+    Reports: hints, outcomes, mastery (?concept=), student (?student_id=), sessions.
+    Requires `Authorization: Bearer $COMPTUTOR_INSTRUCTOR_TOKEN`; disabled when that is unset.
+    """
+    denied = instructor_auth_error(request.headers)
+    if denied:
+        error, status = denied
+        return jsonify({'error': error}), status
+    if report not in ANALYTICS_REPORTS:
+        return jsonify({'error': f"Unknown report '{report}'", 'reports': list(ANALYTICS_REPORTS)}), 404
+    try:
+        return jsonify({'report': report, 'rows': run_report(report, request.args)})
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': f"Missing or invalid parameter: {e}"}), 400
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Latency histograms from trace spans, per-model-tier usage and the log queue (?format=prometheus for text)."""
+    if request.args.get('format') == 'prometheus':
+        return Response(tracer.metrics.to_prometheus(), mimetype='text/plain; version=0.0.4')
+    return jsonify(dict(tracer.metrics.snapshot(), routing=get_model_router().stats(),
+                        logging=logging_config.stats()))
+
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
+    # Debug mode (interactive debugger, reloader) only in the development profile
+    app.run(debug=logging_config.flask_debug, port=5001)